@@ -0,0 +1,296 @@
+# benchmarks/load_test.py
+
+"""
+End-to-end load test for /api/analyze-ip, fully offline.
+
+Starts two local processes:
+    1. benchmarks.mock_vendors  - stand-ins for all vendors and the Groq LLM
+    2. src.main:app             - the service, pointed at the mock vendors
+then drives /api/analyze-ip at a fixed request rate (open loop) and reports
+throughput, latency percentiles, status codes, a per-stage breakdown (from
+the Server-Timing response header, when the service emits it), per-vendor
+latency observed by the mocks, and the service's /api/stats.
+
+Usage:
+    python -m benchmarks.load_test --rps 50 --duration 30 --ips 500
+    python -m benchmarks.load_test --rps 100 --mock MOCK_IPQS_RATE_429=0.2 --json out.json
+
+Vendor behaviour is set with --mock KEY=VALUE (see benchmarks/mock_vendors.py).
+
+The service runs with its client-side rate limits and daily quotas off
+(pass --rate-limits to keep them), quota counters in a temporary file (mock
+calls never count against the real vendors' quotas) and LOG_LEVEL=WARNING
+so its logs do not drown the report.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.mock_vendors import vendor_env
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Rate-limited vendor providers (RATE_LIMIT_<NAME>_* env keys)
+RATE_LIMITED_PROVIDERS = ("ABUSEIPDB", "IPQUALITYSCORE", "IPAPI", "VIRUSTOTAL")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return round(ordered[index], 2)
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """
+    'cache;dur=0.1, provider.AbuseIPDB;dur=120.5' → {"cache": 0.1, "provider.AbuseIPDB": 120.5}
+    """
+    stages: Dict[str, float] = {}
+    for part in header.split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        for param in params:
+            key, _, value = param.partition("=")
+            if key == "dur" and name:
+                try:
+                    stages[name] = float(value)
+                except ValueError:
+                    pass
+    return stages
+
+
+def start_server(target: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def wait_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url, timeout=1.0)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start in {timeout}s")
+
+
+def make_ip_pool(size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    pool = set()
+    while len(pool) < size:
+        ip = ipaddress.IPv4Address(rng.randint(0x01000000, 0xDFFFFFFF))
+        if ip.is_global:
+            pool.add(str(ip))
+    return sorted(pool)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.stale = 0
+
+    def report(self, elapsed: float) -> Dict:
+        stages = {
+            name: {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values), 2),
+                "p95_ms": percentile(values, 0.95),
+            }
+            for name, values in sorted(self.stages.items())
+        }
+        return {
+            "requests": len(self.latencies) + sum(self.errors.values()),
+            "completed": len(self.latencies),
+            "throughput_rps": round(len(self.latencies) / elapsed, 2) if elapsed else None,
+            "latency_ms": {
+                "p50": percentile(self.latencies, 0.50),
+                "p95": percentile(self.latencies, 0.95),
+                "p99": percentile(self.latencies, 0.99),
+                "max": round(max(self.latencies), 2) if self.latencies else None,
+            },
+            "status_codes": dict(self.statuses),
+            "client_errors": dict(self.errors),
+            "stale_responses": self.stale,
+            "stages": stages,
+        }
+
+
+async def drive(base_url: str, rps: float, duration: float, ips: List[str],
+                timeout: float, seed: int) -> Dict:
+    """
+    Open-loop load: requests are started on schedule regardless of how
+    long earlier ones take, so server slowdowns show up as latency.
+    """
+    rng = random.Random(seed)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def one(ip: str):
+            started = time.perf_counter()
+            try:
+                resp = await client.get("/api/analyze-ip", params={"ip": ip})
+            except httpx.HTTPError as e:
+                recorder.errors[type(e).__name__] += 1
+                return
+            recorder.latencies.append((time.perf_counter() - started) * 1000)
+            recorder.statuses[resp.status_code] += 1
+
+            timing = resp.headers.get("server-timing")
+            if timing:
+                for name, dur in parse_server_timing(timing).items():
+                    recorder.stages[name].append(dur)
+            if resp.status_code == 200 and resp.json().get("stale"):
+                recorder.stale += 1
+
+        tasks = []
+        interval = 1.0 / rps
+        started = time.perf_counter()
+        total = int(rps * duration)
+
+        for i in range(total):
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(rng.choice(ips))))
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return recorder.report(elapsed)
+
+
+async def run(args) -> Dict:
+    mock_port = free_port()
+    app_port = free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+
+    state_dir = tempfile.mkdtemp(prefix="load-test-")
+    limits_off = {} if args.rate_limits else {
+        f"RATE_LIMIT_{name}_{limit}": "0"
+        for name in RATE_LIMITED_PROVIDERS
+        for limit in ("PER_SECOND", "PER_DAY")
+    }
+
+    mock_env = {**os.environ, **dict(kv.split("=", 1) for kv in args.mock)}
+    app_env = {
+        **os.environ,
+        **vendor_env(mock_url),
+        "SERVER_TIMING": "1",
+        "LOG_LEVEL": "WARNING",
+        # Mock calls must not count against the real vendors' daily quotas
+        "QUOTA_STATE_PATH": os.path.join(state_dir, "quota_state.json"),
+        **limits_off,
+        **dict(kv.split("=", 1) for kv in args.env),
+    }
+
+    mock = start_server("benchmarks.mock_vendors:app", mock_port, mock_env)
+    service = start_server("src.main:app", app_port, app_env)
+
+    try:
+        await wait_ready(f"{mock_url}/_mock/stats")
+        await wait_ready(f"{app_url}/api/stats")
+
+        ips = make_ip_pool(args.ips, args.seed)
+        report = await drive(app_url, args.rps, args.duration, ips, args.timeout, args.seed)
+
+        async with httpx.AsyncClient() as client:
+            report["vendors"] = (await client.get(f"{mock_url}/_mock/stats")).json()
+            report["service_stats"] = (await client.get(f"{app_url}/api/stats")).json()
+
+        report["config"] = {
+            "rps": args.rps,
+            "duration_s": args.duration,
+            "distinct_ips": args.ips,
+            "mock": args.mock,
+            "env": args.env,
+            "rate_limits": args.rate_limits,
+        }
+        return report
+    finally:
+        for proc in (service, mock):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def print_report(report: Dict) -> None:
+    lat = report["latency_ms"]
+    print("=== /api/analyze-ip load test ===")
+    print(f"requests: {report['requests']}  completed: {report['completed']}  "
+          f"throughput: {report['throughput_rps']} req/s")
+    print(f"latency ms: p50={lat['p50']}  p95={lat['p95']}  p99={lat['p99']}  max={lat['max']}")
+    print(f"status codes: {report['status_codes']}  client errors: {report['client_errors']}  "
+          f"stale: {report['stale_responses']}")
+
+    if report["stages"]:
+        print("\nper-stage (Server-Timing):")
+        for name, s in report["stages"].items():
+            print(f"  {name:<28} n={s['count']:<7} mean={s['mean_ms']:>9} ms  p95={s['p95_ms']:>9} ms")
+
+    print("\nvendors (as seen by mocks):")
+    for vendor, s in report["vendors"].items():
+        print(f"  {vendor:<10} requests={s['requests']:<7} p50={s['p50_ms']} ms  "
+              f"p95={s['p95_ms']} ms  outcomes={s['outcomes']}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=20.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--ips", type=int, default=200, help="distinct IPs in the request pool")
+    parser.add_argument("--timeout", type=float, default=30.0, help="client timeout per request")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mock", action="append", default=[], metavar="KEY=VALUE",
+                        help="mock vendor setting, e.g. MOCK_VT_ERROR_RATE=0.1")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra env for the service, e.g. LLM_BATCHING=1")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="keep the service's client-side rate limits and daily quotas")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+# benchmarks/mock_vendors.py
+
+"""
+Local stand-in servers for every external dependency of the service:
+AbuseIPDB, IPQualityScore, ipapi.co, VirusTotal and the Groq chat endpoint.
+
+One ASGI app serves all vendors under path prefixes, so a single process
+(uvicorn benchmarks.mock_vendors:app) replaces the internet:
+
+    /abuseipdb/api/v2/check?ipAddress=<ip>
+    /ipapi/<ip>/json/
+    /ipqs/api/json/ip/<key>/<ip>
+    /vt/api/v3/ip_addresses/<ip>
+    /groq/openai/v1/chat/completions          (POST)
+
+Point the service at it with vendor_env(base_url).
+
+Behaviour per vendor is configured via env (VENDOR = ABUSEIPDB, IPAPI, IPQS, VT, GROQ):
+    MOCK_<VENDOR>_LATENCY        fixed:<ms> | uniform:<lo_ms>,<hi_ms> | lognormal:<median_ms>,<sigma>
+    MOCK_<VENDOR>_ERROR_RATE     share of HTTP 500 responses   (0..1)
+    MOCK_<VENDOR>_RATE_429       share of HTTP 429 responses   (0..1)
+    MOCK_<VENDOR>_MALFORMED_RATE share of 200s with a broken body (0..1)
+    MOCK_SEED                    random seed (default 1)
+
+Responses are deterministic per IP (derived from a hash), so repeated
+runs produce the same risk signals.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+VENDORS = ("ABUSEIPDB", "IPAPI", "IPQS", "VT", "GROQ")
+
+DEFAULT_LATENCY = {
+    "ABUSEIPDB": "lognormal:120,0.4",
+    "IPAPI": "lognormal:80,0.3",
+    "IPQS": "lognormal:400,0.6",
+    "VT": "lognormal:250,0.5",
+    "GROQ": "lognormal:600,0.4",
+}
+
+
+def vendor_env(base_url: str) -> Dict[str, str]:
+    """
+    Env vars that point src/external/* and the Groq client at a mock server.
+    """
+    base_url = base_url.rstrip("/")
+    return {
+        "ABUSEIPDB_URL": f"{base_url}/abuseipdb/api/v2/check",
+        "IPAPI_BASE_URL": f"{base_url}/ipapi",
+        "IPQS_BASE_URL": f"{base_url}/ipqs/api/json/ip",
+        "VIRUSTOTAL_URL": f"{base_url}/vt/api/v3/ip_addresses/",
+        "GROQ_BASE_URL": f"{base_url}/groq",
+        "ABUSEIPDB_API_KEY": "mock",
+        "IPQUALITYSCORE_API_KEY": "mock",
+        "IPAPI_KEY": "mock",
+        "VIRUSTOTAL_API_KEY": "mock",
+        "GROQ_API_KEY": "mock",
+    }
+
+
+# ------------------------------------------------------------
+# Behaviour configuration
+# ------------------------------------------------------------
+class LatencyModel:
+    """
+    Samples response delays (seconds) from a configured distribution.
+    """
+
+    def __init__(self, spec: str, rng: random.Random):
+        self.spec = spec
+        self.rng = rng
+        kind, _, args = spec.partition(":")
+        values = [float(v) for v in args.split(",") if v.strip()] if args else []
+        self.kind = kind.strip().lower()
+        self.args = values
+
+        if self.kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency model: {spec!r}")
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            ms = self.args[0] if self.args else 0.0
+        elif self.kind == "uniform":
+            ms = self.rng.uniform(self.args[0], self.args[1])
+        else:
+            median, sigma = self.args[0], (self.args[1] if len(self.args) > 1 else 0.5)
+            ms = self.rng.lognormvariate(math.log(max(median, 1e-3)), sigma)
+        return max(ms, 0.0) / 1000.0
+
+
+class VendorBehaviour:
+    def __init__(self, vendor: str, rng: random.Random):
+        self.vendor = vendor
+        self.rng = rng
+        self.latency = LatencyModel(
+            os.getenv(f"MOCK_{vendor}_LATENCY", DEFAULT_LATENCY[vendor]), rng
+        )
+        self.error_rate = float(os.getenv(f"MOCK_{vendor}_ERROR_RATE", 0))
+        self.rate_429 = float(os.getenv(f"MOCK_{vendor}_RATE_429", 0))
+        self.malformed_rate = float(os.getenv(f"MOCK_{vendor}_MALFORMED_RATE", 0))
+
+    def outcome(self) -> str:
+        """
+        Picks "error", "throttled", "malformed" or "ok" for one request.
+        """
+        roll = self.rng.random()
+        if roll < self.error_rate:
+            return "error"
+        roll -= self.error_rate
+        if roll < self.rate_429:
+            return "throttled"
+        roll -= self.rate_429
+        if roll < self.malformed_rate:
+            return "malformed"
+        return "ok"
+
+
+_rng = random.Random(int(os.getenv("MOCK_SEED", 1)))
+BEHAVIOUR = {vendor: VendorBehaviour(vendor, _rng) for vendor in VENDORS}
+
+# Server-side observations, exposed at /_mock/stats
+STATS = {
+    "requests": Counter(),
+    "outcomes": defaultdict(Counter),
+    "latency_ms": defaultdict(list),
+}
+
+
+def _signal(ip: str, salt: str, modulo: int) -> int:
+    digest = hashlib.sha256(f"{salt}:{ip}".encode()).digest()
+    return int.from_bytes(digest[:4], "big") % modulo
+
+
+async def _respond(vendor: str, build_body) -> Response:
+    behaviour = BEHAVIOUR[vendor]
+    delay = behaviour.latency.sample()
+    outcome = behaviour.outcome()
+
+    started = time.perf_counter()
+    await asyncio.sleep(delay)
+
+    STATS["requests"][vendor] += 1
+    STATS["outcomes"][vendor][outcome] += 1
+    latencies = STATS["latency_ms"][vendor]
+    if len(latencies) < 100_000:
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    if outcome == "error":
+        return PlainTextResponse("internal error", status_code=500)
+    if outcome == "throttled":
+        return JSONResponse({"errors": [{"detail": "Too Many Requests"}]}, status_code=429)
+    if outcome == "malformed":
+        body = json.dumps(build_body())
+        return PlainTextResponse(body[: max(1, len(body) // 2)], media_type="application/json")
+
+    return JSONResponse(build_body())
+
+
+# ------------------------------------------------------------
+# Vendor endpoints
+# ------------------------------------------------------------
+app = FastAPI(title="Mock threat-intel vendors")
+
+
+@app.get("/abuseipdb/api/v2/check")
+async def abuseipdb(ipAddress: str):
+    def body():
+        return {"data": {
+            "ipAddress": ipAddress,
+            "abuseConfidenceScore": _signal(ipAddress, "abuse", 101),
+            "totalReports": _signal(ipAddress, "reports", 50),
+        }}
+    return await _respond("ABUSEIPDB", body)
+
+
+@app.get("/ipapi/{ip}/json/")
+async def ipapi(ip: str):
+    countries = ["United States", "Germany", "Netherlands", "Russia", "China", "Brazil"]
+
+    def body():
+        return {
+            "ip": ip,
+            "hostname": f"host-{_signal(ip, 'host', 10_000)}.example.net",
+            "org": f"AS{_signal(ip, 'asn', 65_000)} Example Networks",
+            "country_name": countries[_signal(ip, "country", len(countries))],
+        }
+    return await _respond("IPAPI", body)
+
+
+@app.get("/ipqs/api/json/ip/{key}/{ip}")
+async def ipqs(key: str, ip: str):
+    def body():
+        return {
+            "success": True,
+            "fraud_score": _signal(ip, "fraud", 101),
+            "vpn": _signal(ip, "vpn", 4) == 0,
+        }
+    return await _respond("IPQS", body)
+
+
+@app.get("/vt/api/v3/ip_addresses/{ip}")
+async def virustotal(ip: str):
+    def body():
+        return {"data": {"attributes": {"last_analysis_stats": {
+            "malicious": _signal(ip, "vt_mal", 8),
+            "suspicious": _signal(ip, "vt_sus", 4),
+        }}}}
+    return await _respond("VT", body)
+
+
+def _verdict_for(seed: str) -> Dict:
+    level = ("Low", "Medium", "High")[_signal(seed, "level", 3)]
+    return {
+        "risk_level": level,
+        "analysis": f"Mock analysis ({level}).",
+        "recommendations": "Mock recommendation.",
+    }
+
+
+@app.post("/groq/openai/v1/chat/completions")
+async def groq_chat(request: Request):
+    payload = await request.json()
+    prompt = payload.get("messages", [{}])[-1].get("content", "")
+
+    def body():
+        # Batched prompt (see llm_client.generate_batch_prompt): answer per item id,
+        # deterministic in the item's data like a single-IP answer
+        marker = "Input items:\n"
+        if marker in prompt:
+            try:
+                items = json.loads(prompt.split(marker, 1)[1])
+                content = json.dumps([
+                    {"id": it["id"], **_verdict_for(json.dumps(it["data"], sort_keys=True))}
+                    for it in items
+                ])
+            except (ValueError, KeyError, TypeError):
+                content = "[]"
+        else:
+            content = json.dumps(_verdict_for(prompt[-200:]))
+
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 40, "total_tokens": len(prompt) // 4 + 40},
+        }
+    return await _respond("GROQ", body)
+
+
+@app.get("/_mock/stats")
+async def mock_stats(reset: bool = False):
+    def pct(values, q):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    result = {
+        vendor: {
+            "requests": STATS["requests"][vendor],
+            "outcomes": dict(STATS["outcomes"][vendor]),
+            "p50_ms": pct(STATS["latency_ms"][vendor], 0.50),
+            "p95_ms": pct(STATS["latency_ms"][vendor], 0.95),
+        }
+        for vendor in VENDORS
+    }
+
+    if reset:
+        STATS["requests"].clear()
+        STATS["outcomes"].clear()
+        STATS["latency_ms"].clear()
+
+    return result
+
+
+def configure(vendor: str, latency: Optional[str] = None, error_rate: Optional[float] = None,
+              rate_429: Optional[float] = None, malformed_rate: Optional[float] = None) -> None:
+    """
+    Adjusts a vendor's behaviour in-process (tests, embedded use).
+    """
+    behaviour = BEHAVIOUR[vendor]
+    if latency is not None:
+        behaviour.latency = LatencyModel(latency, behaviour.rng)
+    if error_rate is not None:
+        behaviour.error_rate = error_rate
+    if rate_429 is not None:
+        behaviour.rate_429 = rate_429
+    if malformed_rate is not None:
+        behaviour.malformed_rate = malformed_rate
@@ -0,0 +1,84 @@
+# benchmarks/risk_scorer_bench.py
+
+"""
+RiskScorer.compute (per record) vs RiskScorer.compute_many (NumPy, columnar).
+
+Generates synthetic aggregated results shaped like the cache contents
+(integer scores, some missing / invalid values), scores them both ways,
+checks the results are bit-identical and prints the timings.
+
+Usage:
+    python -m benchmarks.risk_scorer_bench --records 1000000
+    python -m benchmarks.risk_scorer_bench --records 200000 --missing 0.5 --repeat 5
+"""
+
+import argparse
+import math
+import random
+import time
+
+from src.services.risk_scorer import RiskScorer
+
+MAX_VALUES = {"abuse_score": 100, "fraud_score": 100, "vt_score": 20}
+
+
+def make_records(count: int, missing: float, seed: int):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        record = {}
+        for field, max_value in MAX_VALUES.items():
+            roll = rng.random()
+            if roll < missing:
+                record[field] = None
+            elif roll < missing + 0.01:
+                record[field] = "n/a"
+            else:
+                record[field] = rng.randint(0, max_value + 10)
+        records.append(record)
+    return records
+
+
+def best_of(repeat: int, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--missing", type=float, default=0.2, help="share of missing values per field")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    scorer = RiskScorer(MAX_VALUES)
+    records = make_records(args.records, args.missing, args.seed)
+
+    scalar_time, expected = best_of(args.repeat, lambda: [scorer.compute(r) for r in records])
+    convert_time, (columns, missing) = best_of(args.repeat, lambda: scorer.to_columns(records))
+    batch_time, scores = best_of(args.repeat, lambda: scorer.compute_many(columns, missing))
+
+    mismatches = 0
+    for want, got in zip(expected, scores):
+        if want is None:
+            mismatches += not math.isnan(got)
+        elif float(got).hex() != want.hex():
+            mismatches += 1
+
+    n = args.records
+    print(f"records:                 {n}")
+    print(f"compute (per record):    {scalar_time:8.3f}s  {scalar_time / n * 1e9:8.1f} ns/record")
+    print(f"to_columns:              {convert_time:8.3f}s  {convert_time / n * 1e9:8.1f} ns/record")
+    print(f"compute_many:            {batch_time:8.3f}s  {batch_time / n * 1e9:8.1f} ns/record")
+    print(f"speedup (compute_many):  {scalar_time / batch_time:8.1f}x")
+    print(f"mismatches:              {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
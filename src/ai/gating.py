@@ -0,0 +1,156 @@
+# src/ai/gating.py
+
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _signals(data: Dict) -> str:
+    return ", ".join(
+        f"{field}={data.get(field)}"
+        for field in ("risk_score", "abuse_score", "fraud_score", "vt_score", "vpn_proxy")
+    )
+
+
+class LLMGate:
+    """
+    Rule engine in front of the LLM (a.k.a. "gating rules").
+
+    Clear-cut cases get a deterministic verdict without a model call;
+    only ambiguous data is escalated to the LLM. Rules are evaluated in
+    order and the first match wins:
+
+        high_abuse   abuse_score >= high_abuse_score          → High
+        high_score   risk_score  >= high_min_score            → High
+        clean        risk_score  <= low_max_score, every required
+                     provider field reported, not a VPN/proxy,
+                     no timed-out providers                   → Low
+
+    Thresholds are configurable (constructor or env):
+        LLM_GATE_HIGH_ABUSE_SCORE  (default 90)
+        LLM_GATE_HIGH_MIN_SCORE    (default 0.9)
+        LLM_GATE_LOW_MAX_SCORE     (default 0.05)
+        LLM_GATE_REQUIRED_FIELDS   (default "abuse_score,fraud_score")
+
+    stats() reports how often each rule fired and how many LLM calls were avoided.
+    """
+
+    def __init__(
+        self,
+        high_abuse_score: Optional[float] = None,
+        high_min_score: Optional[float] = None,
+        low_max_score: Optional[float] = None,
+        required_fields: Optional[Tuple[str, ...]] = None,
+    ):
+        self.high_abuse_score = (
+            high_abuse_score if high_abuse_score is not None
+            else _env_float("LLM_GATE_HIGH_ABUSE_SCORE", 90)
+        )
+        self.high_min_score = (
+            high_min_score if high_min_score is not None
+            else _env_float("LLM_GATE_HIGH_MIN_SCORE", 0.9)
+        )
+        self.low_max_score = (
+            low_max_score if low_max_score is not None
+            else _env_float("LLM_GATE_LOW_MAX_SCORE", 0.05)
+        )
+        self.required_fields = required_fields or tuple(
+            field.strip()
+            for field in os.getenv("LLM_GATE_REQUIRED_FIELDS", "abuse_score,fraud_score").split(",")
+            if field.strip()
+        )
+
+        # (rule name, predicate, verdict builder), evaluated in order
+        self.rules: List[Tuple[str, Callable[[Dict], bool], Callable[[Dict], Dict]]] = [
+            ("high_abuse", self._is_high_abuse, self._high_verdict),
+            ("high_score", self._is_high_score, self._high_verdict),
+            ("clean", self._is_clean, self._low_verdict),
+        ]
+
+        self.counters: Dict[str, int] = {name: 0 for name, _, _ in self.rules}
+        self.escalated = 0
+
+    # ------------------------------------------------------------
+    # Rules
+    # ------------------------------------------------------------
+    def _is_high_abuse(self, data: Dict) -> bool:
+        abuse = data.get("abuse_score")
+        return _is_number(abuse) and abuse >= self.high_abuse_score
+
+    def _is_high_score(self, data: Dict) -> bool:
+        score = data.get("risk_score")
+        return _is_number(score) and score >= self.high_min_score
+
+    def _is_clean(self, data: Dict) -> bool:
+        score = data.get("risk_score")
+        if not _is_number(score) or score > self.low_max_score:
+            return False
+
+        if any(data.get(field) is None for field in self.required_fields):
+            return False
+
+        if data.get("vpn_proxy") or data.get("timed_out_providers"):
+            return False
+
+        return True
+
+    # ------------------------------------------------------------
+    # Deterministic verdicts
+    # ------------------------------------------------------------
+    @staticmethod
+    def _high_verdict(data: Dict) -> Dict:
+        return {
+            "risk_level": "High",
+            "analysis": (
+                "Rule-based verdict: threat-intel sources report strong abuse "
+                f"indicators ({_signals(data)})."
+            ),
+            "recommendations": "Block or rate-limit this IP and review related activity.",
+        }
+
+    @staticmethod
+    def _low_verdict(data: Dict) -> Dict:
+        return {
+            "risk_level": "Low",
+            "analysis": (
+                "Rule-based verdict: all required threat-intel sources responded "
+                f"and report no meaningful risk ({_signals(data)})."
+            ),
+            "recommendations": "No action required; continue routine monitoring.",
+        }
+
+    # ------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------
+    def decide(self, data: Dict) -> Optional[Dict]:
+        """
+        Returns a deterministic verdict for clear-cut data,
+        or None when the case must be escalated to the LLM.
+        """
+        for name, predicate, verdict in self.rules:
+            if predicate(data):
+                self.counters[name] += 1
+                return verdict(data)
+
+        self.escalated += 1
+        return None
+
+    def stats(self) -> Dict:
+        avoided = sum(self.counters.values())
+        total = avoided + self.escalated
+        return {
+            "rules": dict(self.counters),
+            "llm_calls_avoided": avoided,
+            "escalated": self.escalated,
+            "avoided_ratio": round(avoided / total, 4) if total else None,
+        }
@@ -0,0 +1,253 @@
+# src/ai/json_repair.py
+
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# How often each local repair rule was needed (plus parse outcomes)
+REPAIR_STATS: Counter = Counter()
+
+_FENCE_RE = re.compile(r"```[a-zA-Z]*")
+
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _normalize(text: str, start: int) -> Tuple[str, List[str], int]:
+    """
+    Single pass over text[start:] that rewrites common LLM JSON mistakes
+    into valid JSON. Stops when the top-level value is closed.
+
+    Returns (normalized_text, fired_rules, end_index).
+    """
+    out: List[str] = []
+    rules: List[str] = []
+    stack: List[str] = []
+    quote: Optional[str] = None   # quote char of the open string, if any
+    i = start
+    n = len(text)
+
+    def fire(rule: str):
+        if rule not in rules:
+            rules.append(rule)
+
+    while i < n:
+        c = text[i]
+
+        if quote:
+            if c == "\\" and i + 1 < n:
+                nxt = text[i + 1]
+                # \' is not a valid JSON escape
+                out.append("'" if nxt == "'" else c + nxt)
+                i += 2
+                continue
+            if c == quote:
+                out.append('"')
+                quote = None
+            elif c == '"':
+                out.append('\\"')          # double quote inside a single-quoted string
+            elif c == "\n":
+                out.append("\\n")
+                fire("unescaped_newlines")
+            elif c == "\r":
+                out.append("\\r")
+                fire("unescaped_newlines")
+            elif c == "\t":
+                out.append("\\t")
+                fire("unescaped_newlines")
+            else:
+                out.append(c)
+            i += 1
+            continue
+
+        if c in "\"'":
+            if c == "'":
+                fire("single_quotes")
+            quote = c
+            out.append('"')
+        elif c in "{[":
+            stack.append(c)
+            out.append(c)
+        elif c in "}]":
+            _drop_trailing_comma(out, fire)
+            if stack:
+                stack.pop()
+            out.append(c)
+            if not stack:
+                return "".join(out), rules, i + 1
+        elif c.isalpha() or c == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            k = j
+            while k < n and text[k].isspace():
+                k += 1
+            if stack and stack[-1] == "{" and k < n and text[k] == ":":
+                fire("unquoted_keys")
+                word = f'"{word}"'
+            elif word in _LITERALS:
+                fire("python_literals")
+                word = _LITERALS[word]
+            out.append(word)
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    # Input ended before the value was closed: model output was truncated
+    if quote:
+        out.append('"')
+    _drop_trailing_comma(out, fire)
+    if "".join(out).rstrip().endswith(":"):
+        out.append(" null")
+    if stack or quote:
+        fire("close_truncated")
+    for opener in reversed(stack):
+        out.append(_CLOSERS[opener])
+
+    return "".join(out), rules, n
+
+
+def _drop_trailing_comma(out: List[str], fire) -> None:
+    k = len(out) - 1
+    while k >= 0 and out[k].isspace():
+        k -= 1
+    if k >= 0 and out[k] == ",":
+        del out[k]
+        fire("trailing_commas")
+
+
+def tolerant_parse(text: Optional[str]) -> Optional[Any]:
+    """
+    Local, tolerant JSON recovery for model output. Handles:
+        code fences, prose before/after the JSON value, trailing commas,
+        single-quoted strings, unquoted keys, unescaped newlines in strings,
+        Python literals (True/False/None) and truncated closing braces.
+    Returns the parsed value, or None if the text cannot be recovered.
+    Every rule that was needed is counted in REPAIR_STATS.
+    """
+    if not text:
+        return None
+
+    try:
+        value = json.loads(text)
+        REPAIR_STATS["clean"] += 1
+        return value
+    except ValueError:
+        pass
+
+    fired: List[str] = []
+
+    if "```" in text:
+        text = _FENCE_RE.sub("", text)
+        fired.append("code_fence")
+
+    starts = [pos for pos in (text.find("{"), text.find("[")) if pos != -1]
+    if not starts:
+        REPAIR_STATS["unrecoverable"] += 1
+        return None
+    start = min(starts)
+
+    normalized, rules, end = _normalize(text, start)
+    fired.extend(rules)
+
+    if text[:start].strip() or text[end:].strip():
+        fired.append("extra_prose")
+
+    try:
+        value = json.loads(normalized)
+    except ValueError:
+        REPAIR_STATS["unrecoverable"] += 1
+        return None
+
+    for rule in fired:
+        REPAIR_STATS[rule] += 1
+    REPAIR_STATS["repaired"] += 1
+    return value
+
+
+# ------------------------------------------------------------
+# Schema coercion for the verdict
+# ------------------------------------------------------------
+_RISK_LEVELS = {
+    "low": "Low",
+    "minimal": "Low",
+    "none": "Low",
+    "safe": "Low",
+    "medium": "Medium",
+    "moderate": "Medium",
+    "high": "High",
+    "critical": "High",
+    "severe": "High",
+}
+
+_FIELD_ALIASES = {
+    "risk_level": ("risk_level", "risklevel", "risk", "level"),
+    "analysis": ("analysis", "risk_analysis", "summary"),
+    "recommendations": ("recommendations", "recommendation", "actions"),
+}
+
+
+def _as_text(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def coerce_verdict(obj: Any, fallback: Dict) -> Dict:
+    """
+    Coerces a parsed model answer into the verdict schema:
+        {"risk_level": "Low"|"Medium"|"High"|"Unknown", "analysis": str, "recommendations": str}
+    Field names are matched case-insensitively (with a few aliases),
+    lists are joined, unknown risk levels become "Unknown", and missing
+    fields take the value from `fallback`.
+    """
+    if isinstance(obj, list) and len(obj) == 1:
+        obj = obj[0]
+    if not isinstance(obj, dict):
+        return dict(fallback)
+
+    lowered = {str(k).lower().replace(" ", "_"): v for k, v in obj.items()}
+
+    def pick(field):
+        for alias in _FIELD_ALIASES[field]:
+            if alias in lowered:
+                return lowered[alias]
+        return None
+
+    level = _as_text(pick("risk_level"))
+    if level is not None:
+        level = _RISK_LEVELS.get(level.strip().lower(), "Unknown")
+
+    verdict = {
+        "risk_level": level,
+        "analysis": _as_text(pick("analysis")),
+        "recommendations": _as_text(pick("recommendations")),
+    }
+
+    coerced = False
+    for key, value in verdict.items():
+        if value is None:
+            verdict[key] = fallback[key]
+            coerced = True
+        elif key in obj and obj[key] == value:
+            continue
+        else:
+            coerced = True
+
+    if coerced:
+        REPAIR_STATS["schema_coerced"] += 1
+
+    return verdict
+
+
+def repair_stats() -> Dict[str, int]:
+    return dict(REPAIR_STATS)
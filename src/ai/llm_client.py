@@ -1,14 +1,25 @@
 ﻿import os
 import json
+import asyncio
 import logging
 from dotenv import load_dotenv
-from groq import Groq
+from groq import AsyncGroq, Groq
+
+from src.ai.json_repair import REPAIR_STATS, coerce_verdict, tolerant_parse
+from src.services.metrics import stage
 
 load_dotenv()
 log = logging.getLogger("llm_client")
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+LLM_MODEL = "llama-3.1-8b-instant"
 client = Groq(api_key=GROQ_API_KEY)
+async_client = AsyncGroq(api_key=GROQ_API_KEY)
+
+# Max LLM requests in flight at once on the async path.
+# Bounds concurrency explicitly instead of by thread-pool size.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 32))
+llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
 
 FALLBACK = {
     "risk_level": "Unknown",
@@ -41,7 +52,7 @@ def generate_prompt(threat_data: dict) -> str:
 def call_llm(prompt: str) -> str | None:
     try:
         resp = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+            model=LLM_MODEL,
             messages=[
                 {"role": "system", "content": "Return ONLY JSON."},
                 {"role": "user", "content": prompt},
@@ -54,6 +65,28 @@ def call_llm(prompt: str) -> str | None:
         return None
 
 
+async def call_llm_async(prompt: str) -> str | None:
+    """
+    Native async variant of call_llm(): no worker thread is held while
+    waiting for the model. At most LLM_MAX_CONCURRENCY calls run at once;
+    further callers wait on the semaphore.
+    """
+    try:
+        async with llm_semaphore:
+            resp = await async_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[
+                    {"role": "system", "content": "Return ONLY JSON."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+            )
+        return resp.choices[0].message.content
+    except Exception as e:
+        log.debug(f"[LLM ERROR] {e}")
+        return None
+
+
 # ------------------------------------------------------------
 # 3. JSON EXTRACTOR / SELF-REPAIR
 # ------------------------------------------------------------
@@ -87,17 +120,27 @@ def extract_json_block(text: str):
     return None
 
 
-def repair_json(text: str) -> dict | None:
-    """
-    Просим LLM исправить JSON. Второй шанс.
-    """
-    fix_prompt = (
+def build_repair_prompt(text: str) -> str:
+    return (
         "Fix the following text into a VALID JSON object. "
         "Return ONLY the valid JSON.\n\n"
         f"{text}"
     )
 
-    fixed = call_llm(fix_prompt)
+
+def repair_json(text: str) -> dict | None:
+    """
+    Просим LLM исправить JSON. Второй шанс.
+    """
+    fixed = call_llm(build_repair_prompt(text))
+    if not fixed:
+        return None
+
+    return extract_json_block(fixed)
+
+
+async def repair_json_async(text: str) -> dict | None:
+    fixed = await call_llm_async(build_repair_prompt(text))
     if not fixed:
         return None
 
@@ -119,15 +162,240 @@ def analyze_with_llm(threat_data: dict) -> dict:
     if raw is None:
         return FALLBACK
 
-    # 3) Парсим JSON из ответа
+    # 3) Парсим JSON из ответа (strict, then local tolerant repair)
     parsed = extract_json_block(raw)
+    if parsed is None:
+        parsed = tolerant_parse(raw)
     if parsed is not None:
-        return parsed
+        return coerce_verdict(parsed, FALLBACK)
 
-    # 4) Попытка self-repair
+    # 4) Попытка self-repair (second LLM round-trip, last resort)
     repaired = repair_json(raw)
     if repaired is not None:
-        return repaired
+        REPAIR_STATS["llm_repair"] += 1
+        return coerce_verdict(repaired, FALLBACK)
 
     # 5) Fallback
     return FALLBACK
+
+
+async def analyze_with_llm_async(threat_data: dict) -> dict:
+    """
+    Async twin of analyze_with_llm() used by the API: same steps,
+    same fallbacks, but awaits the model instead of blocking a thread.
+    """
+    if not GROQ_API_KEY:
+        return FALLBACK
+
+    with stage("prompt_build"):
+        prompt = generate_prompt(threat_data)
+
+    with stage("llm_call"):
+        raw = await call_llm_async(prompt)
+    if raw is None:
+        return FALLBACK
+
+    with stage("json_extract"):
+        parsed = extract_json_block(raw)
+        if parsed is None:
+            parsed = tolerant_parse(raw)
+    if parsed is not None:
+        return coerce_verdict(parsed, FALLBACK)
+
+    with stage("llm_repair"):
+        repaired = await repair_json_async(raw)
+    if repaired is not None:
+        REPAIR_STATS["llm_repair"] += 1
+        return coerce_verdict(repaired, FALLBACK)
+
+    return FALLBACK
+
+
+# ------------------------------------------------------------
+# 5. MULTI-IP BATCHING
+# ------------------------------------------------------------
+VERDICT_KEYS = ("risk_level", "analysis", "recommendations")
+
+# Collect pending analyses for up to LLM_BATCH_WINDOW_MS or LLM_BATCH_MAX_ITEMS
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", 20))
+LLM_BATCH_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", 8))
+
+
+def batch_item_id(position: int) -> str:
+    return f"item-{position}"
+
+
+def generate_batch_prompt(items: dict) -> str:
+    """
+    One prompt for several IPs: {item_id: threat_data} → JSON array request.
+    The fixed instruction header is paid once per batch instead of per IP.
+    Items are keyed by opaque ids (batch_item_id), never by the IP: the
+    answers are cached per feature vector and reused for other IPs, so the
+    model must not see (and quote) the address.
+    """
+    payload = [{"id": item_id, "data": data} for item_id, data in items.items()]
+    return (
+        "You MUST return ONLY a valid JSON array.\n"
+        "No text before it. No text after it. No code fences.\n"
+        "Return exactly one element per input item, in any order.\n"
+        "Element schema:\n"
+        "{\n"
+        '  "id": "<id of the input item>",\n'
+        '  "risk_level": "Low" | "Medium" | "High",\n'
+        '  "analysis": "string",\n'
+        '  "recommendations": "string"\n'
+        "}\n\n"
+        "Input items:\n"
+        f"{json.dumps(payload, ensure_ascii=False)}"
+    )
+
+
+def _valid_verdict(item) -> bool:
+    return isinstance(item, dict) and all(isinstance(item.get(k), str) for k in VERDICT_KEYS)
+
+
+def parse_batch_response(text: str | None, keys) -> dict:
+    """
+    Extracts per-item verdicts from a batch answer. Each element is validated
+    on its own; invalid or unknown elements are dropped so only those items
+    fall back to the single-IP path. Valid elements are normalized with
+    coerce_verdict() exactly like a single-IP answer. Returns {item_id: verdict}.
+    """
+    if not text:
+        return {}
+
+    data = try_parse_json(text)
+    if data is None:
+        start = text.find("[")
+        end = text.rfind("]")
+        if start != -1 and end > start:
+            data = try_parse_json(text[start : end + 1])
+
+    # Some models wrap the array: {"results": [...]}
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), None)
+
+    if not isinstance(data, list):
+        return {}
+
+    wanted = set(keys)
+    verdicts = {}
+    for item in data:
+        if not _valid_verdict(item) or item.get("id") not in wanted:
+            continue
+        verdicts[item["id"]] = coerce_verdict({k: item[k] for k in VERDICT_KEYS}, FALLBACK)
+
+    return verdicts
+
+
+class LLMBatcher:
+    """
+    Micro-batches concurrent LLM analyses into one multi-IP prompt.
+
+    submit() parks the caller until the batch is flushed, which happens
+    when max_items are pending or window_ms after the first pending item.
+    Every element of the answer is validated individually; items missing
+    from the answer (or malformed) fall back to analyze_with_llm_async().
+    """
+
+    def __init__(self, window_ms: float = LLM_BATCH_WINDOW_MS, max_items: int = LLM_BATCH_MAX_ITEMS):
+        self.window = window_ms / 1000.0
+        self.max_items = max(1, max_items)
+
+        # {ip: (threat_data, [futures])}: duplicate IPs share one slot
+        self._pending: dict = {}
+        self._timer: asyncio.Task | None = None
+        self._flushes: set = set()
+
+        self.batches_sent = 0
+        self.items_batched = 0
+        self.item_fallbacks = 0
+
+    async def submit(self, ip: str, threat_data: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+
+        if ip in self._pending:
+            self._pending[ip][1].append(future)
+        else:
+            self._pending[ip] = (threat_data, [future])
+
+        if len(self._pending) >= self.max_items:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+        return await future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._timer = None
+        self._start_flush()
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: dict) -> None:
+        try:
+            try:
+                verdicts = await self._run_batch(batch)
+            except Exception as e:
+                log.debug(f"[LLM BATCH ERROR] {e}")
+                verdicts = {}
+
+            # Per-item fallback to the single-IP path
+            missing = [ip for ip in batch if ip not in verdicts]
+            if len(batch) > 1:
+                self.item_fallbacks += len(missing)
+
+            if missing:
+                results = await asyncio.gather(
+                    *(analyze_with_llm_async(batch[ip][0]) for ip in missing),
+                    return_exceptions=True,
+                )
+                for ip, result in zip(missing, results):
+                    verdicts[ip] = FALLBACK if isinstance(result, Exception) else result
+
+            for ip, (_, futures) in batch.items():
+                for future in futures:
+                    if not future.done():
+                        future.set_result(verdicts[ip])
+        finally:
+            # Flush cancelled (shutdown): do not leave callers hanging
+            for _, futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.cancel()
+
+    async def _run_batch(self, batch: dict) -> dict:
+        # A single item gains nothing from the array prompt
+        if len(batch) == 1 or not GROQ_API_KEY:
+            return {}
+
+        self.batches_sent += 1
+        self.items_batched += len(batch)
+
+        with stage("prompt_build", mode="batch"):
+            ips = {batch_item_id(position): ip for position, ip in enumerate(batch)}
+            prompt = generate_batch_prompt({item_id: batch[ip][0] for item_id, ip in ips.items()})
+        with stage("llm_call", mode="batch"):
+            raw = await call_llm_async(prompt)
+        with stage("json_extract", mode="batch"):
+            verdicts = parse_batch_response(raw, ips.keys())
+            return {ips[item_id]: verdict for item_id, verdict in verdicts.items()}
+
+    def stats(self) -> dict:
+        return {
+            "batches_sent": self.batches_sent,
+            "items_batched": self.items_batched,
+            "item_fallbacks": self.item_fallbacks,
+        }
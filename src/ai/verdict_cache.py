@@ -0,0 +1,119 @@
+# src/ai/verdict_cache.py
+
+import json
+import os
+from typing import Dict, Optional
+
+from src.services.cache_service import CacheService
+
+
+# Fields that identify the IP rather than describe its risk.
+# They are excluded from the cache key and from the LLM prompt, so one
+# verdict can be reused for every IP with the same risk signals.
+IDENTITY_FIELDS = ("ip", "hostname", "isp")
+
+# Bookkeeping fields that are not risk signals
+IGNORED_FIELDS = ("risk_score", "timed_out_providers", "stale")
+
+# Default bucket widths for numeric signals
+DEFAULT_BUCKETS = {
+    "abuse_score": 10,
+    "fraud_score": 10,
+    "vt_score": 2,
+    "recent_reports": 5,
+}
+
+
+def parse_buckets(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Parses "abuse_score=10,fraud_score=5" into {"abuse_score": 10.0, ...}.
+    Malformed parts are ignored.
+    """
+    buckets: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, _, width = part.partition("=")
+        try:
+            buckets[name.strip()] = float(width)
+        except ValueError:
+            continue
+    return buckets
+
+
+class VerdictCache:
+    """
+    Caches LLM verdicts keyed by a canonical, quantized feature vector.
+
+    The key is built from the aggregated threat fields minus identity fields:
+        - numeric signals become their bucket (abuse 43 → "[40, 50)" with width 10)
+        - booleans and None are kept as-is
+        - strings (e.g. country) are normalized case-insensitively
+    Two IPs with the same quantized signals share one LLM call. The LLM is
+    prompted with exactly these quantized features, so the verdict text
+    never quotes a value that other IPs under the same key do not have.
+
+    Bucket widths are configurable (env VERDICT_BUCKETS, e.g.
+    "abuse_score=10,fraud_score=10,vt_score=2,recent_reports=5").
+    Hit ratio is reported by stats().
+    """
+
+    def __init__(
+        self,
+        buckets: Optional[Dict[str, float]] = None,
+        ttl_seconds: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.buckets = {**DEFAULT_BUCKETS, **(buckets or {})}
+        self.cache = CacheService(
+            ttl_seconds=ttl_seconds if ttl_seconds is not None else int(os.getenv("VERDICT_CACHE_TTL", 3600)),
+            max_entries=max_entries if max_entries is not None else int(os.getenv("VERDICT_CACHE_MAX_ENTRIES", 50_000)),
+        )
+
+    @staticmethod
+    def prompt_features(data: Dict) -> Dict:
+        """
+        Threat data without identity/bookkeeping fields: what the LLM sees,
+        so the cached verdict does not refer to one particular IP.
+        """
+        return {
+            key: value for key, value in data.items()
+            if key not in IDENTITY_FIELDS and key not in IGNORED_FIELDS
+        }
+
+    def _quantize(self, field: str, value):
+        if value is None or isinstance(value, bool):
+            return value
+
+        if isinstance(value, (int, float)):
+            width = self.buckets.get(field)
+            if not width or width <= 0:
+                return value
+            low = (value // width) * width
+            high = low + width
+            low, high = (int(v) if float(v).is_integer() else v for v in (low, high))
+            return f"[{low}, {high})"
+
+        if isinstance(value, str):
+            return value.strip().lower()
+
+        return value
+
+    def quantized_features(self, data: Dict) -> Dict:
+        """
+        The canonical feature vector: both the LLM prompt and the cache key.
+        """
+        return {
+            field: self._quantize(field, value)
+            for field, value in self.prompt_features(data).items()
+        }
+
+    def feature_key(self, data: Dict) -> str:
+        return json.dumps(self.quantized_features(data), sort_keys=True, default=str)
+
+    def get(self, data: Dict) -> Optional[Dict]:
+        return self.cache.get(self.feature_key(data))
+
+    def set(self, data: Dict, verdict: Dict) -> None:
+        self.cache.set(self.feature_key(data), verdict)
+
+    def stats(self) -> Dict:
+        return self.cache.stats()
@@ -1,15 +1,23 @@
-﻿import os
+﻿import logging
+import os
+from typing import Optional
+
 import httpx
 from dotenv import load_dotenv
 
+from src.external.outcome import report_error, status_error_kind
+from src.services.logging_service import log_event
+
 # Load environment variables from .env file
 load_dotenv()
 
-# API endpoint for AbuseIPDB IP check
-ABUSEIPDB_URL = "https://api.abuseipdb.com/api/v2/check"
+log = logging.getLogger("external.abuseipdb")
+
+# API endpoint for AbuseIPDB IP check (overridable, e.g. for local mock servers)
+ABUSEIPDB_URL = os.getenv("ABUSEIPDB_URL", "https://api.abuseipdb.com/api/v2/check")
 
 
-async def fetch_abuse(ip: str) -> dict:
+async def fetch_abuse(ip: str, client: Optional[httpx.AsyncClient] = None) -> dict:
     """
     Asynchronously fetches threat intelligence data from the AbuseIPDB API.
     Returns a normalized dictionary with two fields:
@@ -19,7 +27,9 @@ async def fetch_abuse(ip: str) -> dict:
         }
 
     The function is fully async and performs real non-blocking network I/O
-    via httpx.AsyncClient. All errors (network, HTTP status, JSON parse)
+    via httpx.AsyncClient. When a pooled client is passed in, it is reused
+    (keep-alive); otherwise a short-lived client is opened for this call.
+    All errors (network, HTTP status, JSON parse)
     are handled internally and produce a neutral fallback object.
 
     Expected schema from AbuseIPDB:
@@ -41,23 +51,32 @@ async def fetch_abuse(ip: str) -> dict:
     api_key = os.getenv("ABUSEIPDB_API_KEY")
 
     if not api_key:
-        print(f"[AbuseIPDB] No API key provided. Using fallback for {ip}")
+        log_event(log, logging.WARNING, "provider.no_api_key",
+                  "No API key provided, using fallback", provider="AbuseIPDB", ip=ip)
+        report_error("no_api_key")
         return {
             "abuse_score": None,
             "recent_reports": None,
         }
 
+    request = {
+        "params": {"ipAddress": ip, "maxAgeInDays": 90},
+        "headers": {"Key": api_key, "Accept": "application/json"},
+    }
+
     try:
-        # Use AsyncClient for non-blocking HTTP I/O.
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.get(
-                ABUSEIPDB_URL,
-                params={"ipAddress": ip, "maxAgeInDays": 90},
-                headers={"Key": api_key, "Accept": "application/json"},
-            )
+        if client is not None:
+            # Reuse the long-lived pooled client (no new handshake).
+            resp = await client.get(ABUSEIPDB_URL, **request)
+        else:
+            # Use AsyncClient for non-blocking HTTP I/O.
+            async with httpx.AsyncClient(timeout=5.0) as own_client:
+                resp = await own_client.get(ABUSEIPDB_URL, **request)
     except Exception as e:
         # Network errors: DNS issues, timeouts, connection refused, SSL errors.
-        print(f"[AbuseIPDB] Network error for {ip}: {e!r}")
+        log_event(log, logging.WARNING, "provider.network_error",
+                  "Network error", provider="AbuseIPDB", ip=ip, error=repr(e))
+        report_error("network")
         return {
             "abuse_score": None,
             "recent_reports": None,
@@ -67,10 +86,10 @@ async def fetch_abuse(ip: str) -> dict:
     # but the service contract for this function requires that we never
     # propagate error states beyond this boundary.
     if resp.status_code != 200:
-        print(
-            f"[AbuseIPDB] Bad status {resp.status_code} for {ip}. "
-            f"Body preview: {resp.text[:200]!r}"
-        )
+        log_event(log, logging.WARNING, "provider.bad_status",
+                  "Bad status", provider="AbuseIPDB", ip=ip,
+                  status=resp.status_code, body_preview=resp.text[:200])
+        report_error(status_error_kind(resp.status_code, resp.text))
         return {
             "abuse_score": None,
             "recent_reports": None,
@@ -81,10 +100,10 @@ async def fetch_abuse(ip: str) -> dict:
         data = resp.json().get("data", {})
     except Exception as e:
         # JSON parsing can fail if a partial or malformed response is returned.
-        print(
-            f"[AbuseIPDB] JSON parse error for {ip}: {e!r}. "
-            f"Raw response: {resp.text[:200]!r}"
-        )
+        log_event(log, logging.WARNING, "provider.parse_error",
+                  "JSON parse error", provider="AbuseIPDB", ip=ip,
+                  error=repr(e), body_preview=resp.text[:200])
+        report_error("parse")
         return {
             "abuse_score": None,
             "recent_reports": None,
@@ -1,18 +1,28 @@
+import logging
 import os
+from typing import Optional
+
 import httpx
 from dotenv import load_dotenv
 
+from src.external.outcome import report_error, status_error_kind
+from src.services.logging_service import log_event
+
 load_dotenv()  # Load environment variables from .env
 
+log = logging.getLogger("external.ipapi")
+
 IPAPI_KEY = os.getenv("IPAPI_KEY")  # Read IPAPI key from environment
+IPAPI_BASE_URL = os.getenv("IPAPI_BASE_URL", "https://ipapi.co")  # Overridable for mock servers
 
 
-async def fetch_ipapi(ip: str) -> dict:
+async def fetch_ipapi(ip: str, client: Optional[httpx.AsyncClient] = None) -> dict:
     # Asynchronously fetches hostname, ISP, and country info for a given IP address.
     # Uses the IPAPI.io service and returns a safe fallback on any error.
     """
     Fetches hostname, ISP, and country information for the given IP using IPAPI.io.
     Returns a safe fallback object on any failure.
+    Reuses the pooled client when one is passed in.
     """
 
     # Default safe return object
@@ -24,37 +34,45 @@ async def fetch_ipapi(ip: str) -> dict:
 
     # If no API key  return fallback
     if not IPAPI_KEY:
-        print(f"[IPAPI] No IPAPI_KEY provided. Using fallback for {ip}")
+        log_event(log, logging.WARNING, "provider.no_api_key",
+                  "No IPAPI_KEY provided, using fallback", provider="IPAPI", ip=ip)
+        report_error("no_api_key")
         return fallback
 
     # Build request URL
-    url = f"https://ipapi.co/{ip}/json/?api_key={IPAPI_KEY}"
+    url = f"{IPAPI_BASE_URL}/{ip}/json/?api_key={IPAPI_KEY}"
 
     try:
-        # Perform real async HTTP GET request
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        if client is not None:
+            # Reuse the long-lived pooled client
             resp = await client.get(url)
+        else:
+            # Perform real async HTTP GET request
+            async with httpx.AsyncClient(timeout=5.0) as own_client:
+                resp = await own_client.get(url)
     except Exception as e:
         # Network or request failure
-        print(f"[IPAPI] Network error for {ip}: {e!r}")
+        log_event(log, logging.WARNING, "provider.network_error",
+                  "Network error", provider="IPAPI", ip=ip, error=repr(e))
+        report_error("network")
         return fallback
 
     # If non-200 response  fallback
     if resp.status_code != 200:
-        print(
-            f"[IPAPI] Bad status {resp.status_code} for {ip}. "
-            f"Body preview: {resp.text[:200]!r}"
-        )
+        log_event(log, logging.WARNING, "provider.bad_status",
+                  "Bad status", provider="IPAPI", ip=ip,
+                  status=resp.status_code, body_preview=resp.text[:200])
+        report_error(status_error_kind(resp.status_code, resp.text))
         return fallback
 
     try:
         # Parse response as JSON
         data = resp.json()
     except Exception as e:
-        print(
-            f"[IPAPI] JSON parse error for {ip}: {e!r}. "
-            f"Raw response: {resp.text[:200]!r}"
-        )
+        log_event(log, logging.WARNING, "provider.parse_error",
+                  "JSON parse error", provider="IPAPI", ip=ip,
+                  error=repr(e), body_preview=resp.text[:200])
+        report_error("parse")
         return fallback
 
     # Return parsed fields
@@ -1,24 +1,38 @@
-﻿import os
+﻿import logging
+import os
+from typing import Optional
+
 import httpx
 from dotenv import load_dotenv
 
+from src.external.outcome import report_error, status_error_kind
+from src.services.logging_service import log_event
+
 # Load variables
 load_dotenv()
 
+log = logging.getLogger("external.ipquality")
+
 IPQUALITY_API_KEY = os.getenv("IPQUALITYSCORE_API_KEY")
-BASE_URL = "https://ipqualityscore.com/api/json/ip"
+BASE_URL = os.getenv("IPQS_BASE_URL", "https://ipqualityscore.com/api/json/ip")
 
 
-async def fetch_quality(ip: str) -> dict:
+async def fetch_quality(ip: str, client: Optional[httpx.AsyncClient] = None) -> dict:
     """
     Correct async version for IPQualityScore.
     Works stably even when the server breaks TLS handshake
     or responds with a non-standard chain.
+
+    A pooled client passed in by the caller must already be configured
+    the same way (verify=False, transport retries); see
+    IPQualityScoreProvider.client_options.
     """
 
     # Missing key → fallback
     if not IPQUALITY_API_KEY:
-        print(f"[IPQS] No IPQUALITYSCORE_API_KEY provided. Using fallback for {ip}")
+        log_event(log, logging.WARNING, "provider.no_api_key",
+                  "No IPQUALITYSCORE_API_KEY provided, using fallback", provider="IPQS", ip=ip)
+        report_error("no_api_key")
         return {
             "fraud_score": None,
             "vpn": None,
@@ -27,21 +41,27 @@ async def fetch_quality(ip: str) -> dict:
     url = f"{BASE_URL}/{IPQUALITY_API_KEY}/{ip}"
 
     try:
-        # The ONLY reliable way to call IPQS async:
-        # - disable strict certificate verification
-        # - use explicit AsyncHTTPTransport
-        # - allow retries (server often drops first connection)
-        transport = httpx.AsyncHTTPTransport(retries=2)
-
-        async with httpx.AsyncClient(
-            transport=transport,
-            verify=False,     # IPQS free-tier often has broken cert chain
-            timeout=8.0
-        ) as client:
+        if client is not None:
+            # Reuse the long-lived pooled client
             resp = await client.get(url)
+        else:
+            # The ONLY reliable way to call IPQS async:
+            # - disable strict certificate verification
+            # - use explicit AsyncHTTPTransport
+            # - allow retries (server often drops first connection)
+            transport = httpx.AsyncHTTPTransport(retries=2)
+
+            async with httpx.AsyncClient(
+                transport=transport,
+                verify=False,     # IPQS free-tier often has broken cert chain
+                timeout=8.0
+            ) as own_client:
+                resp = await own_client.get(url)
 
     except Exception as e:
-        print(f"[IPQS] Network/TLS error for {ip}: {e!r}")
+        log_event(log, logging.WARNING, "provider.network_error",
+                  "Network/TLS error", provider="IPQS", ip=ip, error=repr(e))
+        report_error("network")
         return {
             "fraud_score": None,
             "vpn": None,
@@ -49,10 +69,10 @@ async def fetch_quality(ip: str) -> dict:
 
     # Wrong HTTP status → fallback (but first print diagnostic)
     if resp.status_code != 200:
-        print(
-            f"[IPQS] Bad status {resp.status_code} for {ip}. "
-            f"Body preview: {resp.text[:200]!r}"
-        )
+        log_event(log, logging.WARNING, "provider.bad_status",
+                  "Bad status", provider="IPQS", ip=ip,
+                  status=resp.status_code, body_preview=resp.text[:200])
+        report_error(status_error_kind(resp.status_code, resp.text))
         return {
             "fraud_score": None,
             "vpn": None,
@@ -61,10 +81,10 @@ async def fetch_quality(ip: str) -> dict:
     try:
         data = resp.json()
     except Exception as e:
-        print(
-            f"[IPQS] JSON parse error for {ip}: {e!r}. "
-            f"Raw response: {resp.text[:200]!r}"
-        )
+        log_event(log, logging.WARNING, "provider.parse_error",
+                  "JSON parse error", provider="IPQS", ip=ip,
+                  error=repr(e), body_preview=resp.text[:200])
+        report_error("parse")
         return {
             "fraud_score": None,
             "vpn": None,
@@ -73,11 +93,15 @@ async def fetch_quality(ip: str) -> dict:
     # Special case: IPQS returns success=False with quota or key errors
     if not data.get("success", True):
         message = data.get("message", "")
-        print(f"[IPQS] API error for {ip}: success=False, message={message!r}")
-
         # Specific detection: DAILY QUOTA EXHAUSTED
         if "exceeded your request quota" in message:
-            print(f"[IPQS] DAILY QUOTA EXHAUSTED for key. Raw={data!r}")
+            log_event(log, logging.ERROR, "provider.quota_exhausted",
+                      "Daily quota exhausted for key", provider="IPQS", ip=ip, message=message)
+            report_error("quota")
+        else:
+            log_event(log, logging.WARNING, "provider.api_error",
+                      "API error (success=False)", provider="IPQS", ip=ip, message=message)
+            report_error("auth" if "key" in message.lower() else "api_error")
 
         return {
             "fraud_score": None,
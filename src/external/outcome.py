@@ -0,0 +1,88 @@
+# src/external/outcome.py
+
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+"""
+Side channel for the failure reason of an external call.
+
+The fetch_* functions always return a neutral fallback on failure, so the
+return value cannot tell "vendor down" from "quota exhausted" or "invalid
+key". They additionally report the reason here; provider layers that care
+(rate limiting, circuit breaking) wrap the call in capture_outcome().
+
+Kinds:
+    no_api_key    key not configured
+    auth          key rejected by the vendor
+    quota         daily / monthly quota exhausted (the vendor says so)
+    rate_limited  per-second / per-minute limit hit (HTTP 429 by default)
+    network       DNS, connect, TLS, timeout
+    status        other non-200 status
+    parse         malformed response body
+    api_error     vendor reported an error in a 200 response
+    throttled     not called: local rate limit (no token in time)
+    circuit_open  not called: the provider's circuit breaker is open
+
+Captures nest: an error recorded in an inner capture_outcome() is also
+passed to the enclosing one, so every wrapper layer sees it.
+"""
+
+_outcome: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("external_outcome", default=None)
+
+
+def report_error(kind: str, **details) -> None:
+    """
+    Records why the current external call failed (no-op outside capture_outcome()).
+    """
+    holder = _outcome.get()
+    if holder is not None:
+        holder["error"] = kind
+        holder["details"] = details
+
+
+# Wording that names the long (day / month) allowance. A bare "quota" is not
+# enough: VirusTotal answers QuotaExceededError for its per-minute limit too.
+_EXHAUSTED_HINTS = ("daily", "per day", "monthly", "per month")
+
+
+def quota_error_kind(message: Optional[str] = "") -> str:
+    """
+    "quota" only if the vendor's message names the daily / monthly quota
+    (persisted until the next UTC day); anything else is "rate_limited",
+    which only backs off for a few seconds.
+    """
+    text = (message or "").lower()
+    if any(hint in text for hint in _EXHAUSTED_HINTS):
+        return "quota"
+    return "rate_limited"
+
+
+def status_error_kind(status_code: int, body: str = "") -> str:
+    """
+    Maps a non-200 HTTP status (and body hints) to an error kind.
+    """
+    if status_code in (401, 403):
+        return "auth"
+    if status_code == 429:
+        return quota_error_kind(body)
+    return "status"
+
+
+@contextmanager
+def capture_outcome() -> Iterator[Dict]:
+    """
+    with capture_outcome() as outcome:
+        result = await fetch_virustotal(ip)
+    outcome["error"]  → None on success, else one of the kinds above
+    """
+    parent = _outcome.get()
+    holder: Dict = {"error": None, "details": {}}
+    token = _outcome.set(holder)
+    try:
+        yield holder
+    finally:
+        _outcome.reset(token)
+        if parent is not None and holder["error"] is not None:
+            parent["error"] = holder["error"]
+            parent["details"] = holder["details"]
@@ -1,17 +1,25 @@
-﻿import os
+﻿import logging
+import os
+from typing import Optional
+
 import httpx
 from dotenv import load_dotenv
 
+from src.external.outcome import quota_error_kind, report_error, status_error_kind
+from src.services.logging_service import log_event
+
 # Load environment variables from .env
 load_dotenv()
 
+log = logging.getLogger("external.virustotal")
+
 VT_KEY = os.getenv("VIRUSTOTAL_API_KEY")
 
-# Proper VirusTotal v3 endpoint (required by assignment)
-VT_URL = "https://www.virustotal.com/api/v3/ip_addresses/"
+# Proper VirusTotal v3 endpoint (required by assignment); overridable for mock servers
+VT_URL = os.getenv("VIRUSTOTAL_URL", "https://www.virustotal.com/api/v3/ip_addresses/")
 
 
-async def fetch_virustotal(ip: str) -> dict:
+async def fetch_virustotal(ip: str, client: Optional[httpx.AsyncClient] = None) -> dict:
     """
     Asynchronously fetches VirusTotal v3 IP report.
 
@@ -25,38 +33,47 @@ async def fetch_virustotal(ip: str) -> dict:
     or HTTP 403 Forbidden on legacy/v2 endpoints.
 
     Because of this, vt_score will always be None when using the assignment key.
+
+    Reuses the pooled client when one is passed in.
     """
 
     fallback = {"vt_score": None}
 
     if not VT_KEY:
-        print(f"[VT] No VIRUSTOTAL_API_KEY provided. Using fallback for {ip}")
+        log_event(log, logging.WARNING, "provider.no_api_key",
+                  "No VIRUSTOTAL_API_KEY provided, using fallback", provider="VirusTotal", ip=ip)
+        report_error("no_api_key")
         return fallback
 
     url = f"{VT_URL}{ip}"
 
     try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
+        if client is not None:
             resp = await client.get(url, headers={"x-apikey": VT_KEY})
+        else:
+            async with httpx.AsyncClient(timeout=8.0) as own_client:
+                resp = await own_client.get(url, headers={"x-apikey": VT_KEY})
     except Exception as e:
-        print(f"[VT] Network error for {ip}: {e!r}")
+        log_event(log, logging.WARNING, "provider.network_error",
+                  "Network error", provider="VirusTotal", ip=ip, error=repr(e))
+        report_error("network")
         return fallback
 
     # Handle non-200 responses
     if resp.status_code != 200:
-        print(
-            f"[VT] Bad status {resp.status_code} for {ip}. "
-            f"Body preview: {resp.text[:200]!r}"
-        )
+        log_event(log, logging.WARNING, "provider.bad_status",
+                  "Bad status", provider="VirusTotal", ip=ip,
+                  status=resp.status_code, body_preview=resp.text[:200])
+        report_error(status_error_kind(resp.status_code, resp.text))
         return fallback
 
     try:
         data = resp.json()
     except Exception as e:
-        print(
-            f"[VT] JSON parse error for {ip}: {e!r}. "
-            f"Raw response: {resp.text[:200]!r}"
-        )
+        log_event(log, logging.WARNING, "provider.parse_error",
+                  "JSON parse error", provider="VirusTotal", ip=ip,
+                  error=repr(e), body_preview=resp.text[:200])
+        report_error("parse")
         return fallback
 
     # Detect WrongCredentialsError explicitly
@@ -65,10 +82,15 @@ async def fetch_virustotal(ip: str) -> dict:
         code = err.get("code")
         msg = err.get("message")
 
-        print(f"[VT] API error for {ip}: code={code!r}, message={msg!r}")
-
         if code == "WrongCredentialsError":
-            print("[VT] Provided key is invalid or not recognized by VirusTotal.")
+            log_event(log, logging.ERROR, "provider.auth_error",
+                      "Provided key is invalid or not recognized", provider="VirusTotal",
+                      ip=ip, code=code, message=msg)
+            report_error("auth")
+        else:
+            log_event(log, logging.WARNING, "provider.api_error",
+                      "API error", provider="VirusTotal", ip=ip, code=code, message=msg)
+            report_error(quota_error_kind(msg) if code == "QuotaExceededError" else "api_error")
 
         return fallback
 
@@ -1,20 +1,139 @@
-from fastapi import FastAPI, HTTPException
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import asyncio
 
 from src.services.aggregator import aggregate_ip_data
 from src.services.aggregator_v2 import aggregate_ip_data_v2
-from src.ai.llm_client import analyze_with_llm
+from src.ai.llm_client import FALLBACK, LLMBatcher, analyze_with_llm_async
+from src.ai.gating import LLMGate
+from src.ai.json_repair import repair_stats
+from src.ai.verdict_cache import VerdictCache, parse_buckets
+from src.validators.ip_classifier import IPClassifier
 from src.validators.ip_validator import IPValidator
-from src.services.cache_service import CacheService
+from src.services.cache_service import CacheService, backing_from_env
+from src.services.batch_service import (
+    BATCH_CONCURRENCY,
+    parse_ip_batch,
+    run_bounded,
+    unique_in_order,
+)
+from src.services.http_clients import ProviderHTTPClients
+from src.services.logging_service import log_event, start_logging, stop_logging
+from src.services.metrics import (
+    METRICS,
+    SERVER_TIMING_ENABLED,
+    ServerTimingMiddleware,
+    stage,
+)
+from src.services.providers_registry import (
+    BLOCKLISTS,
+    BLOCKLIST_PROVIDER,
+    BREAKERS,
+    GEO_PROVIDER,
+    PROVIDERS,
+    PROVIDER_CACHE,
+    QUOTAS,
+    RATE_LIMITERS,
+)
+from src.services.single_flight import SingleFlight
+from src.services.stream_service import encode_stream, media_type_for, stream_batch
+
 
+log = logging.getLogger("api")
 
 # Toggle which aggregator is used globally
 USE_V2 = True
-cache = CacheService(ttl_seconds=300)
 
-app = FastAPI()
+# Fresh for 5 minutes, then served stale (while refreshing) for up to CACHE_STALE_TTL.
+# CACHE_BACKEND adds a second tier: persistent (disk) or shared between workers.
+cache = CacheService(
+    ttl_seconds=300,
+    stale_ttl_seconds=int(os.getenv("CACHE_STALE_TTL", 3600)),
+    backing=backing_from_env("responses"),
+)
+http_clients = ProviderHTTPClients()
+
+# In-flight analyses keyed by IP: concurrent misses share one fan-out + LLM call
+inflight = SingleFlight()
+
+# In-flight provider fan-outs keyed by IP (streaming emits them before the LLM)
+aggregate_inflight = SingleFlight()
+
+# Strong references to background refresh tasks (stale-while-revalidate)
+refresh_tasks = set()
+
+# Deterministic verdicts for clear-cut cases; only ambiguous ones reach the LLM
+LLM_GATE_ENABLED = os.getenv("LLM_GATE_ENABLED", "1") not in ("0", "false", "no")
+llm_gate = LLMGate()
+
+# LLM verdicts shared by IPs with the same quantized risk signals
+VERDICT_CACHE_ENABLED = os.getenv("VERDICT_CACHE_ENABLED", "1") not in ("0", "false", "no")
+verdict_cache = VerdictCache(buckets=parse_buckets(os.getenv("VERDICT_BUCKETS")))
+
+# In-flight LLM calls keyed by feature key (identical signals share one call)
+verdict_inflight = SingleFlight()
+
+# Optional micro-batching of concurrent LLM calls into multi-IP prompts
+LLM_BATCHING_ENABLED = os.getenv("LLM_BATCHING", "0") in ("1", "true", "yes")
+llm_batcher = LLMBatcher()
+
+# Responses missing timed-out providers are cached briefly, so the next
+# caller picks up the late results from the provider cache.
+PARTIAL_RESPONSE_TTL = int(os.getenv("PARTIAL_RESPONSE_TTL", 30))
+
+# Private / reserved / bogon IPs get a precomputed verdict, no external calls
+ip_classifier = IPClassifier()
+
+# Bulk blocklist checks are local lookups, so they accept larger bodies than
+# analysis batches; still capped so one request stays a few hundred ms of work
+BLOCKLIST_CHECK_MAX_IPS = int(os.getenv("BLOCKLIST_CHECK_MAX_IPS", 100_000))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Structured JSON logs, written by a background thread (never blocks the loop)
+    start_logging()
+    # Warm the memory tiers from the backing cache (if enabled)
+    for tier in (cache, PROVIDER_CACHE):
+        loaded = tier.load_from_disk()
+        if loaded:
+            log_event(log, logging.INFO, "cache.warm", "Cache warmed from disk", entries=loaded)
+    # Open one pooled, keep-alive HTTP client per provider for the app lifetime
+    http_clients.open(PROVIDERS)
+    # Drop expired cache entries even if their IP is never queried again
+    cache.start_sweeper(float(os.getenv("CACHE_SWEEP_INTERVAL", 60)))
+    PROVIDER_CACHE.start_sweeper(float(os.getenv("CACHE_SWEEP_INTERVAL", 60)))
+    # Persist quota counters in the background (never on the request path)
+    QUOTAS.start_saver()
+    # Pick up edited / replaced blocklist feeds without a restart
+    if BLOCKLISTS is not None:
+        BLOCKLISTS.start_watcher(float(os.getenv("BLOCKLIST_RELOAD_INTERVAL", 30)))
+    try:
+        yield
+    finally:
+        for task in list(refresh_tasks):
+            task.cancel()
+        if BLOCKLISTS is not None:
+            await BLOCKLISTS.stop_watcher()
+        await PROVIDER_CACHE.stop_sweeper()
+        await cache.stop_sweeper()
+        await http_clients.aclose()
+        await QUOTAS.stop_saver()
+        # Flush write-behind queues before exit
+        PROVIDER_CACHE.close()
+        cache.close()
+        QUOTAS.save(force=True)
+        stop_logging()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -25,27 +144,80 @@ app.add_middleware(
 )
 
 
-@app.get("/api/analyze-ip")
-async def analyze_ip(ip: str):
-    # 1. Validate IP address
-    IPValidator.validate(ip)
+# Per-request stage breakdown for debugging (SERVER_TIMING=1); when off,
+# requests do not pass through any timing middleware at all
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
 
-    # 2. Try cache first
-    cached = cache.get(ip)
-    if cached:
-        print(f"[CACHE] HIT for {ip}")
+
+async def ask_llm(ip: str, threat_data: dict) -> dict:
+    # Native async, concurrency bounded by LLM_MAX_CONCURRENCY;
+    # optionally grouped with concurrent IPs into one batched prompt
+    if LLM_BATCHING_ENABLED:
+        return await llm_batcher.submit(ip, threat_data)
+    return await analyze_with_llm_async(threat_data)
+
+
+async def llm_verdict(raw: dict) -> dict:
+    """
+    Returns the verdict for aggregated data:
+      1. clear-cut cases are decided by gating rules (no LLM call)
+      2. otherwise a cached verdict for identical quantized risk signals
+      3. otherwise the LLM. The model only sees the quantized signals that
+         form the cache key (no identity fields, numbers as buckets), so
+         its verdict is valid for every IP sharing them.
+    """
+    if LLM_GATE_ENABLED:
+        decided = llm_gate.decide(raw)
+        if decided is not None:
+            return decided
+
+    if not VERDICT_CACHE_ENABLED:
+        return await ask_llm(raw.get("ip"), raw)
+
+    cached = verdict_cache.get(raw)
+    if cached is not None:
         return cached
 
-    # 3. Select correct aggregator via toggle
-    if USE_V2:
-        raw = await aggregate_ip_data_v2(ip)
-    else:
-        raw = await aggregate_ip_data(ip)
+    async def run():
+        verdict = await ask_llm(raw.get("ip"), verdict_cache.quantized_features(raw))
+        # Never cache the "LLM unavailable" fallback or unusable answers
+        if verdict is not FALLBACK and verdict.get("risk_level") != "Unknown":
+            verdict_cache.set(raw, verdict)
+        return verdict
+
+    return await verdict_inflight.do(verdict_cache.feature_key(raw), run)
+
+
+async def aggregate_raw(ip: str) -> dict:
+    """
+    Provider fan-out only (no LLM), coalesced per IP.
+    """
+
+    async def run():
+        # Select correct aggregator via toggle
+        if USE_V2:
+            return await aggregate_ip_data_v2(ip)
+        return await aggregate_ip_data(ip)
+
+    return await aggregate_inflight.do(ip, run)
+
 
-    # 4. Run LLM in thread
-    ai_result = await asyncio.to_thread(analyze_with_llm, raw)
+async def analyze_uncached(ip: str, raw: Optional[dict] = None) -> dict:
+    """
+    Full analysis pipeline for one IP: provider fan-out, LLM, cache store.
+    Callers go through `inflight` so each IP runs here at most once at a time.
+    `raw` skips the fan-out when the caller already aggregated the IP.
+    """
 
-    # 5. Unified response object
+    # 1. Aggregate provider data
+    if raw is None:
+        raw = await aggregate_raw(ip)
+
+    # 2. LLM verdict (cached by quantized threat features)
+    ai_result = await llm_verdict(raw)
+
+    # 3. Unified response object
     response = {
         **raw,
         "risk_level": ai_result.get("risk_level"),
@@ -53,12 +225,248 @@ async def analyze_ip(ip: str):
         "recommendations": ai_result.get("recommendations"),
     }
 
-    # 6. Save to cache
-    cache.set(ip, response)
-    print(f"[CACHE] STORE for {ip}")
+    # 4. Save to cache (short TTL for partial results)
+    ttl = PARTIAL_RESPONSE_TTL if raw.get("timed_out_providers") else None
+    with stage("cache_store"):
+        cache.set(ip, response, ttl=ttl)
+    log_event(log, logging.INFO, "cache.store", "Cache store", ip=ip, partial=ttl is not None)
 
     return response
 
 
+def _refresh_done(task: asyncio.Task) -> None:
+    refresh_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log_event(log, logging.WARNING, "cache.refresh_failed", "Background refresh failed",
+                  error=repr(task.exception()))
+
+
+def refresh_in_background(ip: str) -> None:
+    """
+    Re-analyzes a stale IP without blocking the caller.
+    At most one refresh per IP runs at a time (deduplicated via `inflight`).
+    """
+    if ip in inflight:
+        return
+
+    task = asyncio.create_task(inflight.do(ip, lambda: analyze_uncached(ip)))
+    refresh_tasks.add(task)
+    task.add_done_callback(_refresh_done)
+
+
+def classify_short_circuit(ip: str) -> Optional[dict]:
+    """
+    Precomputed response for addresses without public reputation
+    (private, loopback, bogon, ...), or None for public IPs.
+    """
+    category = ip_classifier.classify(ip)
+    if category is None:
+        return None
+
+    empty = {field: None for provider in PROVIDERS for field in provider.fields}
+    return {
+        **empty,
+        "risk_score": None,
+        **ip_classifier.verdict(ip, category, provider_calls=len(PROVIDERS)),
+    }
+
+
+async def lookup_cached(ip: str):
+    """
+    Returns the cached response for an IP or None on a miss.
+    Stale entries are returned flagged and refreshed in background.
+    """
+    cached, state = await cache.aget_with_state(ip)
+    if cached and state == "fresh":
+        log_event(log, logging.INFO, "cache.hit", "Cache hit", ip=ip)
+        return cached
+
+    if cached and state == "stale":
+        log_event(log, logging.INFO, "cache.stale", "Cache stale hit", ip=ip)
+        refresh_in_background(ip)
+        return {**cached, "stale": True}
+
+    return None
+
+
+async def analyze_coalesced(ip: str) -> dict:
+    # Concurrent misses for the same IP share one analysis
+    return await inflight.do(ip, lambda: analyze_uncached(ip))
+
+
+@app.get("/api/analyze-ip")
+async def analyze_ip(ip: str):
+    # 1. Validate IP address (canonical form is the key from here on)
+    with stage("validate"):
+        ip = IPValidator.validate(ip)
+        local = classify_short_circuit(ip)
+    if local:
+        return local
+
+    # 2. Try cache first (stale entries are served while being refreshed)
+    with stage("cache_lookup"):
+        cached = await lookup_cached(ip)
+    if cached:
+        return cached
+
+    # 3. Coalesce concurrent misses for the same IP into one shared analysis
+    return await analyze_coalesced(ip)
+
+
+@app.post("/api/analyze-ips")
+async def analyze_ips(request: Request):
+    """
+    Batch analysis. Body: JSON list / {"ips": [...]} or NDJSON (one IP per line).
+    Duplicates (also differently written forms of one address) are analyzed
+    once, cache hits are served immediately, misses run with bounded
+    concurrency. Results are returned in input order; invalid IPs get an
+    error entry instead of failing the batch.
+    """
+
+    # 1. Parse body
+    ips = parse_ip_batch(await request.body(), request.headers.get("content-type", ""))
+
+    results = {}
+    canonical = {}
+    analyzed = {}
+    misses = []
+
+    # 2. Validate (input → canonical form)
+    for ip in unique_in_order(ips):
+        try:
+            canonical[ip] = IPValidator.validate(ip)
+        except HTTPException as e:
+            results[ip] = {"ip": ip, "error": e.detail}
+
+    # 3. Cache lookup for each distinct address
+    for ip in unique_in_order(canonical.values()):
+        cached = classify_short_circuit(ip) or await lookup_cached(ip)
+        if cached:
+            analyzed[ip] = cached
+        else:
+            misses.append(ip)
+
+    # 4. Fan out misses through the single-IP pipeline, bounded
+    analyzed.update(await run_bounded(misses, analyze_coalesced, BATCH_CONCURRENCY))
+    for ip, key in canonical.items():
+        results[ip] = analyzed[key]
+
+    # 5. Input order (duplicates repeat the same result)
+    return {
+        "count": len(ips),
+        "results": [results[ip] for ip in ips],
+    }
+
+
+@app.get("/api/stats")
+async def stats():
+    # Cache counters for sizing and monitoring
+    return {
+        "cache": cache.stats(),
+        "provider_cache": PROVIDER_CACHE.stats(),
+        "verdict_cache": verdict_cache.stats(),
+        "llm_gate": llm_gate.stats(),
+        "llm_batcher": llm_batcher.stats(),
+        "json_repair": repair_stats(),
+        "rate_limits": {provider.name: provider.stats() for provider in RATE_LIMITERS},
+        "local_geo": GEO_PROVIDER.stats() if GEO_PROVIDER is not None else None,
+        "blocklist": BLOCKLIST_PROVIDER.stats() if BLOCKLIST_PROVIDER is not None else None,
+        "address_classes": ip_classifier.stats(),
+    }
+
+
+@app.post("/api/blocklist/check")
+async def blocklist_check(request: Request):
+    """
+    Bulk blocklist membership, answered locally (no vendor calls).
+    Body: JSON list / {"ips": [...]}, NDJSON, or text/plain with one IP per
+    line. Returns only the listed IPs, in input order.
+    """
+    if BLOCKLISTS is None:
+        raise HTTPException(status_code=503, detail="No blocklists configured (BLOCKLIST_PATHS)")
+
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    if content_type.split(";")[0].strip().lower() == "text/plain":
+        ips = body.decode("utf-8", errors="replace").split()
+        if len(ips) > BLOCKLIST_CHECK_MAX_IPS:
+            raise HTTPException(status_code=413, detail=f"Too many IPs (max {BLOCKLIST_CHECK_MAX_IPS})")
+    else:
+        ips = parse_ip_batch(body, content_type, max_ips=BLOCKLIST_CHECK_MAX_IPS)
+
+    # CPU-bound for large bodies: run it in a worker thread, off the event loop
+    matches = await asyncio.to_thread(BLOCKLISTS.match_many, ips)
+    return {
+        "count": len(ips),
+        "listed": [{"ip": ip, "lists": list(lists)} for ip, lists in zip(ips, matches) if lists],
+    }
+
+
+@app.get("/api/providers/status")
+async def providers_status():
+    # Circuit state and quota usage per provider
+    return {
+        breaker.name: {"circuit": breaker.status(), "rate_limit": limiter.stats()}
+        for breaker, limiter in zip(BREAKERS, RATE_LIMITERS)
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    # Stage latency histograms in the Prometheus text format
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/api/analyze-ips/stream")
+async def analyze_ips_stream(request: Request, format: str = "ndjson", verdicts: bool = True):
+    """
+    Streaming batch analysis (same body formats as /api/analyze-ips).
+    Emits events as soon as they are ready, in completion order:
+        result   - cache hit, full response
+        data     - provider data for a cache miss (before the LLM)
+        verdict  - LLM verdict for that IP (when verdicts=true)
+        error    - invalid IP or failed analysis
+        done     - end of stream
+    format=ndjson (default) or format=sse.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    ips = unique_in_order(
+        parse_ip_batch(await request.body(), request.headers.get("content-type", ""))
+    )
+
+    async def worker(ip: str, emit):
+        # Events carry the IP as sent (for correlation); lookups use the canonical key
+        try:
+            key = IPValidator.validate(ip)
+        except HTTPException as e:
+            await emit({"event": "error", "ip": ip, "error": e.detail})
+            return
+
+        cached = classify_short_circuit(key) or await lookup_cached(key)
+        if cached:
+            await emit({"event": "result", "ip": ip, "result": cached})
+            return
+
+        raw = await aggregate_raw(key)
+        await emit({"event": "data", "ip": ip, "result": raw})
+
+        if verdicts:
+            response = await inflight.do(key, lambda: analyze_uncached(key, raw=raw))
+            await emit({
+                "event": "verdict",
+                "ip": ip,
+                "result": {
+                    "risk_level": response.get("risk_level"),
+                    "risk_analysis": response.get("risk_analysis"),
+                    "recommendations": response.get("recommendations"),
+                },
+            })
+
+    events = stream_batch(ips, worker, BATCH_CONCURRENCY)
+    return StreamingResponse(encode_stream(events, format), media_type=media_type_for(format))
+
+
 # Serve static frontend
 app.mount("/", StaticFiles(directory="src/static", html=True), name="static")
@@ -1,6 +1,8 @@
 ﻿import asyncio
-from typing import Dict, List
+import os
+from typing import Dict, List, Optional
 
+from src.services.metrics import stage
 from src.services.providers_registry import PROVIDERS
 from src.services.risk_scorer import RiskScorer
 
@@ -27,38 +29,117 @@ SCORER = RiskScorer(
 )
 
 
+# Overall budget for one aggregation; providers also have their own budgets.
+DEADLINE_SECONDS = float(os.getenv("AGGREGATE_DEADLINE_SECONDS", 5.0))
 
-async def aggregate_ip_data_v2(ip: str) -> Dict:
+# Provider fetches that outlived their budget. They keep running (strong refs
+# here) so their results still populate the provider cache for the next caller.
+_late_tasks: set = set()
+
+
+def _late_done(task: asyncio.Task) -> None:
+    _late_tasks.discard(task)
+    # Retrieve the exception so it is not reported as "never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+def _detach(tasks) -> None:
+    for task in tasks:
+        _late_tasks.add(task)
+        task.add_done_callback(_late_done)
+
+
+async def _timed_fetch(provider, ip: str) -> Dict:
+    with stage("provider_fetch", provider=provider.name):
+        return await provider.fetch(ip)
+
+
+async def _wait_with_budgets(tasks: Dict[asyncio.Task, object], deadline: float):
+    """
+    Waits for provider tasks until each one's cutoff:
+    min(provider.timeout_budget, deadline) from now.
+    Returns the set of tasks that did not finish in time.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    cutoffs = {}
+    for task, provider in tasks.items():
+        budget = getattr(provider, "timeout_budget", None)
+        cutoffs[task] = start + (min(budget, deadline) if budget is not None else deadline)
+
+    pending = set(tasks)
+    timed_out = set()
+
+    while pending:
+        now = loop.time()
+        expired = {task for task in pending if cutoffs[task] <= now}
+        timed_out |= expired
+        pending -= expired
+        if not pending:
+            break
+
+        wait_for = min(cutoffs[task] for task in pending) - now
+        _, pending = await asyncio.wait(
+            pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
+        )
+
+    return timed_out
+
+
+async def aggregate_ip_data_v2(ip: str, deadline: Optional[float] = None) -> Dict:
     """
     Aggregates threat-intel data from all registered providers.
     Uses async fetch, unified schema, graceful fallback on errors,
     and applies composite risk scoring at the end.
+
+    Latency is bounded by `deadline` (seconds, default DEADLINE_SECONDS)
+    and by each provider's timeout_budget. Providers that miss their cutoff
+    contribute fallback values and are listed in "timed_out_providers";
+    their fetch keeps running in the background to fill the provider cache.
     """
 
+    if deadline is None:
+        deadline = DEADLINE_SECONDS
+
     # Pre-fill output with default structure
     merged: Dict = {"ip": ip, **DEFAULT_SHAPE}
 
     # Launch all providers concurrently
-    tasks = [provider.fetch(ip) for provider in PROVIDERS]
+    tasks = {asyncio.ensure_future(_timed_fetch(provider, ip)): provider for provider in PROVIDERS}
+
+    try:
+        timed_out = await _wait_with_budgets(tasks, deadline)
+    except asyncio.CancelledError:
+        # Caller gave up: let the fetches finish for the cache anyway
+        _detach(task for task in tasks if not task.done())
+        raise
 
-    # Gather results without propagating exceptions
-    raw_results = await asyncio.gather(*tasks, return_exceptions=True)
+    _detach(timed_out)
 
     normalized_results: List[Dict] = []
+    timed_out_providers: List[str] = []
 
-    # Convert exceptions into fallback dicts
-    for provider, result in zip(PROVIDERS, raw_results):
-        if isinstance(result, Exception):
-            fallback = {field: None for field in provider.fields}
+    # Convert exceptions and timeouts into fallback dicts
+    for task, provider in tasks.items():
+        fallback = {field: None for field in provider.fields}
+
+        if task in timed_out:
+            timed_out_providers.append(provider.name)
+            normalized_results.append(fallback)
+        elif task.cancelled() or task.exception() is not None:
             normalized_results.append(fallback)
         else:
-            normalized_results.append(result)
+            normalized_results.append(task.result())
 
     # Merge provider results
     for result in normalized_results:
         merged.update(result)
 
     # Compute composite risk score using external RiskScorer
-    merged["risk_score"] = SCORER.compute(merged)
+    with stage("scoring"):
+        merged["risk_score"] = SCORER.compute(merged)
+    merged["timed_out_providers"] = timed_out_providers
 
     return merged
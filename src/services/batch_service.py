@@ -0,0 +1,103 @@
+# src/services/batch_service.py
+
+import asyncio
+import json
+import os
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+
+
+# Upper bound on IPs accepted in one batch request
+BATCH_MAX_IPS = int(os.getenv("BATCH_MAX_IPS", 1000))
+
+# How many cache-miss analyses of one batch run at the same time
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 16))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def _ip_from_item(item) -> str:
+    # Items may be plain strings or objects like {"ip": "1.2.3.4"}
+    if isinstance(item, str):
+        return item.strip()
+    if isinstance(item, dict) and isinstance(item.get("ip"), str):
+        return item["ip"].strip()
+    raise HTTPException(status_code=400, detail=f"Invalid batch item: {item!r}")
+
+
+def parse_ip_batch(body: bytes, content_type: str = "", max_ips: Optional[int] = None) -> List[str]:
+    """
+    Parses the body of a batch request into a list of IP strings (input order,
+    duplicates kept). Accepted formats:
+
+        JSON:    ["1.2.3.4", "8.8.8.8"]   or   {"ips": ["1.2.3.4", ...]}
+        NDJSON:  one item per line: "1.2.3.4", {"ip": "1.2.3.4"} or a bare IP
+
+    Raises HTTPException(400) for malformed bodies and 413 for batches over
+    max_ips (default BATCH_MAX_IPS).
+    """
+    if max_ips is None:
+        max_ips = BATCH_MAX_IPS
+
+    text = body.decode("utf-8", errors="replace")
+    media_type = content_type.split(";")[0].strip().lower()
+
+    if media_type in NDJSON_TYPES:
+        ips = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = line   # bare IP per line
+            ips.append(_ip_from_item(item))
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Batch body must be JSON or NDJSON")
+
+        if isinstance(data, dict):
+            data = data.get("ips")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail='Expected a JSON list or {"ips": [...]}')
+
+        ips = [_ip_from_item(item) for item in data]
+
+    if len(ips) > max_ips:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(ips)} IPs (max {max_ips})",
+        )
+
+    return ips
+
+
+def unique_in_order(items: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(items))
+
+
+async def run_bounded(
+    items: List[str],
+    worker: Callable[[str], Awaitable[Dict]],
+    concurrency: int = BATCH_CONCURRENCY,
+) -> Dict[str, Dict]:
+    """
+    Runs worker(item) for every item with at most `concurrency` running
+    at once. Returns {item: result}; a failing item yields an error entry
+    instead of failing the whole batch.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(item: str):
+        async with semaphore:
+            try:
+                return item, await worker(item)
+            except Exception as e:
+                return item, {"ip": item, "error": f"Analysis failed: {e!r}"}
+
+    pairs = await asyncio.gather(*(run_one(item) for item in items))
+    return dict(pairs)
@@ -0,0 +1,322 @@
+# src/services/blocklist.py
+
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+log = logging.getLogger("blocklist")
+
+"""
+Local blocklist membership (FireHOL / Spamhaus DROP style feed files).
+
+Feed files are plain text, one entry per line: a single IP, a CIDR prefix
+or a "first-last" range, IPv4 or IPv6. Comments start with "#" or ";" and
+anything after the first token is ignored. The list name is the file name
+without extension.
+
+All entries are flattened into sorted, disjoint intervals per address
+family. Every interval carries a bitmask of the lists it is on, so a lookup
+is one bisect plus a mask decode. IPv4 intervals live in array('I')
+columns; IPv6 feeds are small and use plain int lists.
+
+BlocklistStore watches the files and rebuilds the index in a worker thread
+when one changes; lookups keep using the previous index until the new one
+is swapped in.
+"""
+
+
+def _address(text: str):
+    address = ipaddress.ip_address(text.strip())
+    # "::ffff:1.2.3.4" is listed as 1.2.3.4
+    if address.version == 6 and address.ipv4_mapped is not None:
+        return address.ipv4_mapped
+    return address
+
+
+def _parse_entry(token: str) -> Optional[Tuple[int, int, int]]:
+    """
+    "1.2.3.4" / "1.2.3.0/24" / "1.2.3.4-1.2.3.9" → (version, first, last)
+    """
+    try:
+        if "/" in token:
+            net = ipaddress.ip_network(token, strict=False)
+            return net.version, int(net.network_address), int(net.broadcast_address)
+        if "-" in token:
+            first, last = (_address(part) for part in token.split("-", 1))
+            if first.version != last.version or int(last) < int(first):
+                return None
+            return first.version, int(first), int(last)
+        address = _address(token)
+        return address.version, int(address), int(address)
+    except ValueError:
+        return None
+
+
+def read_feed(path: str) -> Tuple[List[Tuple[int, int, int]], int]:
+    """
+    Returns ([(version, first, last), ...], skipped_lines) for one feed file.
+    """
+    entries = []
+    skipped = 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.split("#", 1)[0].split(";", 1)[0].strip()
+            if not line:
+                continue
+            entry = _parse_entry(line.split()[0])
+            if entry is None:
+                skipped += 1
+            else:
+                entries.append(entry)
+    return entries, skipped
+
+
+def _flatten(intervals: List[Tuple[int, int, int]]):
+    """
+    (first, last, list_bit) intervals → disjoint (first, last, mask) runs,
+    adjacent runs with the same mask merged.
+    """
+    events: Dict[int, List[Tuple[int, int]]] = {}
+    for first, last, bit in intervals:
+        events.setdefault(first, []).append((bit, 1))
+        events.setdefault(last + 1, []).append((bit, -1))
+
+    counts: Dict[int, int] = {}
+    runs = []
+    points = sorted(events)
+    for point, following in zip(points, points[1:] + [None]):
+        for bit, delta in events[point]:
+            counts[bit] = counts.get(bit, 0) + delta
+        mask = 0
+        for bit, count in counts.items():
+            if count > 0:
+                mask |= bit
+        if not mask or following is None:
+            continue
+        if runs and runs[-1][1] == point - 1 and runs[-1][2] == mask:
+            runs[-1] = (runs[-1][0], following - 1, mask)
+        else:
+            runs.append((point, following - 1, mask))
+    return runs
+
+
+class BlocklistIndex:
+    """
+    Immutable membership index over named lists. Build with from_entries().
+    """
+
+    def __init__(self, names: Sequence[str] = ()):
+        self.names = tuple(names)
+        self.entries = 0
+
+        self.v4_starts = array("I")
+        self.v4_ends = array("I")
+        self.v4_masks = array("I")
+
+        self.v6_starts: List[int] = []
+        self.v6_ends: List[int] = []
+        self.v6_masks = array("I")
+
+        # mask id → tuple of list names
+        self.mask_names: List[Tuple[str, ...]] = []
+
+    @classmethod
+    def from_entries(cls, lists: Dict[str, Iterable[Tuple[int, int, int]]]) -> "BlocklistIndex":
+        """
+        lists: {list_name: [(version, first, last), ...]}
+        """
+        index = cls(sorted(lists))
+        per_family = {4: [], 6: []}
+        for position, name in enumerate(index.names):
+            for version, first, last in lists[name]:
+                per_family[version].append((first, last, 1 << position))
+                index.entries += 1
+
+        mask_ids: Dict[int, int] = {}
+
+        def mask_id(mask: int) -> int:
+            if mask not in mask_ids:
+                mask_ids[mask] = len(index.mask_names)
+                index.mask_names.append(
+                    tuple(name for position, name in enumerate(index.names) if mask >> position & 1)
+                )
+            return mask_ids[mask]
+
+        for first, last, mask in _flatten(per_family[4]):
+            index.v4_starts.append(first)
+            index.v4_ends.append(last)
+            index.v4_masks.append(mask_id(mask))
+
+        for first, last, mask in _flatten(per_family[6]):
+            index.v6_starts.append(first)
+            index.v6_ends.append(last)
+            index.v6_masks.append(mask_id(mask))
+
+        return index
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> "BlocklistIndex":
+        lists = {}
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            entries, skipped = read_feed(path)
+            if skipped:
+                log.warning(f"[BLOCKLIST] Skipped {skipped} invalid lines in {path}")
+            lists.setdefault(name, []).extend(entries)
+        return cls.from_entries(lists)
+
+    def _lookup_v4(self, value: int) -> Tuple[str, ...]:
+        i = bisect_right(self.v4_starts, value) - 1
+        if i >= 0 and value <= self.v4_ends[i]:
+            return self.mask_names[self.v4_masks[i]]
+        return ()
+
+    def _lookup_v6(self, value: int) -> Tuple[str, ...]:
+        i = bisect_right(self.v6_starts, value) - 1
+        if i >= 0 and value <= self.v6_ends[i]:
+            return self.mask_names[self.v6_masks[i]]
+        return ()
+
+    def lookup(self, ip: str) -> Tuple[str, ...]:
+        """
+        Names of the lists containing `ip` ((): not listed or not an IP).
+        """
+        try:
+            return self._lookup_v4(int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big"))
+        except (OSError, ValueError):
+            pass
+        try:
+            packed = socket.inet_pton(socket.AF_INET6, ip)
+        except (OSError, ValueError):
+            return ()
+        if packed[:12] == b"\x00" * 10 + b"\xff\xff":
+            return self._lookup_v4(int.from_bytes(packed[12:], "big"))
+        return self._lookup_v6(int.from_bytes(packed, "big"))
+
+    def match_many(self, ips: Iterable[str]) -> List[Tuple[str, ...]]:
+        """
+        Bulk membership: list names per input IP, in input order.
+        """
+        lookup = self.lookup
+        return [lookup(ip) for ip in ips]
+
+    def stats(self) -> Dict:
+        return {
+            "lists": list(self.names),
+            "entries": self.entries,
+            "v4_intervals": len(self.v4_starts),
+            "v6_intervals": len(self.v6_starts),
+        }
+
+
+def _expand_paths(paths: Iterable[str]) -> List[str]:
+    # Directories contribute every regular, non-hidden file inside them
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for entry in sorted(os.listdir(path)):
+                full = os.path.join(path, entry)
+                if not entry.startswith(".") and os.path.isfile(full):
+                    files.append(full)
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+class BlocklistStore:
+    """
+    Current BlocklistIndex for a set of feed files / directories,
+    rebuilt whenever one of them changes (mtime, size, added, removed).
+    """
+
+    def __init__(self, paths: Sequence[str]):
+        self.paths = list(paths)
+        self.index = BlocklistIndex()
+        self.reloads = 0
+        self.reload_errors = 0
+        self._signature = None
+        self._watcher: Optional[asyncio.Task] = None
+        self.reload_if_changed()
+
+    def _current_signature(self) -> Tuple:
+        signature = []
+        for path in _expand_paths(self.paths):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Rebuilds and swaps the index if the feed files changed.
+        A failed rebuild keeps serving the previous index.
+        """
+        signature = self._current_signature()
+        if signature == self._signature:
+            return False
+
+        try:
+            index = BlocklistIndex.from_files(path for path, _, _ in signature)
+        except Exception as e:
+            self.reload_errors += 1
+            log.warning(f"[BLOCKLIST] Reload failed, keeping previous lists: {e!r}")
+            return False
+
+        self.index = index
+        self._signature = signature
+        self.reloads += 1
+        log.info(f"[BLOCKLIST] Loaded {index.entries} entries from {len(index.names)} lists")
+        return True
+
+    def lookup(self, ip: str) -> Tuple[str, ...]:
+        return self.index.lookup(ip)
+
+    def match_many(self, ips: Iterable[str]) -> List[Tuple[str, ...]]:
+        return self.index.match_many(ips)
+
+    async def _watch_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                log.warning(f"[BLOCKLIST] Watch failed: {e!r}")
+
+    def start_watcher(self, interval: float = 30.0) -> None:
+        """
+        Starts the background change watcher on the running event loop.
+        """
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch_loop(interval))
+
+    async def stop_watcher(self) -> None:
+        if self._watcher is None:
+            return
+
+        self._watcher.cancel()
+        try:
+            await self._watcher
+        except asyncio.CancelledError:
+            pass
+        self._watcher = None
+
+    def stats(self) -> Dict:
+        return {**self.index.stats(), "reloads": self.reloads, "reload_errors": self.reload_errors}
+
+
+def blocklist_store_from_env() -> Optional[BlocklistStore]:
+    """
+    BLOCKLIST_PATHS: comma-separated feed files and / or directories.
+    Unset → None (no local blocklist).
+    """
+    paths = [p.strip() for p in os.getenv("BLOCKLIST_PATHS", "").split(",") if p.strip()]
+    if not paths:
+        return None
+    return BlocklistStore(paths)
@@ -1,24 +1,332 @@
-﻿import time
+﻿import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+
+from src.services.disk_cache import DiskCache, disk_cache_from_env
+
+if TYPE_CHECKING:
+    from src.services.shared_cache import SharedMemoryTable
+
+log = logging.getLogger("cache_service")
+
+
+def backing_from_env(name: str) -> Optional[Union[DiskCache, "SharedMemoryTable"]]:
+    """
+    Second cache tier selected by CACHE_BACKEND:
+        memory (default) - none, unless CACHE_DISK_PATH is set (persistent tier)
+        disk             - DiskCache in CACHE_DISK_PATH (default data/cache.sqlite3)
+        shared           - SharedMemoryTable shared by all worker processes (POSIX only)
+    `name` separates the caches (table / file name).
+    """
+    backend = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+
+    if backend == "shared":
+        # Imported here: the mmap table needs fcntl, which Windows lacks
+        from src.services.shared_cache import shared_table_from_env
+
+        return shared_table_from_env(name)
+    if backend == "disk":
+        return DiskCache(os.getenv("CACHE_DISK_PATH") or "data/cache.sqlite3", table=name)
+    if backend != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND: {backend!r}")
+
+    return disk_cache_from_env(name)
+
+
+def _estimate_size(data: Any) -> int:
+    """
+    Approximate memory footprint of a cached value.
+    Uses the serialized JSON length: cheap, deterministic, and proportional
+    to what the response actually carries.
+    """
+    try:
+        return len(json.dumps(data, ensure_ascii=False, default=str))
+    except Exception:
+        return len(repr(data))
+
 
 class CacheService:
-    def __init__(self, ttl_seconds: int = 300):
+    """
+    Bounded in-memory TTL cache with O(1) LRU eviction.
+
+    Limits (whichever is hit first triggers eviction of the least
+    recently used entries):
+        max_entries: maximum number of cached keys   (env CACHE_MAX_ENTRIES, default 100000)
+        max_bytes:   approximate total size of values (env CACHE_MAX_BYTES, default 256 MiB)
+
+    Expired entries are removed lazily on get() and eagerly by an optional
+    background sweeper (start_sweeper / stop_sweeper), so keys that are
+    never looked up again do not stay in memory.
+
+    Stale-while-revalidate: with stale_ttl_seconds > 0, an entry older than
+    its TTL (soft expiry) is kept for another stale_ttl_seconds (hard expiry).
+    get() treats it as a miss, while get_with_state() still returns it
+    flagged "stale" so the caller can serve it and refresh in background.
+
+    Backing tier: with `backing` attached (DiskCache for persistence, or
+    SharedMemoryTable to share entries between worker processes), every
+    set() is also written there, memory misses fall through to it and
+    promote the entry back into memory with its original timestamp, and
+    load_from_disk() warms the memory tier after a restart. On the event
+    loop use aget() / aget_with_state(): they read a blocking backing tier
+    (DiskCache / SQLite) in a worker thread instead of on the loop.
+
+    Counters (hits, misses, evictions, expirations) are exposed via stats().
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        stale_ttl_seconds: int = 0,
+        backing: Optional[Union[DiskCache, "SharedMemoryTable"]] = None,
+    ):
         self.ttl = ttl_seconds
-        self.store = {}      # { ip: { "ts": float, "data": dict } }
+        self.stale_ttl = stale_ttl_seconds
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else int(os.getenv("CACHE_MAX_ENTRIES", 100_000))
+        )
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else int(os.getenv("CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        )
+
+        # { key: { "ts": float, "ttl": float, "size": int, "data": dict } }, oldest first
+        self.store: "OrderedDict[str, Dict]" = OrderedDict()
+        self.total_bytes = 0
+
+        self.backing = backing
+        if backing is not None:
+            # Keep backing entries for the whole stale window
+            backing.grace = stale_ttl_seconds
+
+        self.hits = 0
+        self.backing_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.store)
 
     def get(self, ip: str):
+        data, state = self.get_with_state(ip, allow_stale=False)
+        return data
+
+    def get_with_state(self, ip: str, allow_stale: bool = True):
+        """
+        Returns (data, state) where state is:
+            "fresh" - within TTL
+            "stale" - past TTL but within the stale window (allow_stale only)
+            None    - missing or past hard expiry (data is None)
+        """
+        return self._lookup(ip, allow_stale, promote=True)
+
+    async def aget(self, ip: str):
+        data, state = await self.aget_with_state(ip, allow_stale=False)
+        return data
+
+    async def aget_with_state(self, ip: str, allow_stale: bool = True):
+        """
+        get_with_state() for the event loop: a memory miss on a blocking
+        backing tier is read in a worker thread; the entry is promoted into
+        memory back on the loop (the LRU is not thread-safe).
+        """
+        if ip in self.store or self.backing is None or not self.backing.blocking_reads:
+            return self._lookup(ip, allow_stale, promote=True)
+
+        row = await asyncio.to_thread(self.backing.get, ip)
+        # A set() while we were reading wins over the older backing row
+        if ip not in self.store:
+            self._promote_row(ip, row)
+        return self._lookup(ip, allow_stale, promote=False)
+
+    def _lookup(self, ip: str, allow_stale: bool, promote: bool):
         entry = self.store.get(ip)
+        if not entry and promote and self.backing is not None:
+            entry = self._promote(ip)
         if not entry:
-            return None
+            self.misses += 1
+            return None, None
 
-        if time.time() - entry["ts"] > self.ttl:
+        age = time.time() - entry["ts"]
+
+        if age > entry["ttl"] + self.stale_ttl:
             # expired → deletion + miss
-            del self.store[ip]
-            return None
+            self._remove(ip)
+            self.expirations += 1
+            self.misses += 1
+            return None, None
+
+        if age > entry["ttl"]:
+            if not allow_stale:
+                self.misses += 1
+                return None, None
 
-        return entry["data"]
+            self.store.move_to_end(ip)
+            self.stale_hits += 1
+            return entry["data"], "stale"
+
+        # Mark as most recently used
+        self.store.move_to_end(ip)
+        self.hits += 1
+        return entry["data"], "fresh"
+
+    def set(self, ip: str, data: dict, ttl: Optional[float] = None):
+        """
+        Stores data under the key. ttl overrides the cache-wide TTL
+        for this entry only (e.g. vendor-specific provider TTLs).
+        """
+        ts = time.time()
+        ttl = ttl if ttl is not None else self.ttl
+
+        self._insert(ip, data, ts, ttl)
+
+        if self.backing is not None:
+            self.backing.put(ip, data, ts, ttl)
+
+    def _insert(self, ip: str, data: Any, ts: float, ttl: float) -> None:
+        size = _estimate_size(data)
+
+        if ip in self.store:
+            self._remove(ip)
+
+        # A single value larger than the whole budget is never cached
+        if size > self.max_bytes:
+            return
 
-    def set(self, ip: str, data: dict):
         self.store[ip] = {
-            "ts": time.time(),
+            "ts": ts,
+            "ttl": ttl,
+            "size": size,
             "data": data
         }
+        self.total_bytes += size
+
+        self._evict()
+
+    def _promote(self, ip: str) -> Optional[Dict]:
+        """
+        Memory miss: loads the entry from the backing tier if it is not hard-expired.
+        """
+        return self._promote_row(ip, self.backing.get(ip))
+
+    def _promote_row(self, ip: str, row) -> Optional[Dict]:
+        if row is None:
+            return None
+
+        ts, ttl, data = row
+        if time.time() - ts > ttl + self.stale_ttl:
+            return None
+
+        self._insert(ip, data, ts, ttl)
+        self.backing_hits += 1
+        return self.store.get(ip)
+
+    def load_from_disk(self) -> int:
+        """
+        Warms the memory tier with the newest unexpired backing entries
+        (up to max_entries). Returns the number of loaded keys.
+        """
+        if self.backing is None:
+            return 0
+
+        loaded = 0
+        for key, ts, ttl, data in self.backing.load(self.max_entries):
+            self._insert(key, data, ts, ttl)
+            loaded += 1
+        return loaded
+
+    def close(self) -> None:
+        """
+        Flushes pending backing writes and releases the backing tier.
+        """
+        if self.backing is not None:
+            self.backing.close()
+
+    def _remove(self, key: str) -> None:
+        entry = self.store.pop(key)
+        self.total_bytes -= entry["size"]
+
+    def _evict(self) -> None:
+        # popitem(last=False) drops the least recently used key in O(1)
+        while self.store and (
+            len(self.store) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            _, entry = self.store.popitem(last=False)
+            self.total_bytes -= entry["size"]
+            self.evictions += 1
+
+    def sweep(self) -> int:
+        """
+        Removes all hard-expired entries. Returns the number of removed keys.
+        """
+        now = time.time()
+        expired = [
+            key for key, entry in self.store.items()
+            if now - entry["ts"] > entry["ttl"] + self.stale_ttl
+        ]
+
+        for key in expired:
+            self._remove(key)
+
+        self.expirations += len(expired)
+        return len(expired)
+
+    async def _sweep_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                log.warning(f"[CACHE] Sweep failed: {e!r}")
+
+    def start_sweeper(self, interval: float = 60.0) -> None:
+        """
+        Starts the background expiry sweeper on the running event loop.
+        """
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop(interval))
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is None:
+            return
+
+        self._sweeper.cancel()
+        try:
+            await self._sweeper
+        except asyncio.CancelledError:
+            pass
+        self._sweeper = None
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        stats = {
+            "entries": len(self.store),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+        if self.backing is not None:
+            stats["backing_hits"] = self.backing_hits
+            stats["backing"] = self.backing.stats()
+
+        return stats
@@ -0,0 +1,269 @@
+# src/services/disk_cache.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+log = logging.getLogger("disk_cache")
+
+# How often pending writes are flushed, and expired rows compacted (seconds)
+DISK_FLUSH_INTERVAL = float(os.getenv("CACHE_DISK_FLUSH_INTERVAL", 0.5))
+DISK_COMPACT_INTERVAL = float(os.getenv("CACHE_DISK_COMPACT_INTERVAL", 600))
+
+# Max distinct keys waiting for the writer thread
+DISK_MAX_PENDING = int(os.getenv("CACHE_DISK_MAX_PENDING", 10_000))
+
+
+class DiskCache:
+    """
+    Persistent second cache tier: one SQLite table in WAL mode.
+
+    Writes are write-behind: put() only records the entry in a pending
+    map (latest value per key wins) and a background thread commits
+    batches every flush_interval, so the request path never waits on disk.
+    The map is bounded by max_pending keys: updates of pending keys are
+    merged, new keys arriving while it is full wake the writer and are
+    dropped (counted in dropped_writes; the memory tier still has them).
+
+    Reads check the pending map first, then do a primary-key lookup. That
+    blocks on SQLite, so async callers go through CacheService.aget*(),
+    which runs get() in a worker thread (blocking_reads).
+
+    Rows keep the original timestamp and TTL, so freshness is decided
+    exactly as in memory. compact() deletes rows past ts + ttl + grace
+    and runs periodically on the writer thread.
+
+    Several DiskCache instances (tables) can share one database file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "cache",
+        flush_interval: float = DISK_FLUSH_INTERVAL,
+        compact_interval: float = DISK_COMPACT_INTERVAL,
+        max_pending: int = DISK_MAX_PENDING,
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}")
+
+        self.path = path
+        self.table = table
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.max_pending = max_pending
+
+        # Extra lifetime past TTL before a row is compacted (stale window)
+        self.grace = 0.0
+
+        # {key: (ts, ttl, data)} not yet committed
+        self._pending: Dict[str, Tuple[float, float, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # Set to flush before the interval ends (pending map full, close)
+        self._wake = threading.Event()
+        # get() runs on several worker threads; they share one connection
+        self._read_lock = threading.Lock()
+
+        self.writes = 0
+        self.dropped_writes = 0
+        self.reads = 0
+        self.read_hits = 0
+        self.compacted = 0
+
+        # Connection for reads (from worker threads via CacheService.aget*)
+        self._reader = self._connect()
+        self._reader.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, ts REAL NOT NULL, ttl REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self._reader.commit()
+
+        self._writer = threading.Thread(target=self._run, name=f"disk-cache-{table}", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ------------------------------------------------------------
+    # Request path
+    # ------------------------------------------------------------
+    # get() waits on SQLite: CacheService moves it off the event loop
+    blocking_reads = True
+
+    def put(self, key: str, data: Any, ts: float, ttl: float) -> None:
+        with self._lock:
+            if key in self._pending or len(self._pending) < self.max_pending:
+                self._pending[key] = (ts, ttl, data)
+                return
+            self.dropped_writes += 1
+        self._wake.set()
+
+    def get(self, key: str) -> Optional[Tuple[float, float, Any]]:
+        """
+        Returns (ts, ttl, data) or None. Expiry is left to the caller.
+        """
+        self.reads += 1
+
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            self.read_hits += 1
+            return pending
+
+        try:
+            with self._read_lock:
+                row = self._reader.execute(
+                    f"SELECT ts, ttl, data FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            log.warning(f"[DISK CACHE] Read failed for {key}: {e!r}")
+            return None
+
+        if row is None:
+            return None
+
+        self.read_hits += 1
+        return row[0], row[1], json.loads(row[2])
+
+    def load(self, limit: int) -> Iterator[Tuple[str, float, float, Any]]:
+        """
+        Yields up to `limit` unexpired (key, ts, ttl, data) rows,
+        oldest first (so the newest end up most recently used).
+        """
+        now = time.time()
+        rows = self._reader.execute(
+            f"SELECT key, ts, ttl, data FROM ("
+            f"  SELECT * FROM {self.table} WHERE ts + ttl + ? > ? ORDER BY ts DESC LIMIT ?"
+            f") ORDER BY ts ASC",
+            (self.grace, now, limit),
+        )
+        for key, ts, ttl, data in rows:
+            yield key, ts, ttl, json.loads(data)
+
+    # ------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------
+    def _run(self) -> None:
+        conn = self._connect()
+        last_compact = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+                self._flush(conn)
+                if time.monotonic() - last_compact >= self.compact_interval:
+                    self._compact(conn)
+                    last_compact = time.monotonic()
+            self._flush(conn)
+        finally:
+            conn.close()
+
+    def _flush(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        rows = []
+        for key, (ts, ttl, data) in batch.items():
+            try:
+                rows.append((key, ts, ttl, json.dumps(data, ensure_ascii=False, default=str)))
+            except (TypeError, ValueError) as e:
+                log.warning(f"[DISK CACHE] Cannot serialize {key}: {e!r}")
+
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, ts, ttl, data) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            self.writes += len(rows)
+        except sqlite3.Error as e:
+            log.warning(f"[DISK CACHE] Flush of {len(rows)} entries failed: {e!r}")
+
+    def _compact(self, conn: sqlite3.Connection) -> int:
+        try:
+            with conn:
+                removed = conn.execute(
+                    f"DELETE FROM {self.table} WHERE ts + ttl + ? <= ?",
+                    (self.grace, time.time()),
+                ).rowcount
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            log.warning(f"[DISK CACHE] Compaction failed: {e!r}")
+            return 0
+
+        self.compacted += removed
+        return removed
+
+    def flush(self) -> None:
+        """
+        Commits pending writes now (tests, shutdown).
+        """
+        conn = self._connect()
+        try:
+            self._flush(conn)
+        finally:
+            conn.close()
+
+    def compact(self) -> int:
+        """
+        Deletes expired rows now. Returns the number of removed rows.
+        """
+        conn = self._connect()
+        try:
+            return self._compact(conn)
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        """
+        Stops the writer thread after a final flush.
+        """
+        if not self._stop.is_set():
+            self._stop.set()
+            self._wake.set()
+            self._writer.join()
+            self._reader.close()
+
+    def __len__(self) -> int:
+        return self._reader.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "path": self.path,
+            "table": self.table,
+            "pending_writes": pending,
+            "writes": self.writes,
+            "dropped_writes": self.dropped_writes,
+            "reads": self.reads,
+            "read_hits": self.read_hits,
+            "compacted": self.compacted,
+        }
+
+
+def disk_cache_from_env(table: str) -> Optional[DiskCache]:
+    """
+    DiskCache for `table` in the file named by CACHE_DISK_PATH, or None
+    when the persistent tier is disabled (variable unset or empty).
+    """
+    path = os.getenv("CACHE_DISK_PATH")
+    if not path:
+        return None
+    return DiskCache(path, table=table)
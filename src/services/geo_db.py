@@ -0,0 +1,361 @@
+# src/services/geo_db.py
+
+import csv
+import ipaddress
+import json
+import logging
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import chain
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+log = logging.getLogger("geo_db")
+
+"""
+Offline IP → country / ASN / organisation range database.
+
+Geo and ISP data is static for long periods and identical across whole
+prefixes, so instead of asking ipapi.co per IP it can be looked up locally:
+
+    db = GeoRangeDB.from_csv("ranges.csv")   # start,end,country,asn,org
+    db.save("data/geo.bin")                  # compact binary, loads fast
+    db = GeoRangeDB.load("data/geo.bin")
+    db.lookup("8.8.8.8")  → GeoRecord(country="US", asn=15169, org="Google LLC")
+
+Build the binary file from a CSV dump once:
+
+    python -m src.services.geo_db ranges.csv data/geo.bin
+
+Layout: non-overlapping ranges sorted by start. IPv4 starts / ends are
+array('I') columns searched with bisect; IPv6 starts / ends are packed
+16-byte big-endian blobs (byte order == numeric order) searched with a
+manual binary search. Each range points into a deduplicated record table.
+Lookup is O(log n) with no per-range Python objects.
+"""
+
+_MAGIC = b"IPGEO\x00\x01\x00"
+_HEADER = struct.Struct("<8sIII")   # magic, v4 ranges, v6 ranges, records
+
+IPLike = Union[str, int]
+
+
+class GeoRecord(NamedTuple):
+    country: Optional[str]
+    asn: Optional[int]
+    org: Optional[str]
+
+
+def _u32() -> array:
+    # "I" is 4 bytes on every platform we run on; the file format relies on it
+    return array("I")
+
+
+def _parse_asn(value) -> Optional[int]:
+    if value is None:
+        return None
+    text = str(value).strip().upper()
+    if text.startswith("AS"):
+        text = text[2:]
+    try:
+        asn = int(text)
+    except ValueError:
+        return None
+    return asn or None
+
+
+def _address(value: IPLike, version: Optional[int] = None):
+    """
+    Accepts dotted / colon notation or a plain integer (as in many dumps).
+    """
+    text = str(value).strip()
+    if text.isdigit():
+        number = int(text)
+        if version == 6 or number > 0xFFFFFFFF:
+            return ipaddress.IPv6Address(number)
+        return ipaddress.IPv4Address(number)
+    return ipaddress.ip_address(text)
+
+
+# Column names accepted in CSV headers (first match wins)
+_COLUMNS = {
+    "start": ("start", "range_start", "ip_start", "start_ip", "first_ip", "ip_from"),
+    "end": ("end", "range_end", "ip_end", "end_ip", "last_ip", "ip_to"),
+    "network": ("network", "cidr", "prefix"),
+    "country": ("country", "country_code", "country_iso_code", "cc"),
+    "asn": ("asn", "as_number", "autonomous_system_number", "as"),
+    "org": ("org", "organization", "organisation", "as_description",
+            "autonomous_system_organization", "isp", "as_name"),
+}
+
+
+def read_ranges_csv(path: str) -> Iterator[Tuple]:
+    """
+    Yields (start, end, country, asn, org) from a CSV / TSV range dump.
+
+    With a header row columns are matched by name (start/end or a CIDR
+    "network" column, country, asn, org; common aliases are accepted).
+    Without one the columns are positional: start, end, country, asn, org.
+    Unparseable rows are skipped.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        first_line = sample.splitlines()[0] if sample else ""
+        dialect = csv.excel_tab if "\t" in first_line else csv.excel
+        reader = csv.reader(f, dialect)
+
+        first = next(reader, None)
+        if first is None:
+            return
+
+        index = None
+        try:
+            _address(first[0].split("/")[0])
+            rows = chain([first], reader)
+        except ValueError:
+            header = [name.strip().lower() for name in first]
+            index = {
+                key: next((header.index(alias) for alias in aliases if alias in header), None)
+                for key, aliases in _COLUMNS.items()
+            }
+            rows = reader
+
+        skipped = 0
+        for row in rows:
+            if not row or row[0].startswith("#"):
+                continue
+            try:
+                yield _parse_row(row, index)
+            except (ValueError, IndexError):
+                skipped += 1
+
+        if skipped:
+            log.warning(f"[GEO] Skipped {skipped} unparseable rows in {path}")
+
+
+def _parse_row(row: List[str], index: Optional[dict]) -> Tuple:
+    def column(key: str, position: Optional[int] = None):
+        at = position if index is None else index.get(key)
+        if at is None or at >= len(row):
+            return None
+        return row[at].strip() or None
+
+    network = column("network")
+    if network:
+        net = ipaddress.ip_network(network, strict=False)
+        start, end = net.network_address, net.broadcast_address
+    else:
+        start, end = _address(column("start", 0)), _address(column("end", 1))
+
+    return start, end, column("country", 2), _parse_asn(column("asn", 3)), column("org", 4)
+
+
+class GeoRangeDB:
+    """
+    Sorted, non-overlapping IPv4 / IPv6 ranges with a shared record table.
+    Build with from_ranges() / from_csv(), persist with save() / load().
+    """
+
+    def __init__(self):
+        self.v4_starts = _u32()
+        self.v4_ends = _u32()
+        self.v4_records = _u32()
+
+        self.v6_starts = b""
+        self.v6_ends = b""
+        self.v6_records = _u32()
+
+        self.records: List[GeoRecord] = []
+
+    # ---- building ----
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[Tuple]) -> "GeoRangeDB":
+        """
+        ranges: (start, end, country, asn, org) with start / end as IP
+        strings, integers or ipaddress objects.
+
+        Overlapping ranges are clipped so the one that starts first keeps
+        its addresses; adjacent ranges with the same record are merged.
+        """
+        db = cls()
+        record_ids = {}
+        parsed = {4: [], 6: []}
+
+        for start, end, country, asn, org in ranges:
+            start = start if isinstance(start, (ipaddress.IPv4Address, ipaddress.IPv6Address)) else _address(start)
+            end = end if isinstance(end, (ipaddress.IPv4Address, ipaddress.IPv6Address)) else _address(end, start.version)
+            if start.version != end.version or int(end) < int(start):
+                continue
+
+            record = GeoRecord(country or None, _parse_asn(asn), org or None)
+            rid = record_ids.setdefault(record, len(record_ids))
+            parsed[start.version].append((int(start), int(end), rid))
+
+        db.records = list(record_ids)
+
+        for version, items in parsed.items():
+            merged = []
+            for start, end, rid in sorted(items):
+                if merged:
+                    last_start, last_end, last_rid = merged[-1]
+                    if start <= last_end:
+                        start = last_end + 1
+                        if start > end:
+                            continue
+                    if start == last_end + 1 and rid == last_rid:
+                        merged[-1] = (last_start, end, rid)
+                        continue
+                merged.append((start, end, rid))
+
+            if version == 4:
+                db.v4_starts.extend(s for s, _, _ in merged)
+                db.v4_ends.extend(e for _, e, _ in merged)
+                db.v4_records.extend(r for _, _, r in merged)
+            else:
+                db.v6_starts = b"".join(s.to_bytes(16, "big") for s, _, _ in merged)
+                db.v6_ends = b"".join(e.to_bytes(16, "big") for _, e, _ in merged)
+                db.v6_records.extend(r for _, _, r in merged)
+
+        return db
+
+    @classmethod
+    def from_csv(cls, path: str) -> "GeoRangeDB":
+        return cls.from_ranges(read_ranges_csv(path))
+
+    # ---- persistence ----
+
+    def save(self, path: str) -> None:
+        """
+        Writes the binary format atomically (tmp file + rename).
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        records = json.dumps([list(r) for r in self.records], separators=(",", ":")).encode("utf-8")
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(self.v4_starts), len(self.v6_records), len(self.records)))
+            for column in (self.v4_starts, self.v4_ends, self.v4_records):
+                f.write(_little_endian(column).tobytes())
+            f.write(self.v6_starts)
+            f.write(self.v6_ends)
+            f.write(_little_endian(self.v6_records).tobytes())
+            f.write(records)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "GeoRangeDB":
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, n4, n6, _ = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a geo range database")
+
+        db = cls()
+        offset = _HEADER.size
+
+        def take(size: int) -> bytes:
+            nonlocal offset
+            chunk = data[offset:offset + size]
+            offset += size
+            return chunk
+
+        for column in (db.v4_starts, db.v4_ends, db.v4_records):
+            column.frombytes(take(4 * n4))
+            _from_little_endian(column)
+        db.v6_starts = take(16 * n6)
+        db.v6_ends = take(16 * n6)
+        db.v6_records.frombytes(take(4 * n6))
+        _from_little_endian(db.v6_records)
+
+        db.records = [GeoRecord(*r) for r in json.loads(data[offset:].decode("utf-8"))]
+        return db
+
+    # ---- lookup ----
+
+    def lookup(self, ip: IPLike) -> Optional[GeoRecord]:
+        """
+        Record of the range containing `ip`, or None (also for invalid input).
+        IPv4-mapped IPv6 addresses are looked up as IPv4.
+        """
+        try:
+            address = ip if isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)) else ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+
+        if address.version == 4:
+            value = int(address)
+            i = bisect_right(self.v4_starts, value) - 1
+            if i >= 0 and value <= self.v4_ends[i]:
+                return self.records[self.v4_records[i]]
+            return None
+
+        key = address.packed
+        starts, lo, hi = self.v6_starts, 0, len(self.v6_records)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if starts[mid * 16:mid * 16 + 16] <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        i = lo - 1
+        if i >= 0 and key <= self.v6_ends[i * 16:i * 16 + 16]:
+            return self.records[self.v6_records[i]]
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "v4_ranges": len(self.v4_starts),
+            "v6_ranges": len(self.v6_records),
+            "records": len(self.records),
+        }
+
+
+def _little_endian(column: array) -> array:
+    if sys.byteorder == "little":
+        return column
+    swapped = array(column.typecode, column)
+    swapped.byteswap()
+    return swapped
+
+
+def _from_little_endian(column: array) -> None:
+    if sys.byteorder != "little":
+        column.byteswap()
+
+
+def geo_db_from_env() -> Optional[GeoRangeDB]:
+    """
+    GEO_DB_PATH: binary file written by save() (or a CSV dump, imported on
+    startup). Unset, missing or unreadable → None (no local geo lookups).
+    """
+    path = os.getenv("GEO_DB_PATH", "")
+    if not path:
+        return None
+    if not os.path.exists(path):
+        log.warning(f"[GEO] GEO_DB_PATH {path} does not exist; local geo lookups disabled")
+        return None
+    try:
+        if path.endswith((".csv", ".tsv")):
+            return GeoRangeDB.from_csv(path)
+        return GeoRangeDB.load(path)
+    except (OSError, ValueError, struct.error) as e:
+        log.warning(f"[GEO] Could not load {path}: {e!r}; local geo lookups disabled")
+        return None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m src.services.geo_db <ranges.csv> <output.bin>")
+    built = GeoRangeDB.from_csv(sys.argv[1])
+    built.save(sys.argv[2])
+    print(f"{sys.argv[2]}: {built.stats()}")
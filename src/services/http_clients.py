@@ -0,0 +1,138 @@
+# src/services/http_clients.py
+
+import importlib.util
+import logging
+import os
+from typing import Dict, Iterable, Optional
+
+import httpx
+
+log = logging.getLogger("http_clients")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class ProviderHTTPClients:
+    """
+    Owns one long-lived, pooled httpx.AsyncClient per threat-intel provider.
+
+    Creating a client per lookup pays DNS + TCP + TLS handshakes on every
+    call. Instead, the FastAPI lifespan opens a client for every provider
+    at startup, binds it into the provider adapter, and closes all of them
+    at shutdown. Connections are kept alive and reused between requests.
+
+    Pool settings are shared by all providers and can be tuned via env:
+        PROVIDER_HTTP_MAX_CONNECTIONS     (default 100)
+        PROVIDER_HTTP_MAX_KEEPALIVE       (default 20)
+        PROVIDER_HTTP_KEEPALIVE_EXPIRY    (default 30.0 seconds)
+        PROVIDER_HTTP2                    (default off, requires the "h2" package)
+
+    Per-provider settings (timeout, TLS verification, transport retries)
+    are declared by each provider via its client_options property.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=(
+                max_connections
+                if max_connections is not None
+                else _env_int("PROVIDER_HTTP_MAX_CONNECTIONS", 100)
+            ),
+            max_keepalive_connections=(
+                max_keepalive_connections
+                if max_keepalive_connections is not None
+                else _env_int("PROVIDER_HTTP_MAX_KEEPALIVE", 20)
+            ),
+            keepalive_expiry=(
+                keepalive_expiry
+                if keepalive_expiry is not None
+                else _env_float("PROVIDER_HTTP_KEEPALIVE_EXPIRY", 30.0)
+            ),
+        )
+
+        want_http2 = http2 if http2 is not None else _env_bool("PROVIDER_HTTP2", False)
+
+        # HTTP/2 is optional: httpx needs the "h2" package for it.
+        if want_http2 and importlib.util.find_spec("h2") is None:
+            log.warning("[HTTP] PROVIDER_HTTP2 requested but 'h2' is not installed; using HTTP/1.1")
+            want_http2 = False
+
+        self.http2 = want_http2
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self._providers = []
+
+    def build_client(self, options: Dict) -> httpx.AsyncClient:
+        """
+        Builds a pooled client from provider options:
+            timeout: float  (default 5.0)
+            verify:  bool   (default True)
+            retries: int    (connection retries, default 0)
+        """
+        transport = httpx.AsyncHTTPTransport(
+            verify=options.get("verify", True),
+            retries=options.get("retries", 0),
+            limits=self.limits,
+            http2=self.http2,
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=options.get("timeout", 5.0),
+        )
+
+    def open(self, providers: Iterable) -> None:
+        """
+        Creates one client per provider and injects it into the adapter.
+        Providers without bind_http_client() (e.g. test doubles) are skipped.
+        """
+        for provider in providers:
+            if not hasattr(provider, "bind_http_client"):
+                continue
+
+            client = self.build_client(getattr(provider, "client_options", {}) or {})
+            self.clients[provider.name] = client
+            provider.bind_http_client(client)
+            self._providers.append(provider)
+
+    def get(self, name: str) -> Optional[httpx.AsyncClient]:
+        return self.clients.get(name)
+
+    async def aclose(self) -> None:
+        """
+        Unbinds clients from providers and closes all pooled connections.
+        Providers fall back to per-call clients after this.
+        """
+        for provider in self._providers:
+            provider.bind_http_client(None)
+        self._providers = []
+
+        clients, self.clients = self.clients, {}
+        for name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                log.warning(f"[HTTP] Error closing client for {name}: {e!r}")
@@ -0,0 +1,189 @@
+# src/services/logging_service.py
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# High-frequency events are logged for only a share of occurrences
+DEFAULT_SAMPLE_RATES = "cache.hit=0.01,cache.stale=0.1,cache.store=0.1"
+
+# Max warnings/errors per (provider, event) per window; the rest are counted
+PROVIDER_LOG_LIMIT = int(os.getenv("LOG_PROVIDER_LIMIT", 10))
+PROVIDER_LOG_WINDOW = float(os.getenv("LOG_PROVIDER_WINDOW", 60))
+
+# Bounded so a stuck stream drops log records instead of growing memory
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10_000))
+
+# HTTP client libraries log one INFO line per request; vendor calls are
+# already covered by our own provider events, so keep only their warnings
+QUIET_LOGGERS = ("httpx", "httpcore")
+QUIET_LOGGERS_LEVEL = os.getenv("LOG_HTTP_CLIENT_LEVEL", "WARNING").upper()
+
+
+def log_event(logger: logging.Logger, level: int, event: str, message: str, **fields) -> None:
+    """
+    Emits a structured record: `event` names what happened
+    ("cache.hit", "provider.bad_status", ...) and `fields` become
+    top-level keys of the JSON line (ip, provider, status, ...).
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"event": event, "fields": fields})
+
+
+def parse_sample_rates(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Parses "cache.hit=0.01,cache.stale=0.1" into {"cache.hit": 0.01, ...}.
+    Malformed parts are ignored.
+    """
+    rates: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, _, rate = part.partition("=")
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: ts, level, logger, event, msg + fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        event = getattr(record, "event", None)
+        if event:
+            entry["event"] = event
+        entry["msg"] = record.getMessage()
+        entry.update(getattr(record, "fields", None) or {})
+
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a share of records for configured events.
+    Kept records carry sample_rate so counts can be scaled back up.
+    """
+
+    def __init__(self, rates: Dict[str, float], rng: Optional[random.Random] = None):
+        super().__init__()
+        self.rates = rates
+        self.rng = rng or random.Random()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(getattr(record, "event", None))
+        if rate is None or rate >= 1.0:
+            return True
+        if self.rng.random() >= rate:
+            return False
+        record.fields = {**(getattr(record, "fields", None) or {}), "sample_rate": rate}
+        return True
+
+
+class ProviderRateLimitFilter(logging.Filter):
+    """
+    Limits warnings/errors to `limit` per (provider, event) per `window`
+    seconds, so a vendor outage produces a handful of lines instead of one
+    per request. The first record after a window reports how many were
+    suppressed.
+    """
+
+    def __init__(self, limit: int = PROVIDER_LOG_LIMIT, window: float = PROVIDER_LOG_WINDOW, clock=time.monotonic):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        # (provider, event) -> [window_start, emitted, suppressed]
+        self._state: Dict[Tuple[str, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        fields = getattr(record, "fields", None) or {}
+        provider = fields.get("provider")
+        if provider is None or record.levelno < logging.WARNING:
+            return True
+
+        key = (provider, getattr(record, "event", None) or record.getMessage())
+        now = self.clock()
+        state = self._state.get(key)
+
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            self._state[key] = [now, 1, 0]
+            if suppressed:
+                record.fields = {**fields, "suppressed": suppressed}
+            return True
+
+        if state[1] < self.limit:
+            state[1] += 1
+            return True
+
+        state[2] += 1
+        return False
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[logging.Handler] = None
+
+
+def start_logging(level: Optional[str] = None, stream=None) -> None:
+    """
+    Installs non-blocking structured logging on the root logger:
+    callers only enqueue records (after sampling / rate limiting);
+    a background thread formats them as JSON lines and writes the stream.
+    Idempotent; stop_logging() flushes and removes it.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _handler = _DroppingQueueHandler(log_queue)
+    _handler.addFilter(SamplingFilter(parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", DEFAULT_SAMPLE_RATES))))
+    _handler.addFilter(ProviderRateLimitFilter())
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(QUIET_LOGGERS_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    global _listener, _handler
+    if _listener is None:
+        return
+
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()
+    _listener = None
+    _handler = None
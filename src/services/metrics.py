@@ -0,0 +1,184 @@
+# src/services/metrics.py
+
+import bisect
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Latency buckets (seconds) for every stage histogram
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Per-request stage timings for the Server-Timing header.
+# None outside a request that asked for them.
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = (
+    contextvars.ContextVar("request_timings", default=None)
+)
+
+
+class Histogram:
+    """
+    Cumulative histogram in the Prometheus sense:
+    per-bucket counts plus total count and sum.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            result.append((repr(float(bound)), running))
+        result.append(("+Inf", self.count))
+        return result
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry.
+
+    Stage latencies are recorded as histograms keyed by stage name and
+    labels (e.g. stage="provider_fetch", provider="VirusTotal") and
+    rendered in the Prometheus text exposition format by render().
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[Tuple[str, str], ...], Histogram] = {}
+
+    def observe(self, stage: str, seconds: float, **labels) -> None:
+        key = (("stage", stage),) + tuple(sorted((k, str(v)) for k, v in labels.items()))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def render(self) -> str:
+        name = "ip_threat_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each stage of the analyze-ip pipeline.",
+            f"# TYPE {name} histogram",
+        ]
+        for labels, histogram in sorted(self.histograms.items()):
+            for bound, count in histogram.cumulative():
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_format_labels(labels, le)} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        self.histograms.clear()
+
+
+METRICS = Metrics()
+
+# Adds a Server-Timing header to API responses when enabled
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "0") in ("1", "true", "yes")
+
+
+@contextmanager
+def stage(name: str, **labels):
+    """
+    Times a block as one pipeline stage:
+
+        with stage("provider_fetch", provider="AbuseIPDB"):
+            ...
+
+    The duration goes to the METRICS histogram and, inside a request that
+    collects timings, to its Server-Timing entries.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        METRICS.observe(name, elapsed, **labels)
+
+        timings = _request_timings.get()
+        if timings is not None:
+            label = ".".join([name, *(str(v) for v in labels.values())])
+            timings.append((label, elapsed))
+
+
+def start_request_timings() -> contextvars.Token:
+    """
+    Starts collecting stage timings for the current request.
+    Tasks spawned afterwards inherit the same list.
+    """
+    return _request_timings.set([])
+
+
+def finish_request_timings(token: contextvars.Token) -> List[Tuple[str, float]]:
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    return timings
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """
+    [("cache_lookup", 0.0001), ...] → 'cache_lookup;dur=0.1, ...' (milliseconds).
+    Repeated stages are summed.
+    """
+    totals: Dict[str, float] = {}
+    for label, seconds in timings:
+        totals[label] = totals.get(label, 0.0) + seconds
+    return ", ".join(f"{label};dur={seconds * 1000:.2f}" for label, seconds in totals.items())
+
+
+class ServerTimingMiddleware:
+    """
+    Adds the per-request stage breakdown as a Server-Timing header to
+    responses under path_prefix. Plain ASGI rather than BaseHTTPMiddleware:
+    no extra task or response re-streaming, only the http.response.start
+    message gets one more header. Install it only when SERVER_TIMING is on.
+    """
+
+    def __init__(self, app, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timings = list(_request_timings.get() or [])
+                timings.append(("total", time.perf_counter() - started))
+                header = server_timing_header(timings).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        token = start_request_timings()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            finish_request_timings(token)
+            METRICS.observe("total", time.perf_counter() - started)
@@ -24,6 +24,23 @@ class AbuseIPDBProvider(ThreatIntelProvider):
     def fields(self) -> tuple:
         return ("abuse_score", "recent_reports")
 
+    @property
+    def cache_ttl(self) -> int:
+        return 12 * 3600   # abuse reports change slowly: 12h
+
+    @property
+    def timeout_budget(self) -> float:
+        return 3.0
+
+    @property
+    def rate_limit(self) -> float:
+        return 10.0
+
+    @property
+    def daily_quota(self) -> int:
+        # Free plan: 1000 checks per day
+        return 1000
+
     async def fetch(self, ip: str) -> Dict:
         fallback = {
             "abuse_score": None,
@@ -31,7 +48,7 @@ class AbuseIPDBProvider(ThreatIntelProvider):
         }
 
         try:
-            result = await fetch_abuse(ip)   # direct await, NO threadpool
+            result = await fetch_abuse(ip, client=self.http_client)   # direct await, NO threadpool
         except Exception as e:
             log.warning(f"[AbuseIPDB] Exception: {repr(e)}")
             return fallback
@@ -1,7 +1,9 @@
 ﻿# src/services/base_provider.py
 
 import abc
-from typing import Dict
+from typing import Dict, Optional
+
+import httpx
 
 
 class ThreatIntelProvider(abc.ABC):
@@ -11,6 +13,78 @@ class ThreatIntelProvider(abc.ABC):
     Providers hide internal API logic and expose only normalized fields.
     """
 
+    # Pooled HTTP client injected by the application lifespan.
+    # None means the external module opens a short-lived client per call.
+    http_client: Optional[httpx.AsyncClient] = None
+
+    def bind_http_client(self, client: Optional[httpx.AsyncClient]) -> None:
+        """
+        Injects (or removes, with None) the long-lived pooled client
+        that fetch() passes down to the external API wrapper.
+        """
+        self.http_client = client
+
+    @property
+    def client_options(self) -> Dict:
+        """
+        Per-provider settings for the pooled HTTP client:
+            {"timeout": 5.0, "verify": True, "retries": 0}
+        Providers override this when their vendor needs something special.
+        """
+        return {"timeout": 5.0}
+
+    @property
+    def cache_ttl(self) -> int:
+        """
+        How long (seconds) a successful result of this provider stays valid
+        in the provider cache. 0 disables caching for the provider.
+        Vendors update reputation data slowly, so TTLs are vendor-specific.
+        """
+        return 0
+
+    @property
+    def cache_ipv6_prefix(self) -> Optional[int]:
+        """
+        For vendors whose whole answer is the same across an IPv6 prefix:
+        cache one result per /N network instead of per address, e.g. 64.
+        None means per-address keys. Do not set it for providers returning
+        per-address data (IPAPI's hostname is reverse DNS of one address).
+        """
+        return None
+
+    @property
+    def timeout_budget(self) -> Optional[float]:
+        """
+        Max seconds the aggregator waits for this provider before returning
+        without it. None means: bounded only by the overall request deadline.
+        """
+        return None
+
+    @property
+    def rate_limit(self) -> Optional[float]:
+        """
+        Max sustained requests per second to this vendor (token-bucket rate).
+        None means no client-side limit.
+        """
+        return None
+
+    @property
+    def rate_burst(self) -> Optional[int]:
+        """
+        Token-bucket capacity: requests allowed back-to-back before the
+        rate applies. None means max(1, rate_limit).
+        """
+        return None
+
+    @property
+    def daily_quota(self) -> Optional[int]:
+        """
+        Vendor requests allowed per UTC day for the configured key.
+        None means unknown / unlimited (exhaustion is then only detected
+        from the vendor's own quota errors).
+        """
+        return None
+
     @property
     @abc.abstractmethod
     def name(self) -> str:
@@ -47,3 +121,63 @@ class ThreatIntelProvider(abc.ABC):
         always return a well-formed result dictionary.
         """
         raise NotImplementedError
+
+
+class ProviderWrapper(ThreatIntelProvider):
+    """
+    Base class for layers that wrap another provider (caching, limits, ...).
+    Identity, declared fields and HTTP client binding are forwarded to the
+    wrapped provider, so wrappers can be stacked transparently in the registry.
+    """
+
+    def __init__(self, inner: ThreatIntelProvider):
+        self.inner = inner
+
+    @property
+    def name(self) -> str:
+        return self.inner.name
+
+    @property
+    def fields(self) -> tuple:
+        return self.inner.fields
+
+    @property
+    def client_options(self) -> Dict:
+        return getattr(self.inner, "client_options", {})
+
+    @property
+    def cache_ttl(self) -> int:
+        return getattr(self.inner, "cache_ttl", 0)
+
+    @property
+    def cache_ipv6_prefix(self) -> Optional[int]:
+        return getattr(self.inner, "cache_ipv6_prefix", None)
+
+    @property
+    def timeout_budget(self) -> Optional[float]:
+        return getattr(self.inner, "timeout_budget", None)
+
+    @property
+    def rate_limit(self) -> Optional[float]:
+        return getattr(self.inner, "rate_limit", None)
+
+    @property
+    def rate_burst(self) -> Optional[int]:
+        return getattr(self.inner, "rate_burst", None)
+
+    @property
+    def daily_quota(self) -> Optional[int]:
+        return getattr(self.inner, "daily_quota", None)
+
+    @property
+    def http_client(self) -> Optional[httpx.AsyncClient]:
+        return getattr(self.inner, "http_client", None)
+
+    def bind_http_client(self, client: Optional[httpx.AsyncClient]) -> None:
+        self.inner.bind_http_client(client)
+
+    def fallback(self) -> Dict:
+        return {field: None for field in self.fields}
+
+    async def fetch(self, ip: str) -> Dict:
+        return await self.inner.fetch(ip)
@@ -0,0 +1,91 @@
+# src/services/providers/blocklist_provider.py
+
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from src.services.blocklist import BlocklistStore
+from src.services.providers.base_provider import ThreatIntelProvider
+
+log = logging.getLogger("provider.blocklist")
+
+
+class BlocklistProvider(ThreatIntelProvider):
+    """
+    Membership in the local blocklist feeds (src.services.blocklist).
+
+    Returns:
+        blocklisted: bool
+        blocklists: list[str]   names of the lists containing the IP
+
+    Standalone (upstream=None) it only adds those two fields. In front of
+    a vendor provider (upstream=AbuseIPDB chain) it answers listed IPs
+    locally: the vendor is not called, its fields get the fallback values
+    overlaid with `listed_result` (e.g. {"abuse_score": 100}). Unlisted
+    IPs go to the vendor as before.
+    """
+
+    def __init__(
+        self,
+        store: BlocklistStore,
+        upstream: Optional[ThreatIntelProvider] = None,
+        listed_result: Optional[Dict] = None,
+    ):
+        self.store = store
+        self.upstream = upstream
+        self.listed_result = dict(listed_result or {})
+        self.listed = 0
+        self.upstream_skipped = 0
+
+    @property
+    def name(self) -> str:
+        return "Blocklist"
+
+    @property
+    def fields(self) -> tuple:
+        upstream_fields = self.upstream.fields if self.upstream is not None else ()
+        return upstream_fields + ("blocklisted", "blocklists")
+
+    @property
+    def client_options(self) -> Dict:
+        return getattr(self.upstream, "client_options", {}) if self.upstream else {}
+
+    @property
+    def timeout_budget(self) -> Optional[float]:
+        return getattr(self.upstream, "timeout_budget", None) if self.upstream else None
+
+    @property
+    def http_client(self) -> Optional[httpx.AsyncClient]:
+        return getattr(self.upstream, "http_client", None)
+
+    def bind_http_client(self, client: Optional[httpx.AsyncClient]) -> None:
+        if self.upstream is not None:
+            self.upstream.bind_http_client(client)
+
+    async def fetch(self, ip: str) -> Dict:
+        lists = self.store.lookup(ip)
+        membership = {"blocklisted": bool(lists), "blocklists": list(lists)}
+
+        if lists:
+            self.listed += 1
+
+        if self.upstream is None:
+            return membership
+
+        if lists:
+            self.upstream_skipped += 1
+            result = {field: None for field in self.upstream.fields}
+            result.update({k: v for k, v in self.listed_result.items() if k in result})
+        else:
+            result = await self.upstream.fetch(ip)
+
+        return {**result, **membership}
+
+    def stats(self) -> Dict:
+        return {
+            "mode": "front" if self.upstream is not None else "separate",
+            "listed": self.listed,
+            "upstream_skipped": self.upstream_skipped,
+            **self.store.stats(),
+        }
@@ -0,0 +1,55 @@
+# src/services/providers/cached_provider.py
+
+import logging
+from typing import Dict
+
+from src.services.cache_service import CacheService
+from src.services.providers.base_provider import ProviderWrapper, ThreatIntelProvider
+from src.validators.ip_validator import IPValidator
+
+log = logging.getLogger("provider.cache")
+
+
+class CachedProvider(ProviderWrapper):
+    """
+    Caches the result of a single provider, keyed by provider name + IP.
+
+    Each provider declares its own freshness via cache_ttl (seconds),
+    so a re-analysis only calls the providers whose data is actually stale:
+    e.g. after the merged response expires, VirusTotal (24h) is still served
+    from cache while a provider that failed last time is retried.
+
+    Fallback results (every field None) are never cached, so a transient
+    vendor failure does not pin an empty answer for the whole TTL.
+
+    Keys use the canonical IP (see IPValidator.validate). Providers with
+    cache_ipv6_prefix share one entry per IPv6 network.
+    """
+
+    def __init__(self, inner: ThreatIntelProvider, cache: CacheService):
+        super().__init__(inner)
+        self.cache = cache
+
+    def cache_key(self, ip: str) -> str:
+        prefix = self.cache_ipv6_prefix
+        if prefix and ":" in ip:
+            return f"{self.name}:{IPValidator.prefix_key(ip, prefix)}"
+        return f"{self.name}:{ip}"
+
+    async def fetch(self, ip: str) -> Dict:
+        ttl = self.cache_ttl
+        if not ttl:
+            return await self.inner.fetch(ip)
+
+        key = self.cache_key(ip)
+
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            return dict(cached)
+
+        result = await self.inner.fetch(ip)
+
+        if any(value is not None for value in result.values()):
+            self.cache.set(key, dict(result), ttl=ttl)
+
+        return result
@@ -0,0 +1,175 @@
+# src/services/providers/circuit_breaker_provider.py
+
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional
+
+from src.external.outcome import capture_outcome, report_error
+from src.services.logging_service import log_event
+from src.services.providers.base_provider import ProviderWrapper, ThreatIntelProvider
+
+log = logging.getLogger("provider.circuit")
+
+# Consecutive failures that open the circuit
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+
+# First open period; doubled on every failed half-open trial up to the max
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", 30.0))
+CIRCUIT_MAX_OPEN_SECONDS = float(os.getenv("CIRCUIT_MAX_OPEN_SECONDS", 600.0))
+
+# A rejected / missing key will not fix itself within seconds
+CIRCUIT_AUTH_OPEN_SECONDS = float(os.getenv("CIRCUIT_AUTH_OPEN_SECONDS", 3600.0))
+
+# Concurrent trial calls let through while half-open
+CIRCUIT_HALF_OPEN_TRIALS = int(os.getenv("CIRCUIT_HALF_OPEN_TRIALS", 1))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Outcome kinds (see src/external/outcome.py) that count against the vendor.
+# quota / rate_limited / throttled are left to RateLimitedProvider.
+FAILURE_KINDS = frozenset({"network", "status", "parse", "api_error", "exception"})
+AUTH_KINDS = frozenset({"auth", "no_api_key"})
+
+
+class CircuitBreakerProvider(ProviderWrapper):
+    """
+    Per-provider circuit breaker.
+
+    - closed: calls go through; CIRCUIT_FAILURE_THRESHOLD consecutive
+      failures (network, bad status, parse, vendor error) open the circuit.
+      An auth error or a missing key opens it immediately for
+      CIRCUIT_AUTH_OPEN_SECONDS.
+    - open: fetch returns the fallback at once, without touching the vendor
+      or waiting for its timeout.
+    - half_open: after the open period up to CIRCUIT_HALF_OPEN_TRIALS trial
+      calls are let through. A successful trial closes the circuit, a failed
+      one re-opens it for twice the previous period (capped).
+
+    Failures are read from the external outcome side channel, so the
+    fallback returned by the vendor modules is told apart from real data.
+    """
+
+    def __init__(
+        self,
+        inner: ThreatIntelProvider,
+        failure_threshold: Optional[int] = None,
+        open_seconds: Optional[float] = None,
+        max_open_seconds: Optional[float] = None,
+        auth_open_seconds: Optional[float] = None,
+        half_open_trials: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(inner)
+        self.failure_threshold = failure_threshold or CIRCUIT_FAILURE_THRESHOLD
+        self.open_seconds = open_seconds or CIRCUIT_OPEN_SECONDS
+        self.max_open_seconds = max_open_seconds or CIRCUIT_MAX_OPEN_SECONDS
+        self.auth_open_seconds = auth_open_seconds or CIRCUIT_AUTH_OPEN_SECONDS
+        self.half_open_trials = half_open_trials or CIRCUIT_HALF_OPEN_TRIALS
+        self.clock = clock
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self._open_until = 0.0
+        self._open_period = self.open_seconds
+        self._trials_in_flight = 0
+
+        self.opened = 0
+        self.short_circuited = 0
+
+    def _allow(self) -> Optional[bool]:
+        """
+        None → reject; otherwise whether the call is a half-open trial.
+        """
+        if self.state == OPEN:
+            if self.clock() < self._open_until:
+                return None
+            self._transition(HALF_OPEN)
+            self._trials_in_flight = 0
+
+        if self.state == HALF_OPEN:
+            if self._trials_in_flight >= self.half_open_trials:
+                return None
+            self._trials_in_flight += 1
+            return True
+
+        return False
+
+    def _transition(self, state: str) -> None:
+        log_event(log, logging.WARNING if state == OPEN else logging.INFO, f"circuit.{state}",
+                  f"Circuit {state}", provider=self.name, previous=self.state,
+                  error=self.last_error)
+        self.state = state
+
+    def _open(self, period: float) -> None:
+        self._open_period = period
+        self._open_until = self.clock() + period
+        self.opened += 1
+        self._transition(OPEN)
+
+    def _record(self, error: Optional[str], trial: bool) -> None:
+        # Late results of calls started before the circuit opened change nothing
+        if self.state == OPEN:
+            return
+        if self.state == HALF_OPEN and not trial:
+            return
+
+        if error is None:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._open_period = self.open_seconds
+                self._transition(CLOSED)
+            return
+
+        if error in AUTH_KINDS:
+            self.last_error = error
+            self.consecutive_failures += 1
+            self._open(self.auth_open_seconds)
+        elif error in FAILURE_KINDS:
+            self.last_error = error
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self._open(min(self._open_period * 2, self.max_open_seconds))
+            elif self.consecutive_failures >= self.failure_threshold:
+                self._open(self.open_seconds)
+
+    async def fetch(self, ip: str) -> Dict:
+        trial = self._allow()
+        if trial is None:
+            self.short_circuited += 1
+            report_error("circuit_open")
+            return self.fallback()
+
+        error = None
+        try:
+            with capture_outcome() as outcome:
+                result = await self.inner.fetch(ip)
+            error = outcome["error"]
+        except Exception as e:
+            error = "exception"
+            log_event(log, logging.WARNING, "provider.exception", "Provider raised",
+                      provider=self.name, error=repr(e))
+            result = self.fallback()
+        finally:
+            if trial:
+                self._trials_in_flight -= 1
+
+        self._record(error, trial)
+        return result
+
+    def status(self) -> Dict:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self._open_until - self.clock()), 3)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "last_error": self.last_error,
+            "retry_in": retry_in,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+        }
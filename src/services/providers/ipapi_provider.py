@@ -27,12 +27,29 @@ class IPAPIProvider(ThreatIntelProvider):
     def fields(self) -> tuple:
         return ("hostname", "isp", "country")
 
+    @property
+    def cache_ttl(self) -> int:
+        return 24 * 3600   # geo/ISP data is effectively static
+
+    @property
+    def timeout_budget(self) -> float:
+        return 3.0
+
+    @property
+    def rate_limit(self) -> float:
+        return 10.0
+
+    @property
+    def daily_quota(self) -> int:
+        # Free plan: 1000 requests per day
+        return 1000
+
     async def fetch(self, ip: str) -> Dict:
         fallback = {"hostname": None, "isp": None, "country": None}
 
         try:
             # fetch_ipapi is already async  we call directly
-            result = await fetch_ipapi(ip)
+            result = await fetch_ipapi(ip, client=self.http_client)
         except Exception as e:
             log.warning(f"[IPAPI] Exception: {repr(e)}")
             return fallback
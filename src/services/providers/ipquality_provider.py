@@ -36,6 +36,36 @@ class IPQualityScoreProvider(ThreatIntelProvider):
         """
         return ("fraud_score", "vpn_proxy")
 
+    @property
+    def client_options(self) -> Dict:
+        """
+        IPQS free tier often has a broken certificate chain and drops
+        the first connection, so the pooled client mirrors the settings
+        used by fetch_quality() for its per-call client.
+        """
+        return {"timeout": 8.0, "verify": False, "retries": 2}
+
+    @property
+    def cache_ttl(self) -> int:
+        """
+        IPQS fraud data is valid for 12-24h; the lower bound is used.
+        Also protects the small daily request quota.
+        """
+        return 12 * 3600
+
+    @property
+    def timeout_budget(self) -> float:
+        # Slowest vendor (8s timeout + transport retries): do not let it
+        # dictate request latency; late results still land in the cache.
+        return 4.0
+
+    @property
+    def rate_limit(self) -> float:
+        return 5.0
+
+    # No daily_quota: the free plan is monthly; exhaustion is detected
+    # from the "exceeded your request quota" answer and persisted.
+
     async def fetch(self, ip: str) -> Dict:
         """
         Fetches fraud_score and VPN/proxy indicators for the specified IP.
@@ -57,7 +87,7 @@ class IPQualityScoreProvider(ThreatIntelProvider):
 
         try:
             # Call the async external API wrapper
-            result = await fetch_quality(ip)
+            result = await fetch_quality(ip, client=self.http_client)
         except Exception as e:
             log.warning(f"[IPQualityScore] Exception during fetch: {repr(e)}")
             return fallback
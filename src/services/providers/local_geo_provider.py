@@ -0,0 +1,80 @@
+# src/services/providers/local_geo_provider.py
+
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from src.services.country_names import country_name
+from src.services.geo_db import GeoRangeDB
+from src.services.providers.base_provider import ThreatIntelProvider
+
+log = logging.getLogger("provider.local_geo")
+
+
+class LocalGeoProvider(ThreatIntelProvider):
+    """
+    Geo / ISP enrichment from the offline range database (src.services.geo_db).
+
+    Returns the same fields as IPAPIProvider, so it can take its place:
+        - replace (upstream=None): answers from the database only; IPs
+          outside every range get the fallback. hostname stays None
+          (reverse DNS is not part of a range dump).
+        - front (upstream=IPAPI chain): answers from the database and only
+          calls the upstream provider for IPs the database does not cover.
+
+    Countries are reported like ipapi.co's country_name ("United States",
+    not the "US" code stored in the database), so both sources agree.
+
+    A lookup is a binary search in memory: no network, no vendor quota,
+    so results are not worth caching (cache_ttl 0).
+    """
+
+    def __init__(self, db: GeoRangeDB, upstream: Optional[ThreatIntelProvider] = None):
+        self.db = db
+        self.upstream = upstream
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def name(self) -> str:
+        return "LocalGeo"
+
+    @property
+    def fields(self) -> tuple:
+        return ("hostname", "isp", "country")
+
+    @property
+    def client_options(self) -> Dict:
+        return getattr(self.upstream, "client_options", {}) if self.upstream else {}
+
+    @property
+    def timeout_budget(self) -> Optional[float]:
+        return getattr(self.upstream, "timeout_budget", None) if self.upstream else None
+
+    @property
+    def http_client(self) -> Optional[httpx.AsyncClient]:
+        return getattr(self.upstream, "http_client", None)
+
+    def bind_http_client(self, client: Optional[httpx.AsyncClient]) -> None:
+        if self.upstream is not None:
+            self.upstream.bind_http_client(client)
+
+    async def fetch(self, ip: str) -> Dict:
+        record = self.db.lookup(ip)
+        if record is not None:
+            self.hits += 1
+            return {"hostname": None, "isp": record.org, "country": country_name(record.country)}
+
+        self.misses += 1
+        if self.upstream is None:
+            return {"hostname": None, "isp": None, "country": None}
+        return await self.upstream.fetch(ip)
+
+    def stats(self) -> Dict:
+        return {
+            "mode": "front" if self.upstream is not None else "replace",
+            "hits": self.hits,
+            "misses": self.misses,
+            **self.db.stats(),
+        }
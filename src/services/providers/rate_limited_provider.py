@@ -0,0 +1,117 @@
+# src/services/providers/rate_limited_provider.py
+
+import asyncio
+import logging
+import os
+import re
+from typing import Dict, Optional
+
+from src.external.outcome import capture_outcome, report_error
+from src.services.logging_service import log_event
+from src.services.providers.base_provider import ProviderWrapper, ThreatIntelProvider
+from src.services.rate_limiter import QuotaStore, TokenBucket
+
+log = logging.getLogger("provider.rate_limit")
+
+# Longest a fetch may queue for a token before giving up with the fallback
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", 1.0))
+
+# Back-off after the vendor itself answered 429 (seconds)
+RATE_LIMIT_BACKOFF = float(os.getenv("RATE_LIMIT_BACKOFF", 5.0))
+
+
+def _env_key(name: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", "_", name.upper()).strip("_")
+
+
+def _env_number(name: str, cast, default):
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        return default
+
+
+class RateLimitedProvider(ProviderWrapper):
+    """
+    Client-side rate limiting and quota accounting for one provider.
+
+    - per-second: a token bucket (rate_limit / rate_burst). A fetch waits
+      for a token up to max_wait seconds, otherwise returns the fallback
+      without calling the vendor.
+    - per-day: calls are counted per UTC day in a QuotaStore that
+      persists across restarts. Once daily_quota calls were made, or the
+      vendor reported its quota as exhausted, every fetch short-circuits
+      to the fallback until the next UTC day.
+    - a vendor 429 drains the bucket for RATE_LIMIT_BACKOFF seconds.
+
+    Limits come from the provider's properties and can be overridden per
+    provider via env, e.g. RATE_LIMIT_VIRUSTOTAL_PER_SECOND,
+    RATE_LIMIT_VIRUSTOTAL_BURST, RATE_LIMIT_VIRUSTOTAL_PER_DAY
+    (0 turns the per-second or per-day limit off).
+    """
+
+    def __init__(self, inner: ThreatIntelProvider, quotas: QuotaStore, max_wait: Optional[float] = None):
+        super().__init__(inner)
+        self.quotas = quotas
+        self.max_wait = max_wait if max_wait is not None else RATE_LIMIT_MAX_WAIT
+
+        prefix = f"RATE_LIMIT_{_env_key(self.name)}"
+        rate = _env_number(f"{prefix}_PER_SECOND", float, inner.rate_limit)
+        burst = _env_number(f"{prefix}_BURST", int, inner.rate_burst)
+        # 0 disables a limit (e.g. load tests against mock vendors)
+        self.daily_limit = _env_number(f"{prefix}_PER_DAY", int, inner.daily_quota) or None
+
+        self.bucket = TokenBucket(rate, burst) if rate else None
+
+        self.calls = 0
+        self.throttled = 0
+        self.quota_skipped = 0
+        self.vendor_rate_limited = 0
+
+    async def fetch(self, ip: str) -> Dict:
+        if self.quotas.is_exhausted(self.name, self.daily_limit):
+            self.quota_skipped += 1
+            report_error("quota")
+            return self.fallback()
+
+        if self.bucket is not None:
+            wait = self.bucket.reserve(self.max_wait)
+            if wait is None:
+                self.throttled += 1
+                report_error("throttled")
+                return self.fallback()
+            if wait:
+                await asyncio.sleep(wait)
+
+        self.calls += 1
+        self.quotas.record_call(self.name)
+
+        with capture_outcome() as outcome:
+            result = await self.inner.fetch(ip)
+
+        if outcome["error"] == "quota":
+            self.quotas.mark_exhausted(self.name)
+            log_event(log, logging.ERROR, "provider.quota_exhausted",
+                      "Quota exhausted, skipping calls until next UTC day", provider=self.name)
+        elif outcome["error"] == "rate_limited":
+            self.vendor_rate_limited += 1
+            if self.bucket is not None:
+                self.bucket.drain(RATE_LIMIT_BACKOFF)
+
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "rate_limit": self.bucket.rate if self.bucket else None,
+            "burst": self.bucket.capacity if self.bucket else None,
+            "daily_limit": self.daily_limit,
+            "used_today": self.quotas.used(self.name),
+            "exhausted": self.quotas.is_exhausted(self.name, self.daily_limit),
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "quota_skipped": self.quota_skipped,
+            "vendor_rate_limited": self.vendor_rate_limited,
+        }
@@ -25,12 +25,38 @@ class VirusTotalProvider(ThreatIntelProvider):
     def fields(self) -> tuple:
         return ("vt_score",)
 
+    @property
+    def client_options(self) -> Dict:
+        return {"timeout": 8.0}
+
+    @property
+    def cache_ttl(self) -> int:
+        return 24 * 3600
+
+    @property
+    def timeout_budget(self) -> float:
+        return 4.0
+
+    @property
+    def rate_limit(self) -> float:
+        # Public API: 4 requests per minute...
+        return 4 / 60
+
+    @property
+    def rate_burst(self) -> int:
+        return 4
+
+    @property
+    def daily_quota(self) -> int:
+        # ...and 500 per day
+        return 500
+
     async def fetch(self, ip: str) -> Dict:
         fallback = {"vt_score": None}
 
         try:
             # Native async call  no threadpool, no blocking IO
-            result = await fetch_virustotal(ip)
+            result = await fetch_virustotal(ip, client=self.http_client)
         except Exception as e:
             log.warning(f"[VirusTotal] Exception: {repr(e)}")
             return fallback
@@ -1,9 +1,20 @@
 # src/services/providers_registry.py
 
+import os
+
+from src.services.blocklist import blocklist_store_from_env
+from src.services.cache_service import CacheService, backing_from_env
+from src.services.geo_db import geo_db_from_env
+from src.services.providers.blocklist_provider import BlocklistProvider
+from src.services.providers.cached_provider import CachedProvider
+from src.services.providers.circuit_breaker_provider import CircuitBreakerProvider
+from src.services.providers.rate_limited_provider import RateLimitedProvider
 from src.services.providers.abuseipdb_provider import AbuseIPDBProvider
 from src.services.providers.ipquality_provider import IPQualityScoreProvider
 from src.services.providers.ipapi_provider import IPAPIProvider
+from src.services.providers.local_geo_provider import LocalGeoProvider
 from src.services.providers.virustotal_provider import VirusTotalProvider
+from src.services.rate_limiter import QuotaStore
 
 """
 Central registry of all threat-intel providers.
@@ -11,11 +22,73 @@ Aggregator imports this list and runs all providers uniformly.
 
 Adding new data sources does not require modifying the aggregator:
 just append another provider class to PROVIDERS.
+
+Every provider is wrapped in CachedProvider, which caches its result
+per IP for the provider's own cache_ttl. With CACHE_BACKEND set, the
+provider cache is persisted / shared too, so neither a restart nor a second
+worker re-spends vendor quota. Underneath, CircuitBreakerProvider stops
+calling a vendor that keeps failing (or rejects the key), and
+RateLimitedProvider enforces per-vendor request rates and daily quotas.
+
+With GEO_DB_PATH set, geo / ISP data comes from the offline range database:
+GEO_DB_MODE=front (default) asks IPAPI only for IPs outside every range,
+GEO_DB_MODE=replace drops IPAPI altogether.
+
+With BLOCKLIST_PATHS set, IPs on a local blocklist feed are answered
+without calling AbuseIPDB (BLOCKLIST_MODE=front, default; abuse_score is
+set to BLOCKLIST_ABUSE_SCORE), or the membership is only added as extra
+fields (BLOCKLIST_MODE=separate).
 """
 
-PROVIDERS = [
-    AbuseIPDBProvider(),
-    IPQualityScoreProvider(),
-    IPAPIProvider(),
-    VirusTotalProvider(),
+# Shared store for per-provider results ("<provider>:<ip>" keys)
+PROVIDER_CACHE = CacheService(
+    ttl_seconds=3600,
+    max_entries=int(os.getenv("PROVIDER_CACHE_MAX_ENTRIES", 400_000)),
+    max_bytes=int(os.getenv("PROVIDER_CACHE_MAX_BYTES", 128 * 1024 * 1024)),
+    backing=backing_from_env("providers"),
+)
+
+# Daily call counters per vendor, persisted across restarts
+QUOTAS = QuotaStore(os.getenv("QUOTA_STATE_PATH", "data/quota_state.json"))
+
+# Vendor calls are rate limited and quota-accounted; cache hits are not
+RATE_LIMITERS = [
+    RateLimitedProvider(AbuseIPDBProvider(), QUOTAS),
+    RateLimitedProvider(IPQualityScoreProvider(), QUOTAS),
+    RateLimitedProvider(IPAPIProvider(), QUOTAS),
+    RateLimitedProvider(VirusTotalProvider(), QUOTAS),
 ]
+
+# A vendor that is down or rejects the key fails fast instead of timing out
+BREAKERS = [CircuitBreakerProvider(provider) for provider in RATE_LIMITERS]
+
+PROVIDERS = [CachedProvider(provider, PROVIDER_CACHE) for provider in BREAKERS]
+
+# Offline geo lookups in front of (or instead of) IPAPI
+GEO_DB = geo_db_from_env()
+GEO_PROVIDER = None
+
+if GEO_DB is not None:
+    ipapi_index = next(i for i, p in enumerate(PROVIDERS) if p.name == "IPAPI")
+    if os.getenv("GEO_DB_MODE", "front").lower() == "replace":
+        GEO_PROVIDER = LocalGeoProvider(GEO_DB)
+    else:
+        GEO_PROVIDER = LocalGeoProvider(GEO_DB, upstream=PROVIDERS[ipapi_index])
+    PROVIDERS[ipapi_index] = GEO_PROVIDER
+
+# Local blocklist feeds in front of AbuseIPDB (or as an extra provider)
+BLOCKLISTS = blocklist_store_from_env()
+BLOCKLIST_PROVIDER = None
+
+if BLOCKLISTS is not None:
+    if os.getenv("BLOCKLIST_MODE", "front").lower() == "separate":
+        BLOCKLIST_PROVIDER = BlocklistProvider(BLOCKLISTS)
+        PROVIDERS.append(BLOCKLIST_PROVIDER)
+    else:
+        abuse_index = next(i for i, p in enumerate(PROVIDERS) if p.name == "AbuseIPDB")
+        BLOCKLIST_PROVIDER = BlocklistProvider(
+            BLOCKLISTS,
+            upstream=PROVIDERS[abuse_index],
+            listed_result={"abuse_score": int(os.getenv("BLOCKLIST_ABUSE_SCORE", 100))},
+        )
+        PROVIDERS[abuse_index] = BLOCKLIST_PROVIDER
@@ -0,0 +1,272 @@
+# src/services/rate_limiter.py
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use, saves are not locked
+    fcntl = None
+
+log = logging.getLogger("rate_limiter")
+
+
+def _utc_day(now: Optional[float] = None) -> str:
+    return datetime.fromtimestamp(now if now is not None else time.time(), timezone.utc).strftime("%Y-%m-%d")
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, at most `capacity`
+    stored. Each call consumes one token.
+
+    try_acquire() never waits; reserve() books the next token up to
+    max_wait seconds ahead (tokens may go negative), so concurrent
+    callers are served in arrival order without polling.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        return self.reserve(0.0) == 0.0
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Takes one token. Returns how long the caller must wait before
+        using it (0 if available now), or None if that would exceed
+        max_wait; nothing is taken in that case.
+        """
+        self._refill()
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+    def drain(self, seconds: float = 0.0) -> None:
+        """
+        Empties the bucket and delays refill by `seconds`
+        (the vendor answered 429: back off instead of retrying at once).
+        """
+        self._refill()
+        self.tokens = -seconds * self.rate
+
+
+class QuotaStore:
+    """
+    Per-provider daily call counters (UTC days), persisted to a JSON file
+    so a restart does not forget calls already spent against a vendor's
+    daily quota, nor that the quota is exhausted.
+
+        {"IPQualityScore": {"day": "2024-05-01", "used": 4210, "exhausted": true}, ...}
+
+    record_call() / mark_exhausted() only update memory, so the request
+    path never touches the file. A background saver (start_saver /
+    stop_saver) writes every save_interval seconds in a worker thread, and
+    right away when a quota got exhausted; save() on shutdown writes the
+    final state.
+
+    Several uvicorn workers share the file, so a save never overwrites it
+    with this process's view: under an exclusive flock of "<path>.lock" it
+    re-reads the file, adds the calls recorded here since the last save,
+    ORs the exhausted flags and writes the result back. The merged state
+    then replaces the local one, so every worker also sees the calls the
+    others made (at most save_interval seconds late).
+    """
+
+    def __init__(self, path: Optional[str] = None, save_interval: float = 5.0, clock=time.time):
+        self.path = path
+        self.save_interval = save_interval
+        self.clock = clock
+        self.state: Dict[str, Dict] = {}
+        # provider → calls recorded since the last save (not yet on disk)
+        self._unsaved: Dict[str, int] = {}
+        self._dirty = False
+        # state / _unsaved are updated on the loop and saved from a thread
+        self._lock = threading.Lock()
+        self._saver: Optional[asyncio.Task] = None
+        self._save_now: Optional[asyncio.Event] = None
+        self._load()
+
+    def _read(self) -> Dict[str, Dict]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"[QUOTA] Cannot read {self.path}: {e!r}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {k: v for k, v in data.items() if isinstance(v, dict)}
+
+    def _load(self) -> None:
+        self.state = self._read()
+
+    def _today(self, provider: str) -> Dict:
+        day = _utc_day(self.clock())
+        entry = self.state.get(provider)
+        if entry is None or entry.get("day") != day:
+            entry = self.state[provider] = {"day": day, "used": 0, "exhausted": False}
+            # Calls left unsaved from the previous day no longer count
+            self._unsaved.pop(provider, None)
+        return entry
+
+    def used(self, provider: str) -> int:
+        with self._lock:
+            return self._today(provider)["used"]
+
+    def is_exhausted(self, provider: str, daily_limit: Optional[int] = None) -> bool:
+        with self._lock:
+            entry = self._today(provider)
+        if entry["exhausted"]:
+            return True
+        return daily_limit is not None and entry["used"] >= daily_limit
+
+    def record_call(self, provider: str) -> None:
+        with self._lock:
+            self._today(provider)["used"] += 1
+            self._unsaved[provider] = self._unsaved.get(provider, 0) + 1
+            self._dirty = True
+
+    def mark_exhausted(self, provider: str) -> None:
+        with self._lock:
+            entry = self._today(provider)
+            if entry["exhausted"]:
+                return
+            entry["exhausted"] = True
+            self._dirty = True
+        # Other workers should stop calling the vendor soon, not in save_interval
+        if self._save_now is not None:
+            self._save_now.set()
+
+    @staticmethod
+    def _merge(disk: Dict[str, Dict], local: Dict[str, Dict], unsaved: Dict[str, int]) -> Dict[str, Dict]:
+        """
+        On-disk state (written by any worker) + this process's unsaved calls.
+        The newer day wins; on the same day counts add up and flags OR.
+        """
+        merged = dict(disk)
+        for provider, entry in local.items():
+            stored = disk.get(provider)
+            if stored is None or str(stored.get("day", "")) < entry["day"]:
+                merged[provider] = dict(entry)
+            elif stored.get("day") == entry["day"]:
+                merged[provider] = {
+                    "day": entry["day"],
+                    "used": int(stored.get("used", 0)) + unsaved.get(provider, 0),
+                    "exhausted": bool(stored.get("exhausted")) or entry["exhausted"],
+                }
+        return merged
+
+    def _write(self, local: Dict[str, Dict], unsaved: Dict[str, int]) -> Dict[str, Dict]:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(f"{self.path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                merged = self._merge(self._read(), local, unsaved)
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(merged, f)
+                os.replace(tmp, self.path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        return merged
+
+    def save(self, force: bool = False) -> None:
+        """
+        Merges this process's counters into the file (blocking: file lock
+        and I/O). Called from the saver thread and on shutdown.
+        """
+        if not self.path:
+            return
+
+        with self._lock:
+            if not (self._dirty or force):
+                return
+            local = {provider: dict(entry) for provider, entry in self.state.items()}
+            unsaved, self._unsaved = self._unsaved, {}
+            self._dirty = False
+
+        try:
+            merged = self._write(local, unsaved)
+        except OSError as e:
+            log.warning(f"[QUOTA] Cannot write {self.path}: {e!r}")
+            with self._lock:
+                for provider, count in unsaved.items():
+                    self._unsaved[provider] = self._unsaved.get(provider, 0) + count
+                self._dirty = True
+            return
+
+        with self._lock:
+            # Calls / flags recorded while the file was written stay on top
+            for provider, entry in merged.items():
+                current = self.state.get(provider)
+                if current is None or current["day"] < entry["day"]:
+                    continue
+                if current["day"] > entry["day"]:
+                    merged[provider] = current
+                    continue
+                entry["used"] += self._unsaved.get(provider, 0)
+                entry["exhausted"] = entry["exhausted"] or current["exhausted"]
+            for provider, current in self.state.items():
+                merged.setdefault(provider, current)
+            self.state = merged
+
+    async def _save_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._save_now.wait(), self.save_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._save_now.clear()
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception as e:
+                log.warning(f"[QUOTA] Save failed: {e!r}")
+
+    def start_saver(self) -> None:
+        """
+        Starts the background saver on the running event loop.
+        """
+        if self._saver is None or self._saver.done():
+            self._save_now = asyncio.Event()
+            self._saver = asyncio.create_task(self._save_loop())
+
+    async def stop_saver(self) -> None:
+        if self._saver is None:
+            return
+
+        self._saver.cancel()
+        try:
+            await self._saver
+        except asyncio.CancelledError:
+            pass
+        self._saver = None
+        self._save_now = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {provider: dict(self._today(provider)) for provider in sorted(self.state)}
@@ -0,0 +1,300 @@
+# src/services/shared_cache.py
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so no shared table
+    fcntl = None
+
+log = logging.getLogger("shared_cache")
+
+MAGIC = b"IPTCACHE"
+FORMAT_VERSION = 1
+
+# File header: magic, format version, slot count, slot size
+_FILE_HEADER = struct.Struct("<8sIII")
+FILE_HEADER_SIZE = 64
+
+# Slot header: seq, state, key hash, ts, ttl, key length, value length
+_SLOT_HEADER = struct.Struct("<IB3xQddHI")
+SLOT_HEADER_SIZE = 40
+
+EMPTY, USED = 0, 1
+
+# Open addressing: a key lives in one of PROBE_LIMIT consecutive slots
+PROBE_LIMIT = 8
+
+# Readers retry this often when a slot is being rewritten concurrently
+READ_RETRIES = 4
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class SharedMemoryTable:
+    """
+    Fixed-size hash table in a memory-mapped file, shared by every
+    process (uvicorn worker) that maps the same path.
+
+    Layout: a 64-byte file header followed by `slots` slots of
+    `slot_size` bytes. Each slot holds one entry:
+        seq | state | key hash | ts | ttl | key len | value len | key | JSON value
+    Keys hash to a home slot and are probed linearly for PROBE_LIMIT slots.
+    When the window is full, the entry with the oldest timestamp is
+    replaced, so the table never grows and needs no compaction.
+
+    Concurrency:
+        - writers serialize on an exclusive flock of the file
+        - readers take no lock: each slot carries a sequence counter that
+          writers make odd while rewriting it (seqlock), and readers retry
+          if the counter changed while they copied the slot
+
+    Values larger than a slot are not stored (the caller still has its
+    in-process tier). Used as the backing tier of CacheService, with the
+    same put/get/load interface as DiskCache.
+    """
+
+    # Reads are a copy out of the mapped file: cheap enough for the event loop
+    blocking_reads = False
+
+    def __init__(self, path: str, slots: int = 65_536, slot_size: int = 2048):
+        if fcntl is None:
+            raise RuntimeError(
+                "CACHE_BACKEND=shared needs fcntl (POSIX); use CACHE_BACKEND=memory or disk on this platform"
+            )
+        if slot_size <= SLOT_HEADER_SIZE + 64:
+            raise ValueError(f"slot_size too small: {slot_size}")
+
+        self.path = path
+        self.grace = 0.0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            self.slots, self.slot_size = self._init_file(slots, slot_size)
+
+        self._map = mmap.mmap(self._fd, FILE_HEADER_SIZE + self.slots * self.slot_size)
+
+        self.reads = 0
+        self.read_hits = 0
+        self.writes = 0
+        self.replaced = 0
+        self.too_large = 0
+        self.read_conflicts = 0
+
+    def _init_file(self, slots: int, slot_size: int) -> Tuple[int, int]:
+        """
+        Creates the table on first use; later processes adopt the
+        geometry already on disk so all workers agree on it.
+        """
+        size = os.fstat(self._fd).st_size
+        if size >= FILE_HEADER_SIZE:
+            magic, version, existing_slots, existing_size = _FILE_HEADER.unpack(
+                os.pread(self._fd, _FILE_HEADER.size, 0)
+            )
+            if magic == MAGIC and version == FORMAT_VERSION:
+                return existing_slots, existing_size
+
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, FILE_HEADER_SIZE + slots * slot_size)
+        os.pwrite(self._fd, _FILE_HEADER.pack(MAGIC, FORMAT_VERSION, slots, slot_size), 0)
+        return slots, slot_size
+
+    @contextmanager
+    def _locked(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, index: int) -> int:
+        return FILE_HEADER_SIZE + (index % self.slots) * self.slot_size
+
+    # ------------------------------------------------------------
+    # Reads (lock-free)
+    # ------------------------------------------------------------
+    def _read_slot(self, offset: int, key: bytes, key_hash: int):
+        """
+        Returns ("empty", None), ("other", None) or ("match", (ts, ttl, raw)).
+        """
+        for _ in range(READ_RETRIES):
+            seq, state, h, ts, ttl, key_len, value_len = _SLOT_HEADER.unpack_from(self._map, offset)
+            if seq & 1:
+                self.read_conflicts += 1
+                continue
+            if state == EMPTY:
+                return "empty", None
+            if h != key_hash:
+                return "other", None
+
+            start = offset + SLOT_HEADER_SIZE
+            stored_key = self._map[start:start + key_len]
+            raw = self._map[start + key_len:start + key_len + value_len]
+
+            if _SLOT_HEADER.unpack_from(self._map, offset)[0] != seq:
+                self.read_conflicts += 1
+                continue
+            if stored_key != key:
+                return "other", None
+            return "match", (ts, ttl, raw)
+
+        return "other", None
+
+    def get(self, key: str) -> Optional[Tuple[float, float, Any]]:
+        """
+        Returns (ts, ttl, data) or None. Expiry is left to the caller.
+        """
+        self.reads += 1
+        encoded = key.encode()
+        key_hash = _key_hash(encoded)
+        home = key_hash % self.slots
+
+        for probe in range(PROBE_LIMIT):
+            status, found = self._read_slot(self._offset(home + probe), encoded, key_hash)
+            if status == "empty":
+                return None
+            if status == "match":
+                ts, ttl, raw = found
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    return None
+                self.read_hits += 1
+                return ts, ttl, data
+
+        return None
+
+    # ------------------------------------------------------------
+    # Writes (serialized across processes)
+    # ------------------------------------------------------------
+    def put(self, key: str, data: Any, ts: float, ttl: float) -> None:
+        encoded = key.encode()
+        try:
+            raw = json.dumps(data, ensure_ascii=False, default=str).encode()
+        except (TypeError, ValueError) as e:
+            log.warning(f"[SHARED CACHE] Cannot serialize {key}: {e!r}")
+            return
+
+        if SLOT_HEADER_SIZE + len(encoded) + len(raw) > self.slot_size:
+            self.too_large += 1
+            return
+
+        key_hash = _key_hash(encoded)
+        home = key_hash % self.slots
+
+        with self._locked():
+            target, oldest, oldest_ts = None, None, None
+            for probe in range(PROBE_LIMIT):
+                offset = self._offset(home + probe)
+                _, state, h, slot_ts, _, key_len, _ = _SLOT_HEADER.unpack_from(self._map, offset)
+
+                if state == EMPTY:
+                    target = offset
+                    break
+
+                start = offset + SLOT_HEADER_SIZE
+                if h == key_hash and self._map[start:start + key_len] == encoded:
+                    target = offset
+                    break
+
+                if oldest_ts is None or slot_ts < oldest_ts:
+                    oldest, oldest_ts = offset, slot_ts
+
+            if target is None:
+                target = oldest
+                self.replaced += 1
+
+            self._write_slot(target, encoded, raw, key_hash, ts, ttl)
+
+        self.writes += 1
+
+    def _write_slot(self, offset: int, key: bytes, raw: bytes, key_hash: int, ts: float, ttl: float) -> None:
+        seq = _SLOT_HEADER.unpack_from(self._map, offset)[0]
+
+        # Odd sequence: readers ignore the slot while it is rewritten
+        struct.pack_into("<I", self._map, offset, seq + 1)
+
+        start = offset + SLOT_HEADER_SIZE
+        self._map[start:start + len(key)] = key
+        self._map[start + len(key):start + len(key) + len(raw)] = raw
+        _SLOT_HEADER.pack_into(self._map, offset, seq + 1, USED, key_hash, ts, ttl, len(key), len(raw))
+
+        struct.pack_into("<I", self._map, offset, (seq + 2) & 0xFFFFFFFF)
+
+    # ------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------
+    def load(self, limit: int) -> Iterator[Tuple[str, float, float, Any]]:
+        """
+        Yields up to `limit` unexpired (key, ts, ttl, data) entries, oldest first.
+        """
+        now = time.time()
+        entries = []
+        for index in range(self.slots):
+            offset = self._offset(index)
+            seq, state, _, ts, ttl, key_len, value_len = _SLOT_HEADER.unpack_from(self._map, offset)
+            if state != USED or seq & 1 or now - ts > ttl + self.grace:
+                continue
+            start = offset + SLOT_HEADER_SIZE
+            entries.append((ts, ttl, self._map[start:start + key_len], self._map[start + key_len:start + key_len + value_len]))
+
+        entries.sort(key=lambda entry: entry[0])
+        for ts, ttl, key, raw in (entries[-limit:] if limit else []):
+            try:
+                yield key.decode(), ts, ttl, json.loads(raw)
+            except ValueError:
+                continue
+
+    def clear(self) -> None:
+        with self._locked():
+            self._map[FILE_HEADER_SIZE:] = bytes(self.slots * self.slot_size)
+
+    def close(self) -> None:
+        if self._map.closed:
+            return
+        self._map.close()
+        os.close(self._fd)
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "slots": self.slots,
+            "slot_size": self.slot_size,
+            "reads": self.reads,
+            "read_hits": self.read_hits,
+            "writes": self.writes,
+            "replaced": self.replaced,
+            "too_large": self.too_large,
+            "read_conflicts": self.read_conflicts,
+        }
+
+
+def shared_table_from_env(name: str) -> SharedMemoryTable:
+    """
+    Table `name` under CACHE_SHARED_DIR (default /dev/shm, i.e. RAM, or the
+    temp directory where there is no /dev/shm, e.g. macOS).
+    Every worker started with the same settings maps the same file.
+    """
+    directory = os.getenv("CACHE_SHARED_DIR") or (
+        "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    )
+    return SharedMemoryTable(
+        os.path.join(directory, f"ip-threat-intel-{name}.cache"),
+        slots=int(os.getenv("CACHE_SHARED_SLOTS", 65_536)),
+        slot_size=int(os.getenv("CACHE_SHARED_SLOT_BYTES", 2048)),
+    )
@@ -0,0 +1,72 @@
+# src/services/single_flight.py
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Request coalescing for concurrent work on the same key.
+
+    The first caller for a key starts the work as a background task;
+    every concurrent caller for the same key awaits that one task
+    instead of starting its own.
+
+    Semantics:
+        - result: every waiter receives the same result object
+          (callers must not mutate it in place)
+        - errors: an exception raised by the work propagates to all waiters
+        - cancellation: a cancelled waiter only stops waiting; the shared
+          work keeps running for the others and is cancelled only when
+          the last waiter is gone
+        - the key is released as soon as the work finishes, so the next
+          call after completion starts fresh work
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+
+        if flight is None:
+            task = asyncio.ensure_future(fn())
+            flight = _Flight(task)
+            self._flights[key] = flight
+            task.add_done_callback(lambda _t, k=key, f=flight: self._release(k, f))
+
+        flight.waiters += 1
+        try:
+            # shield(): cancelling this waiter must not cancel shared work
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.task.cancelled() or flight.waiters > 1:
+                raise
+
+            # Last waiter left before completion: nobody needs the result
+            flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _release(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+        # Mark the exception as retrieved when all waiters are gone
+        if not flight.task.cancelled():
+            flight.task.exception()
@@ -0,0 +1,86 @@
+# src/services/stream_service.py
+
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+# Max events buffered between producers and a (possibly slow) client.
+# When full, workers block on emit(), which stops new analyses from starting.
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 32))
+
+Emit = Callable[[Dict], Awaitable[None]]
+
+_DONE = object()
+
+
+async def stream_batch(
+    items: List[str],
+    worker: Callable[[str, Emit], Awaitable[None]],
+    concurrency: int,
+    queue_size: int = STREAM_QUEUE_SIZE,
+) -> AsyncIterator[Dict]:
+    """
+    Runs worker(item, emit) for all items (at most `concurrency` at once)
+    and yields every emitted event as soon as it is produced.
+
+    Backpressure: events go through a bounded queue. A slow consumer fills
+    the queue, emit() then blocks the workers, and because workers hold the
+    concurrency slot while blocked, no new items start. Memory stays bounded
+    by queue_size regardless of batch size or client speed.
+
+    If the consumer stops early (client disconnect), all workers are cancelled.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(item: str):
+        async with semaphore:
+            try:
+                await worker(item, queue.put)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await queue.put({"event": "error", "ip": item, "error": f"Analysis failed: {e!r}"})
+
+    async def run_all():
+        # run_one() turns failures into error events, so gather() only
+        # raises on cancellation (and then nobody waits for _DONE)
+        await asyncio.gather(*(run_one(item) for item in items))
+        await queue.put(_DONE)
+
+    producer = asyncio.create_task(run_all())
+    try:
+        while True:
+            event = await queue.get()
+            if event is _DONE:
+                break
+            yield event
+
+        yield {"event": "done", "count": len(items)}
+    finally:
+        if not producer.done():
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+
+
+def encode_event(event: Dict, fmt: str = "ndjson") -> str:
+    """
+    Serializes one event as an NDJSON line or a Server-Sent Event.
+    """
+    payload = json.dumps(event, ensure_ascii=False, default=str)
+    if fmt == "sse":
+        return f"event: {event.get('event', 'message')}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+
+async def encode_stream(events: AsyncIterator[Dict], fmt: str = "ndjson") -> AsyncIterator[str]:
+    async for event in events:
+        yield encode_event(event, fmt)
+
+
+def media_type_for(fmt: str) -> str:
+    return "text/event-stream" if fmt == "sse" else "application/x-ndjson"
@@ -0,0 +1,162 @@
+# src/validators/ip_classifier.py
+
+import ipaddress
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+"""
+Address classification in front of the provider fan-out.
+
+Private, loopback, link-local, multicast, reserved, CGNAT and bogon
+addresses have no public reputation by definition: vendors return nothing
+useful for them and the LLM would only restate that. The classifier
+recognises them so the API can answer with a precomputed verdict instead
+of spending provider calls and an LLM call.
+"""
+
+# category → prefixes (checked in this order, first match wins)
+CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    "loopback": ("127.0.0.0/8", "::1/128"),
+    "private": ("10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16", "fc00::/7"),
+    "link_local": ("169.254.0.0/16", "fe80::/10"),
+    "cgnat": ("100.64.0.0/10",),
+    "multicast": ("224.0.0.0/4", "ff00::/8"),
+    "reserved": ("240.0.0.0/4", "192.0.0.0/24", "::/128"),
+    # Never routable on the internet: "this network", documentation,
+    # benchmarking and discard-only prefixes
+    "bogon": (
+        "0.0.0.0/8", "192.0.2.0/24", "198.51.100.0/24", "203.0.113.0/24",
+        "198.18.0.0/15", "2001:db8::/32", "100::/64",
+    ),
+}
+
+# Verdict per category: (risk_level, analysis, recommendations)
+VERDICTS: Dict[str, Tuple[str, str, str]] = {
+    "loopback": (
+        "Low",
+        "Loopback address: traffic never left the host, so there is no external reputation to check.",
+        "No action required; investigate the local process if the activity is unexpected.",
+    ),
+    "private": (
+        "Low",
+        "Private (RFC 1918 / unique-local) address: it is not routable on the internet, "
+        "so threat-intel sources have no reputation data for it.",
+        "Assess with internal telemetry (DHCP, EDR, firewall logs) instead of external reputation.",
+    ),
+    "link_local": (
+        "Low",
+        "Link-local address: only valid on the local network segment; no external reputation exists.",
+        "Check the local segment for misconfigured hosts if the traffic is unexpected.",
+    ),
+    "cgnat": (
+        "Low",
+        "Carrier-grade NAT (RFC 6598) address: shared inside a provider network, "
+        "not visible on the internet.",
+        "Correlate with the provider's public egress address to assess reputation.",
+    ),
+    "multicast": (
+        "Low",
+        "Multicast address: it identifies a group, not a host, and cannot be a traffic source.",
+        "If seen as a source address, treat the packet as malformed and drop it.",
+    ),
+    "reserved": (
+        "Medium",
+        "Reserved / unspecified address: it should never appear in real traffic.",
+        "Drop traffic claiming this source and check for spoofing or misconfiguration.",
+    ),
+    "bogon": (
+        "Medium",
+        "Bogon address (documentation, benchmarking or 'this network' range): "
+        "not routable on the internet, so traffic from it is spoofed or misconfigured.",
+        "Drop bogon-sourced traffic at the network edge and review the sending system.",
+    ),
+}
+
+
+def _env_categories() -> Tuple[str, ...]:
+    value = os.getenv("IP_CLASSIFY_CATEGORIES")
+    if value is None:
+        return tuple(CATEGORIES)
+    return tuple(c.strip() for c in value.split(",") if c.strip() in CATEGORIES)
+
+
+class IPClassifier:
+    """
+    Maps an IP to one of CATEGORIES (or None for public addresses).
+
+    Enabled categories and extra bogon prefixes are configurable:
+        IP_CLASSIFY_CATEGORIES     (default: all; "" disables short-circuiting)
+        IP_CLASSIFY_EXTRA_BOGONS   (comma-separated CIDRs, e.g. your own ranges)
+
+    Counters record how many analyses were short-circuited per category and
+    how many provider / LLM calls that saved.
+    """
+
+    def __init__(
+        self,
+        categories: Optional[Iterable[str]] = None,
+        extra_bogons: Optional[Iterable[str]] = None,
+    ):
+        self.categories = tuple(categories) if categories is not None else _env_categories()
+
+        if extra_bogons is None:
+            extra_bogons = [p for p in os.getenv("IP_CLASSIFY_EXTRA_BOGONS", "").split(",") if p.strip()]
+
+        self.networks: List[Tuple[str, object]] = []
+        for category in CATEGORIES:
+            if category not in self.categories:
+                continue
+            prefixes = CATEGORIES[category]
+            if category == "bogon":
+                prefixes = prefixes + tuple(p.strip() for p in extra_bogons)
+            self.networks.extend(
+                (category, ipaddress.ip_network(prefix, strict=False)) for prefix in prefixes
+            )
+
+        self.counters: Dict[str, int] = {category: 0 for category in self.categories}
+        self.provider_calls_saved = 0
+        self.llm_calls_saved = 0
+
+    def classify(self, ip: str) -> Optional[str]:
+        """
+        Category of `ip`, or None if it is public (or not an IP).
+        IPv4-mapped IPv6 addresses are classified as their IPv4 address.
+        """
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+
+        for category, network in self.networks:
+            if address.version == network.version and address in network:
+                return category
+        return None
+
+    def verdict(self, ip: str, category: str, provider_calls: int = 0) -> Dict:
+        """
+        Verdict fields for a classified IP; counts the external calls saved.
+        """
+        self.counters[category] += 1
+        self.provider_calls_saved += provider_calls
+        self.llm_calls_saved += 1
+
+        risk_level, analysis, recommendations = VERDICTS[category]
+        return {
+            "ip": ip,
+            "address_class": category,
+            "risk_level": risk_level,
+            "risk_analysis": f"Rule-based verdict: {analysis}",
+            "recommendations": recommendations,
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "categories": dict(self.counters),
+            "short_circuited": sum(self.counters.values()),
+            "provider_calls_saved": self.provider_calls_saved,
+            # Upper bound: some of these would have been decided by LLMGate
+            "llm_calls_saved": self.llm_calls_saved,
+        }
@@ -12,9 +12,29 @@ class IPValidator:
 
     @staticmethod
     def validate(ip: str) -> str:
+        """
+        Returns the canonical form of the address, used as the key
+        everywhere (caches, single-flight, logs):
+            IPv6 compressed and lower-case   2001:0DB8:0:0::1 → 2001:db8::1
+            IPv4-mapped IPv6 unwrapped       ::ffff:1.2.3.4   → 1.2.3.4
+        """
         try:
-            ipaddress.ip_address(ip)
+            address = ipaddress.ip_address(ip)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid IP address format")
 
-        return ip
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+
+        return str(address)
+
+    @staticmethod
+    def prefix_key(ip: str, ipv6_prefix: int) -> str:
+        """
+        Cache key for vendors that answer per prefix: IPv6 addresses map to
+        their /ipv6_prefix network (e.g. 2001:db8::/64), IPv4 stays as-is.
+        """
+        address = ipaddress.ip_address(ip)
+        if address.version != 6 or address.ipv4_mapped is not None:
+            return ip
+        return str(ipaddress.IPv6Network((address, ipv6_prefix), strict=False))
@@ -5,6 +5,9 @@ import pytest
 ROOT = os.path.dirname(os.path.dirname(__file__))
 sys.path.insert(0, ROOT)
 
+# Do not persist vendor quota counters from test runs
+os.environ.setdefault("QUOTA_STATE_PATH", "")
+
 @pytest.fixture(scope="session")
 def anyio_backend():
     return "asyncio"
@@ -88,4 +88,69 @@ async def test_aggregator_v2_provider_error(monkeypatch):
     assert result["fail_value"] is None
 
 
+class DummyProviderSlow:
+    """
+    Provider that answers only after a delay.
+    Used to test deadlines and per-provider budgets.
+    """
+    def __init__(self, delay, budget=None):
+        self.delay = delay
+        self.budget = budget
+        self.finished = asyncio.Event()
+
+    @property
+    def name(self):
+        return "DummySlow"
+
+    @property
+    def fields(self):
+        return ("slow_value",)
+
+    @property
+    def timeout_budget(self):
+        return self.budget
+
+    async def fetch(self, ip: str):
+        await asyncio.sleep(self.delay)
+        self.finished.set()
+        return {"slow_value": 7}
+
+
+@pytest.mark.anyio
+async def test_aggregator_v2_deadline_returns_partial_result(monkeypatch):
+    """
+    When the deadline hits, fields that arrived are returned, the slow
+    provider is reported as timed out, and its fetch still completes.
+    """
+
+    slow = DummyProviderSlow(delay=0.2)
+    monkeypatch.setattr(
+        "src.services.aggregator_v2.PROVIDERS",
+        [DummyProviderOK(), slow]
+    )
+
+    result = await aggregate_ip_data_v2("1.2.3.4", deadline=0.05)
+
+    assert result["dummy_value"] == 123
+    assert result["slow_value"] is None
+    assert result["timed_out_providers"] == ["DummySlow"]
+
+    # Late result is not cancelled (it can still fill the provider cache)
+    await asyncio.wait_for(slow.finished.wait(), 1)
+
+
+@pytest.mark.anyio
+async def test_aggregator_v2_provider_budget(monkeypatch):
+    """
+    A provider's own timeout_budget applies even under a generous deadline.
+    """
 
+    monkeypatch.setattr(
+        "src.services.aggregator_v2.PROVIDERS",
+        [DummyProviderOK(), DummyProviderSlow(delay=0.2, budget=0.02)]
+    )
+
+    result = await aggregate_ip_data_v2("1.2.3.4", deadline=5)
+
+    assert result["timed_out_providers"] == ["DummySlow"]
+    assert result["dummy_value"] == 123
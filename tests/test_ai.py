@@ -189,3 +189,175 @@ def test_analyze_with_llm_fallback_no_key(monkeypatch):
 
     result = llm.analyze_with_llm({"ip": "1.1.1.1"})
     assert result["risk_level"] == "Unknown"
+
+
+# ------------------------------------------------------------
+# 6. async path (мокаем async_client.chat.completions.create)
+# ------------------------------------------------------------
+def make_async_client(contents, seen=None):
+    class MockMessage:
+        def __init__(self, c):
+            self.content = c
+
+    class MockChoice:
+        def __init__(self, c):
+            self.message = MockMessage(c)
+
+    class MockResponse:
+        def __init__(self, c):
+            self.choices = [MockChoice(c)]
+
+    class MockCompletions:
+        async def create(self, *a, **k):
+            if seen is not None:
+                seen.append(k["messages"][-1]["content"])
+            return MockResponse(contents.pop(0))
+
+    class MockChat:
+        def __init__(self):
+            self.completions = MockCompletions()
+
+    class MockClient:
+        def __init__(self):
+            self.chat = MockChat()
+
+    return MockClient()
+
+
+@pytest.mark.anyio
+async def test_analyze_with_llm_async_success(monkeypatch):
+    monkeypatch.setattr(llm, "GROQ_API_KEY", "TESTKEY")
+    payload = {"risk_level": "Low", "analysis": "A", "recommendations": "R"}
+    monkeypatch.setattr(llm, "async_client", make_async_client([json.dumps(payload)]))
+
+    result = await llm.analyze_with_llm_async({"ip": "8.8.8.8"})
+    assert result == payload
+
+
+@pytest.mark.anyio
+async def test_analyze_with_llm_async_repair(monkeypatch):
+    monkeypatch.setattr(llm, "GROQ_API_KEY", "TESTKEY")
+    seen = []
+    monkeypatch.setattr(
+        llm, "async_client", make_async_client(["not json at all", '{"a": 1}'], seen)
+    )
+
+    result = await llm.analyze_with_llm_async({"ip": "8.8.8.8"})
+    assert result["risk_level"] == "Unknown"
+    assert set(result) == {"risk_level", "analysis", "recommendations"}
+    assert len(seen) == 2
+
+
+@pytest.mark.anyio
+async def test_analyze_with_llm_async_local_repair(monkeypatch):
+    monkeypatch.setattr(llm, "GROQ_API_KEY", "TESTKEY")
+    seen = []
+    broken = "Here you go:\n```json\n{'risk_level': 'high', 'analysis': 'line1\nline2',}\n```"
+    monkeypatch.setattr(llm, "async_client", make_async_client([broken], seen))
+
+    result = await llm.analyze_with_llm_async({"ip": "8.8.8.8"})
+
+    # Repaired locally: no second round-trip
+    assert len(seen) == 1
+    assert result["risk_level"] == "High"
+    assert result["analysis"] == "line1\nline2"
+    assert result["recommendations"] == llm.FALLBACK["recommendations"]
+
+
+@pytest.mark.anyio
+async def test_call_llm_async_respects_semaphore(monkeypatch):
+    import asyncio
+
+    running = 0
+    peak = 0
+
+    class SlowCompletions:
+        async def create(self, *a, **k):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            raise RuntimeError("fail")
+
+    class SlowClient:
+        def __init__(self):
+            self.chat = type("Chat", (), {"completions": SlowCompletions()})()
+
+    monkeypatch.setattr(llm, "async_client", SlowClient())
+    monkeypatch.setattr(llm, "llm_semaphore", asyncio.Semaphore(2))
+
+    results = await asyncio.gather(*(llm.call_llm_async("p") for _ in range(6)))
+
+    assert results == [None] * 6
+    assert peak == 2
+
+
+# ------------------------------------------------------------
+# 7. multi-IP batching
+# ------------------------------------------------------------
+def test_generate_batch_prompt_format():
+    prompt = llm.generate_batch_prompt({"item-0": {"abuse_score": 1}})
+    assert "valid JSON array" in prompt
+    assert '"id": "item-0"' in prompt
+
+
+def test_parse_batch_response_validates_each_item():
+    text = json.dumps([
+        {"id": "item-0", "risk_level": "Low", "analysis": "A", "recommendations": "R"},
+        {"id": "item-1", "risk_level": "High"},                 # incomplete
+        {"id": "item-9", "risk_level": "Low", "analysis": "A", "recommendations": "R"},  # unknown
+    ])
+    parsed = llm.parse_batch_response("noise " + text + " noise", ["item-0", "item-1"])
+    assert list(parsed) == ["item-0"]
+    assert parsed["item-0"]["risk_level"] == "Low"
+
+
+def test_parse_batch_response_coerces_out_of_range_risk_level():
+    text = json.dumps([
+        {"id": "item-0", "risk_level": "catastrophic", "analysis": "A", "recommendations": "R"},
+        {"id": "item-1", "risk_level": "critical", "analysis": "B", "recommendations": "S"},
+    ])
+    parsed = llm.parse_batch_response(text, ["item-0", "item-1"])
+
+    assert parsed["item-0"]["risk_level"] == "Unknown"
+    assert parsed["item-1"] == {"risk_level": "High", "analysis": "B", "recommendations": "S"}
+
+
+@pytest.mark.anyio
+async def test_batcher_sends_one_prompt_and_falls_back_per_item(monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(llm, "GROQ_API_KEY", "TESTKEY")
+    prompts = []
+
+    async def fake_call(prompt):
+        prompts.append(prompt)
+        # Valid verdict for the first item only
+        return json.dumps([
+            {"id": "item-0", "risk_level": "Low", "analysis": "A", "recommendations": "R"},
+        ])
+
+    singles = []
+
+    async def fake_single(data):
+        singles.append(data)
+        return {"risk_level": "Medium", "analysis": "S", "recommendations": "S"}
+
+    monkeypatch.setattr(llm, "call_llm_async", fake_call)
+    monkeypatch.setattr(llm, "analyze_with_llm_async", fake_single)
+
+    batcher = llm.LLMBatcher(window_ms=10, max_items=10)
+    a, b, c = await asyncio.gather(
+        batcher.submit("1.1.1.1", {"abuse_score": 1}),
+        batcher.submit("2.2.2.2", {"abuse_score": 2}),
+        batcher.submit("2.2.2.2", {"abuse_score": 2}),
+    )
+
+    assert len(prompts) == 1
+    # Items are identified by opaque ids; the addresses never reach the model
+    assert "1.1.1.1" not in prompts[0] and "2.2.2.2" not in prompts[0]
+    assert a["risk_level"] == "Low"
+    assert b["risk_level"] == "Medium" and c is b
+    assert singles == [{"abuse_score": 2}]
+    assert batcher.stats() == {"batches_sent": 1, "items_batched": 2, "item_fallbacks": 1}
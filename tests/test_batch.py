@@ -0,0 +1,109 @@
+# tests/test_batch.py
+
+import asyncio
+import json
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.services.batch_service import parse_ip_batch, run_bounded
+from src.services.cache_service import CacheService
+
+
+# ------------------------------------------------------------
+# Body parsing
+# ------------------------------------------------------------
+
+def test_parse_json_list_and_object():
+    assert parse_ip_batch(b'["1.1.1.1", "8.8.8.8"]') == ["1.1.1.1", "8.8.8.8"]
+    assert parse_ip_batch(b'{"ips": ["1.1.1.1"]}', "application/json") == ["1.1.1.1"]
+
+
+def test_parse_ndjson():
+    body = b'"1.1.1.1"\n{"ip": "8.8.8.8"}\n\n9.9.9.9\n'
+    assert parse_ip_batch(body, "application/x-ndjson") == [
+        "1.1.1.1", "8.8.8.8", "9.9.9.9"
+    ]
+
+
+def test_parse_rejects_malformed():
+    with pytest.raises(HTTPException) as e:
+        parse_ip_batch(b'{"nope": 1}')
+    assert e.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_run_bounded_limits_concurrency():
+    running = 0
+    peak = 0
+
+    async def worker(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"ip": item}
+
+    results = await run_bounded([str(i) for i in range(10)], worker, concurrency=3)
+
+    assert peak == 3
+    assert results["7"] == {"ip": "7"}
+
+
+# ------------------------------------------------------------
+# Endpoint
+# ------------------------------------------------------------
+
+def test_analyze_ips_endpoint(monkeypatch):
+    cache = CacheService(ttl_seconds=60)
+    cache.set("1.1.1.1", {"ip": "1.1.1.1", "risk_level": "Low", "cached": True})
+    monkeypatch.setattr(main, "cache", cache)
+
+    analyzed = []
+
+    async def fake_analyze(ip):
+        analyzed.append(ip)
+        return {"ip": ip, "risk_level": "Medium"}
+
+    monkeypatch.setattr(main, "analyze_uncached", fake_analyze)
+
+    client = TestClient(main.app)
+    r = client.post(
+        "/api/analyze-ips",
+        content=json.dumps(["8.8.8.8", "1.1.1.1", "bad-ip", "8.8.8.8"]),
+        headers={"content-type": "application/json"},
+    )
+
+    assert r.status_code == 200
+    results = r.json()["results"]
+
+    # Input order, duplicates analyzed once, cache hit not re-analyzed
+    assert [item["ip"] for item in results] == ["8.8.8.8", "1.1.1.1", "bad-ip", "8.8.8.8"]
+    assert analyzed == ["8.8.8.8"]
+    assert results[1]["cached"] is True
+    assert "error" in results[2]
+
+
+def test_analyze_ips_dedupes_equivalent_spellings(monkeypatch):
+    monkeypatch.setattr(main, "cache", CacheService(ttl_seconds=60))
+
+    analyzed = []
+
+    async def fake_analyze(ip):
+        analyzed.append(ip)
+        return {"ip": ip, "risk_level": "Medium"}
+
+    monkeypatch.setattr(main, "analyze_uncached", fake_analyze)
+
+    client = TestClient(main.app)
+    r = client.post(
+        "/api/analyze-ips",
+        content=json.dumps(["2606:4700:0:0::1111", "2606:4700::1111", "::ffff:8.8.8.8", "8.8.8.8"]),
+        headers={"content-type": "application/json"},
+    )
+
+    results = r.json()["results"]
+    assert analyzed == ["2606:4700::1111", "8.8.8.8"]
+    assert [item["ip"] for item in results] == ["2606:4700::1111"] * 2 + ["8.8.8.8"] * 2
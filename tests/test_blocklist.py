@@ -0,0 +1,130 @@
+# tests/test_blocklist.py
+
+import os
+
+import httpx
+import pytest
+
+import src.main as main
+from src.services.blocklist import BlocklistIndex, BlocklistStore, read_feed
+from src.services.providers.base_provider import ThreatIntelProvider
+from src.services.providers.blocklist_provider import BlocklistProvider
+
+
+class CountingAbuse(ThreatIntelProvider):
+    def __init__(self):
+        self.calls = 0
+
+    @property
+    def name(self):
+        return "AbuseIPDB"
+
+    @property
+    def fields(self):
+        return ("abuse_score", "recent_reports")
+
+    async def fetch(self, ip):
+        self.calls += 1
+        return {"abuse_score": 3, "recent_reports": 1}
+
+
+@pytest.fixture
+def feeds(tmp_path):
+    (tmp_path / "drop.netset").write_text(
+        "# Spamhaus DROP\n"
+        "1.10.16.0/20 ; SBL256894\n"
+        "2001:db8::/32\n"
+        "not an ip\n"
+    )
+    (tmp_path / "scanners.txt").write_text(
+        "1.10.16.5\n"
+        "5.5.5.1-5.5.5.9\n"
+        "::ffff:9.9.9.9\n"
+    )
+    return tmp_path
+
+
+def test_feed_parsing_and_overlapping_lists(feeds):
+    entries, skipped = read_feed(str(feeds / "drop.netset"))
+    assert len(entries) == 2 and skipped == 1
+
+    store = BlocklistStore([str(feeds)])
+
+    assert store.lookup("1.10.16.5") == ("drop", "scanners")
+    assert store.lookup("1.10.16.4") == ("drop",)
+    assert store.lookup("1.10.31.255") == ("drop",)
+    assert store.lookup("1.10.32.0") == ()
+    assert store.lookup("5.5.5.9") == ("scanners",)
+    assert store.lookup("2001:db8:1::1") == ("drop",)
+    assert store.lookup("9.9.9.9") == ("scanners",)
+    assert store.lookup("::ffff:1.10.16.1") == ("drop",)
+    assert store.lookup("bogus") == ()
+
+    # drop range split around the shared address; adjacent runs merged
+    assert store.stats()["v4_intervals"] == 5
+
+
+def test_match_many_keeps_input_order():
+    index = BlocklistIndex.from_entries({"a": [(4, 10, 20)], "b": [(4, 15, 30)]})
+    ips = ["0.0.0.9", "0.0.0.10", "0.0.0.16", "0.0.0.30", "0.0.0.31"]
+
+    assert index.match_many(ips) == [(), ("a",), ("a", "b"), ("b",), ()]
+
+
+def test_hot_reload_on_file_change(feeds):
+    store = BlocklistStore([str(feeds)])
+    assert not store.reload_if_changed()
+
+    path = feeds / "scanners.txt"
+    path.write_text("7.7.7.7\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert store.reload_if_changed()
+    assert store.lookup("7.7.7.7") == ("scanners",)
+    assert store.lookup("5.5.5.5") == ()
+
+
+@pytest.mark.anyio
+async def test_provider_answers_listed_ips_without_vendor(feeds):
+    abuse = CountingAbuse()
+    provider = BlocklistProvider(BlocklistStore([str(feeds)]), upstream=abuse,
+                                 listed_result={"abuse_score": 100})
+
+    assert await provider.fetch("1.10.16.1") == {
+        "abuse_score": 100, "recent_reports": None, "blocklisted": True, "blocklists": ["drop"],
+    }
+    assert abuse.calls == 0
+
+    assert await provider.fetch("8.8.8.8") == {
+        "abuse_score": 3, "recent_reports": 1, "blocklisted": False, "blocklists": [],
+    }
+    assert abuse.calls == 1
+    assert provider.stats()["upstream_skipped"] == 1
+
+
+@pytest.mark.anyio
+async def test_bulk_check_endpoint(feeds, monkeypatch):
+    monkeypatch.setattr(main, "BLOCKLISTS", BlocklistStore([str(feeds)]))
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        text = await client.post("/api/blocklist/check", content="8.8.8.8\n5.5.5.5\n",
+                                 headers={"content-type": "text/plain"})
+        as_json = await client.post("/api/blocklist/check", json={"ips": ["1.10.16.5"]})
+
+    assert text.json() == {"count": 2, "listed": [{"ip": "5.5.5.5", "lists": ["scanners"]}]}
+    assert as_json.json()["listed"][0]["lists"] == ["drop", "scanners"]
+
+
+@pytest.mark.anyio
+async def test_bulk_check_rejects_oversized_bodies(feeds, monkeypatch):
+    monkeypatch.setattr(main, "BLOCKLISTS", BlocklistStore([str(feeds)]))
+    monkeypatch.setattr(main, "BLOCKLIST_CHECK_MAX_IPS", 2)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/blocklist/check", content="1.1.1.1\n2.2.2.2\n3.3.3.3\n",
+                                     headers={"content-type": "text/plain"})
+
+    assert response.status_code == 413
@@ -0,0 +1,110 @@
+# tests/test_cache_service.py
+
+import asyncio
+import pytest
+
+from src.services import cache_service
+from src.services.cache_service import CacheService
+
+
+def test_get_set_roundtrip():
+    cache = CacheService(ttl_seconds=60)
+    cache.set("8.8.8.8", {"ip": "8.8.8.8"})
+
+    assert cache.get("8.8.8.8") == {"ip": "8.8.8.8"}
+    assert cache.get("1.1.1.1") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_lru_eviction_by_entries():
+    cache = CacheService(ttl_seconds=60, max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+
+    # Touch "a" so "b" becomes least recently used
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.get("c") == {"v": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_eviction_by_bytes():
+    cache = CacheService(ttl_seconds=60, max_bytes=30)
+    cache.set("a", {"v": "x" * 10})
+    cache.set("b", {"v": "y" * 10})
+
+    assert len(cache) == 1
+    assert cache.get("b") is not None
+    assert cache.total_bytes <= 30
+
+    # Oversized values are never stored
+    cache.set("big", {"v": "z" * 100})
+    assert cache.get("big") is None
+
+
+def test_expired_entry_is_miss(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "time", lambda: now[0])
+
+    cache = CacheService(ttl_seconds=10)
+    cache.set("a", {"v": 1})
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sweep_removes_expired(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "time", lambda: now[0])
+
+    cache = CacheService(ttl_seconds=10)
+    cache.set("old", {"v": 1})
+    now[0] += 5
+    cache.set("new", {"v": 2})
+    now[0] += 6
+
+    assert cache.sweep() == 1
+    assert list(cache.store) == ["new"]
+
+
+@pytest.mark.anyio
+async def test_background_sweeper(monkeypatch):
+    cache = CacheService(ttl_seconds=0)
+    cache.set("a", {"v": 1})
+    monkeypatch.setattr(cache_service.time, "time", lambda: 10 ** 10)
+
+    cache.start_sweeper(interval=0.01)
+    await asyncio.sleep(0.05)
+    await cache.stop_sweeper()
+
+    assert len(cache) == 0
+
+
+def test_stale_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "time", lambda: now[0])
+
+    cache = CacheService(ttl_seconds=10, stale_ttl_seconds=20)
+    cache.set("a", {"v": 1})
+
+    assert cache.get_with_state("a") == ({"v": 1}, "fresh")
+
+    # Past soft TTL: plain get() misses, get_with_state() serves stale
+    now[0] += 15
+    assert cache.get("a") is None
+    assert cache.get_with_state("a") == ({"v": 1}, "stale")
+    assert cache.sweep() == 0
+
+    # Past hard TTL: gone
+    now[0] += 20
+    assert cache.get_with_state("a") == (None, None)
+    assert len(cache) == 0
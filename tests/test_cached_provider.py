@@ -0,0 +1,123 @@
+# tests/test_cached_provider.py
+
+import pytest
+
+from src.services import cache_service
+from src.services.cache_service import CacheService
+from src.services.providers.base_provider import ThreatIntelProvider
+from src.services.providers.cached_provider import CachedProvider
+
+
+class CountingProvider(ThreatIntelProvider):
+    """
+    Provider returning a fixed result and counting upstream calls.
+    """
+    def __init__(self, name, ttl, result):
+        self._name = name
+        self._ttl = ttl
+        self.result = result
+        self.calls = 0
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def fields(self):
+        return tuple(self.result)
+
+    @property
+    def cache_ttl(self):
+        return self._ttl
+
+    async def fetch(self, ip):
+        self.calls += 1
+        return dict(self.result)
+
+
+@pytest.mark.anyio
+async def test_second_fetch_is_served_from_cache():
+    inner = CountingProvider("Dummy", 60, {"score": 5})
+    provider = CachedProvider(inner, CacheService(ttl_seconds=1))
+
+    assert await provider.fetch("1.2.3.4") == {"score": 5}
+    assert await provider.fetch("1.2.3.4") == {"score": 5}
+    assert inner.calls == 1
+
+    # Different IP is a different key
+    await provider.fetch("5.6.7.8")
+    assert inner.calls == 2
+
+
+@pytest.mark.anyio
+async def test_fallback_results_are_not_cached():
+    inner = CountingProvider("Dummy", 60, {"score": None})
+    provider = CachedProvider(inner, CacheService())
+
+    await provider.fetch("1.2.3.4")
+    await provider.fetch("1.2.3.4")
+    assert inner.calls == 2
+
+
+@pytest.mark.anyio
+async def test_only_stale_providers_are_refetched(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "time", lambda: now[0])
+
+    shared = CacheService()
+    short = CountingProvider("Short", 10, {"a": 1})
+    long = CountingProvider("Long", 100, {"b": 2})
+    providers = [CachedProvider(short, shared), CachedProvider(long, shared)]
+
+    for p in providers:
+        await p.fetch("1.2.3.4")
+
+    now[0] += 50
+    for p in providers:
+        await p.fetch("1.2.3.4")
+
+    assert short.calls == 2
+    assert long.calls == 1
+
+
+def test_wrapper_forwards_identity_and_client_binding():
+    inner = CountingProvider("Dummy", 60, {"score": 5})
+    provider = CachedProvider(inner, CacheService())
+
+    assert provider.name == "Dummy"
+    assert provider.fields == ("score",)
+    assert provider.cache_ttl == 60
+
+    sentinel = object()
+    provider.bind_http_client(sentinel)
+    assert inner.http_client is sentinel
+    assert provider.http_client is sentinel
+
+
+@pytest.mark.anyio
+async def test_ipv6_prefix_keys_share_one_entry():
+    class PerPrefix(CountingProvider):
+        @property
+        def cache_ipv6_prefix(self):
+            return 64
+
+    inner = PerPrefix("Geo", 60, {"country": "DE"})
+    provider = CachedProvider(inner, CacheService())
+
+    assert provider.cache_key("2001:db8:1:2::1") == "Geo:2001:db8:1:2::/64"
+    assert provider.cache_key("1.2.3.4") == "Geo:1.2.3.4"
+
+    await provider.fetch("2001:db8:1:2::1")
+    await provider.fetch("2001:db8:1:2:ffff::9")
+    assert inner.calls == 1
+
+    await provider.fetch("2001:db8:1:3::1")
+    assert inner.calls == 2
+
+
+def test_ipapi_is_cached_per_address():
+    # hostname is reverse DNS of the single address, so no prefix sharing
+    from src.services.providers.ipapi_provider import IPAPIProvider
+
+    provider = CachedProvider(IPAPIProvider(), CacheService())
+    assert provider.cache_key("2001:db8:1:2::1") == "IPAPI:2001:db8:1:2::1"
@@ -0,0 +1,146 @@
+# tests/test_circuit_breaker.py
+
+import httpx
+import pytest
+
+import src.main as main
+from src.external.outcome import report_error
+from src.services.providers.base_provider import ThreatIntelProvider
+from src.services.providers.circuit_breaker_provider import CircuitBreakerProvider
+from src.services.providers.rate_limited_provider import RateLimitedProvider
+from src.services.rate_limiter import QuotaStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyVendor(ThreatIntelProvider):
+    """
+    Reports `error` (an outcome kind) on every call while it is set.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    @property
+    def name(self):
+        return "Flaky"
+
+    @property
+    def fields(self):
+        return ("score",)
+
+    async def fetch(self, ip):
+        self.calls += 1
+        if self.error == "raise":
+            raise RuntimeError("boom")
+        if self.error:
+            report_error(self.error)
+            return {"score": None}
+        return {"score": 7}
+
+
+def make_breaker(vendor, clock):
+    return CircuitBreakerProvider(
+        vendor, failure_threshold=3, open_seconds=10, max_open_seconds=25,
+        auth_open_seconds=100, half_open_trials=1, clock=clock,
+    )
+
+
+@pytest.mark.anyio
+async def test_opens_after_consecutive_failures_and_fails_fast():
+    vendor, clock = FlakyVendor(), FakeClock()
+    breaker = make_breaker(vendor, clock)
+
+    vendor.error = "network"
+    for _ in range(3):
+        assert await breaker.fetch("1.2.3.4") == {"score": None}
+    assert breaker.status()["state"] == "open"
+
+    assert await breaker.fetch("1.2.3.4") == {"score": None}
+    assert vendor.calls == 3
+    assert breaker.status()["short_circuited"] == 1
+    assert breaker.status()["retry_in"] == 10
+
+
+@pytest.mark.anyio
+async def test_success_resets_failure_count_and_neutral_kinds_are_ignored():
+    vendor, clock = FlakyVendor(), FakeClock()
+    breaker = make_breaker(vendor, clock)
+
+    vendor.error = "status"
+    await breaker.fetch("1.2.3.4")
+    await breaker.fetch("1.2.3.4")
+    vendor.error = None
+    await breaker.fetch("1.2.3.4")
+    assert breaker.status()["consecutive_failures"] == 0
+
+    # Quota and throttling are the rate limiter's business
+    for kind in ("quota", "rate_limited", "throttled"):
+        vendor.error = kind
+        for _ in range(3):
+            await breaker.fetch("1.2.3.4")
+    assert breaker.status()["state"] == "closed"
+
+
+@pytest.mark.anyio
+async def test_half_open_trial_closes_or_reopens_with_backoff():
+    vendor, clock = FlakyVendor(), FakeClock()
+    breaker = make_breaker(vendor, clock)
+
+    vendor.error = "raise"
+    for _ in range(3):
+        assert await breaker.fetch("1.2.3.4") == {"score": None}
+    assert breaker.status()["last_error"] == "exception"
+
+    # Failed trial: open again for twice as long
+    clock.now = 10
+    await breaker.fetch("1.2.3.4")
+    assert breaker.status()["state"] == "open"
+    assert breaker.status()["retry_in"] == 20
+
+    # Backoff is capped; a successful trial closes the circuit
+    clock.now = 30
+    await breaker.fetch("1.2.3.4")
+    assert breaker.status()["retry_in"] == 25
+
+    vendor.error = None
+    clock.now = 55
+    assert await breaker.fetch("1.2.3.4") == {"score": 7}
+    assert breaker.status()["state"] == "closed"
+    assert vendor.calls == 6
+
+
+@pytest.mark.anyio
+async def test_auth_error_through_rate_limiter_opens_immediately():
+    vendor, clock = FlakyVendor(), FakeClock()
+    breaker = make_breaker(RateLimitedProvider(vendor, QuotaStore(None)), clock)
+
+    vendor.error = "auth"
+    await breaker.fetch("1.2.3.4")
+    await breaker.fetch("1.2.3.4")
+
+    status = breaker.status()
+    assert status["state"] == "open"
+    assert status["last_error"] == "auth"
+    assert status["retry_in"] == 100
+    assert vendor.calls == 1
+
+
+@pytest.mark.anyio
+async def test_providers_status_endpoint():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/api/providers/status")
+
+    body = resp.json()
+    assert resp.status_code == 200
+    assert set(body) == {"AbuseIPDB", "IPQualityScore", "IPAPI", "VirusTotal"}
+    assert body["VirusTotal"]["circuit"]["state"] in ("closed", "open", "half_open")
+    assert body["VirusTotal"]["rate_limit"]["daily_limit"] == 500
@@ -0,0 +1,125 @@
+# tests/test_disk_cache.py
+
+import threading
+import time
+
+import pytest
+
+from src.services import cache_service
+from src.services.cache_service import CacheService
+from src.services.disk_cache import DiskCache
+
+
+def make_disk(tmp_path, **kwargs):
+    # Long flush interval: tests flush explicitly
+    return DiskCache(str(tmp_path / "cache.db"), flush_interval=60, **kwargs)
+
+
+def test_write_behind_and_read_through_pending(tmp_path):
+    disk = make_disk(tmp_path)
+    try:
+        disk.put("8.8.8.8", {"risk_level": "Low"}, ts=time.time(), ttl=60)
+
+        # Not committed yet, but readable from the pending map
+        assert len(disk) == 0
+        assert disk.get("8.8.8.8")[2] == {"risk_level": "Low"}
+
+        disk.flush()
+        assert len(disk) == 1
+        assert disk.stats()["pending_writes"] == 0
+    finally:
+        disk.close()
+
+
+def test_entries_survive_restart_with_original_ttl(tmp_path):
+    first = CacheService(ttl_seconds=60, backing=make_disk(tmp_path))
+    first.set("8.8.8.8", {"ip": "8.8.8.8", "risk_level": "Low"})
+    first.set("1.1.1.1", {"ip": "1.1.1.1"}, ttl=-1)   # already expired
+    first.close()
+
+    second = CacheService(ttl_seconds=60, backing=make_disk(tmp_path))
+    try:
+        assert second.load_from_disk() == 1
+        assert second.get("8.8.8.8") == {"ip": "8.8.8.8", "risk_level": "Low"}
+        assert second.get("1.1.1.1") is None
+    finally:
+        second.close()
+
+
+def test_memory_miss_promotes_from_disk(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "time", lambda: now[0])
+
+    cache = CacheService(ttl_seconds=10, stale_ttl_seconds=20, max_entries=1, backing=make_disk(tmp_path))
+    try:
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})          # evicts "a" from memory only
+        assert "a" not in cache.store
+
+        now[0] += 15
+        data, state = cache.get_with_state("a")
+        assert data == {"v": 1} and state == "stale"
+        assert cache.stats()["backing_hits"] == 1
+
+        # Past the stale window the disk copy is ignored too
+        now[0] += 100
+        assert cache.get_with_state("b") == (None, None)
+    finally:
+        cache.close()
+
+
+def test_compaction_removes_expired_rows(tmp_path):
+    disk = make_disk(tmp_path)
+    try:
+        disk.put("old", {"v": 1}, ts=time.time() - 100, ttl=10)
+        disk.put("new", {"v": 2}, ts=time.time(), ttl=10)
+        disk.flush()
+
+        assert disk.compact() == 1
+        assert disk.get("old") is None
+        assert disk.get("new")[2] == {"v": 2}
+    finally:
+        disk.close()
+
+
+def test_pending_writes_are_bounded(tmp_path):
+    disk = make_disk(tmp_path, max_pending=2)
+    try:
+        disk.put("a", {"v": 1}, ts=time.time(), ttl=60)
+        disk.put("b", {"v": 1}, ts=time.time(), ttl=60)
+        disk.put("a", {"v": 2}, ts=time.time(), ttl=60)   # merged into the pending key
+        disk.put("c", {"v": 1}, ts=time.time(), ttl=60)   # full: dropped
+
+        stats = disk.stats()
+        assert stats["pending_writes"] == 2
+        assert stats["dropped_writes"] == 1
+        assert disk.get("a")[2] == {"v": 2}
+        assert disk.get("c") is None
+    finally:
+        disk.close()
+
+
+@pytest.mark.anyio
+async def test_async_lookup_reads_disk_off_the_event_loop(tmp_path):
+    disk = make_disk(tmp_path)
+    cache = CacheService(ttl_seconds=60, max_entries=1, backing=disk)
+    read_threads = []
+    original_get = disk.get
+
+    def recording_get(key):
+        read_threads.append(threading.current_thread())
+        return original_get(key)
+
+    disk.get = recording_get
+    try:
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})          # evicts "a" from memory only
+
+        assert await cache.aget_with_state("a") == ({"v": 1}, "fresh")
+        assert await cache.aget("missing") is None
+        assert "a" in cache.store
+
+        assert len(read_threads) == 2
+        assert threading.main_thread() not in read_threads
+    finally:
+        cache.close()
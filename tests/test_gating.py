@@ -0,0 +1,70 @@
+# tests/test_gating.py
+
+import pytest
+
+import src.main as main
+from src.ai.gating import LLMGate
+
+
+@pytest.fixture
+def gate():
+    return LLMGate(
+        high_abuse_score=90,
+        high_min_score=0.9,
+        low_max_score=0.05,
+        required_fields=("abuse_score", "fraud_score"),
+    )
+
+
+def test_high_abuse_is_decided(gate):
+    verdict = gate.decide({"abuse_score": 100, "fraud_score": None, "risk_score": 1.0})
+    assert verdict["risk_level"] == "High"
+    assert gate.counters["high_abuse"] == 1
+
+
+def test_high_composite_score_is_decided(gate):
+    verdict = gate.decide({"abuse_score": 80, "fraud_score": 100, "risk_score": 0.95})
+    assert verdict["risk_level"] == "High"
+    assert gate.counters["high_score"] == 1
+
+
+def test_clean_ip_is_decided(gate):
+    data = {"abuse_score": 0, "fraud_score": 0, "vt_score": None, "vpn_proxy": False, "risk_score": 0.0}
+    verdict = gate.decide(data)
+    assert verdict["risk_level"] == "Low"
+    assert "risk_score=0.0" in verdict["analysis"]
+
+
+def test_clean_requires_all_providers(gate):
+    # Missing required provider → not clear-cut
+    assert gate.decide({"abuse_score": 0, "fraud_score": None, "risk_score": 0.0}) is None
+    # VPN or timed-out providers → escalate
+    assert gate.decide({"abuse_score": 0, "fraud_score": 0, "vpn_proxy": True, "risk_score": 0.0}) is None
+    assert gate.decide({
+        "abuse_score": 0, "fraud_score": 0, "risk_score": 0.0,
+        "timed_out_providers": ["VirusTotal"],
+    }) is None
+
+
+def test_ambiguous_is_escalated_and_counted(gate):
+    assert gate.decide({"abuse_score": 40, "fraud_score": 60, "risk_score": 0.5}) is None
+    gate.decide({"abuse_score": 100, "risk_score": 1.0})
+
+    stats = gate.stats()
+    assert stats["escalated"] == 1
+    assert stats["llm_calls_avoided"] == 1
+    assert stats["avoided_ratio"] == 0.5
+
+
+@pytest.mark.anyio
+async def test_llm_verdict_skips_model_for_decisive_cases(monkeypatch):
+    monkeypatch.setattr(main, "llm_gate", LLMGate())
+    monkeypatch.setattr(main, "LLM_GATE_ENABLED", True)
+
+    async def fail_llm(data):
+        raise AssertionError("LLM must not be called")
+
+    monkeypatch.setattr(main, "analyze_with_llm_async", fail_llm)
+
+    verdict = await main.llm_verdict({"ip": "1.2.3.4", "abuse_score": 100, "risk_score": 1.0})
+    assert verdict["risk_level"] == "High"
@@ -0,0 +1,119 @@
+# tests/test_geo_db.py
+
+import httpx
+import pytest
+
+from src.external import ipapi
+from src.services.country_names import country_name
+from src.services.geo_db import GeoRangeDB, GeoRecord, read_ranges_csv
+from src.services.providers.base_provider import ThreatIntelProvider
+from src.services.providers.local_geo_provider import LocalGeoProvider
+
+
+CSV = """start,end,country,asn,org
+8.8.8.0,8.8.8.255,US,AS15169,Google LLC
+1.1.1.0,1.1.1.255,AU,13335,Cloudflare
+1.1.1.128,1.1.2.255,AU,13335,Cloudflare
+2001:4860::,2001:4860:ffff:ffff:ffff:ffff:ffff:ffff,US,15169,Google LLC
+not-an-ip,x,,,
+"""
+
+
+class CountingUpstream(ThreatIntelProvider):
+    def __init__(self):
+        self.calls = 0
+
+    @property
+    def name(self):
+        return "IPAPI"
+
+    @property
+    def fields(self):
+        return ("hostname", "isp", "country")
+
+    async def fetch(self, ip):
+        self.calls += 1
+        return {"hostname": "host", "isp": "Remote ISP", "country": "DE"}
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "ranges.csv"
+    path.write_text(CSV)
+    return GeoRangeDB.from_csv(str(path))
+
+
+def test_lookup_boundaries_v4_and_v6(db):
+    google = GeoRecord("US", 15169, "Google LLC")
+
+    assert db.lookup("8.8.8.0") == google
+    assert db.lookup("8.8.8.255") == google
+    assert db.lookup("8.8.9.0") is None
+    assert db.lookup("0.0.0.0") is None
+    assert db.lookup("::ffff:8.8.8.8") == google
+
+    assert db.lookup("2001:4860:4860::8888") == google
+    assert db.lookup("2001:4861::") is None
+    assert db.lookup("garbage") is None
+
+    # Overlapping / adjacent Cloudflare rows collapse into one range
+    assert db.lookup("1.1.2.200").org == "Cloudflare"
+    assert db.stats() == {"v4_ranges": 2, "v6_ranges": 1, "records": 2}
+
+
+def test_headerless_integer_rows(tmp_path):
+    path = tmp_path / "ranges.tsv"
+    path.write_text("16777216\t16777471\tAU\t13335\tCloudflare\n")
+
+    assert list(read_ranges_csv(str(path)))[0][2:] == ("AU", 13335, "Cloudflare")
+    assert GeoRangeDB.from_csv(str(path)).lookup("1.0.0.1").country == "AU"
+
+
+def test_save_load_roundtrip(db, tmp_path):
+    path = str(tmp_path / "geo.bin")
+    db.save(path)
+    loaded = GeoRangeDB.load(path)
+
+    for ip in ("8.8.8.8", "1.1.1.1", "2001:4860::1", "9.9.9.9"):
+        assert loaded.lookup(ip) == db.lookup(ip)
+
+    (tmp_path / "bad.bin").write_bytes(b"nope" * 10)
+    with pytest.raises(ValueError):
+        GeoRangeDB.load(str(tmp_path / "bad.bin"))
+
+
+@pytest.mark.anyio
+async def test_local_geo_provider_front_and_replace(db):
+    upstream = CountingUpstream()
+    front = LocalGeoProvider(db, upstream=upstream)
+
+    assert await front.fetch("8.8.8.8") == {"hostname": None, "isp": "Google LLC", "country": "United States"}
+    assert upstream.calls == 0
+    assert (await front.fetch("5.5.5.5"))["country"] == "DE"
+    assert upstream.calls == 1
+
+    replace = LocalGeoProvider(db)
+    assert await replace.fetch("5.5.5.5") == {"hostname": None, "isp": None, "country": None}
+    assert replace.stats()["mode"] == "replace"
+
+
+def test_country_name():
+    assert country_name("US") == "United States"
+    assert country_name("gb") == "United Kingdom"
+    assert country_name("Germany") == "Germany"
+    assert country_name(None) is None
+
+
+@pytest.mark.anyio
+async def test_local_geo_agrees_with_ipapi(db, monkeypatch):
+    # Same range, answered once by ipapi.co (shape of its /json/ payload) and once locally
+    payload = {"ip": "8.8.8.8", "org": "Google LLC", "country": "US", "country_name": "United States"}
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=payload))
+    monkeypatch.setattr(ipapi, "IPAPI_KEY", "test")
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        remote = await ipapi.fetch_ipapi("8.8.8.8", client=client)
+    local = await LocalGeoProvider(db).fetch("8.8.8.8")
+
+    assert local["country"] == remote["country"] == "United States"
+    assert local["isp"] == remote["isp"]
@@ -0,0 +1,90 @@
+# tests/test_http_clients.py
+
+import pytest
+
+from src.services.http_clients import ProviderHTTPClients
+from src.services.providers.abuseipdb_provider import AbuseIPDBProvider
+from src.services.providers.ipquality_provider import IPQualityScoreProvider
+
+
+class MockResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._json = data
+        self.text = str(data)
+
+    def json(self):
+        return self._json
+
+
+class RecordingClient:
+    """
+    Stand-in for a pooled httpx.AsyncClient: records every GET.
+    """
+    def __init__(self, response):
+        self._response = response
+        self.calls = []
+
+    async def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return self._response
+
+
+@pytest.mark.anyio
+async def test_open_binds_one_client_per_provider():
+    providers = [AbuseIPDBProvider(), IPQualityScoreProvider()]
+    pool = ProviderHTTPClients(max_connections=10, max_keepalive_connections=5)
+
+    pool.open(providers)
+
+    # Each provider receives its own long-lived client
+    assert set(pool.clients) == {"AbuseIPDB", "IPQualityScore"}
+    assert providers[0].http_client is pool.get("AbuseIPDB")
+    assert providers[1].http_client is pool.get("IPQualityScore")
+
+    # Provider-specific options are honored
+    assert pool.get("IPQualityScore").timeout.read == 8.0
+
+    await pool.aclose()
+
+    # Clean shutdown unbinds everything
+    assert pool.clients == {}
+    assert providers[0].http_client is None
+    assert providers[1].http_client is None
+
+
+@pytest.mark.anyio
+async def test_open_skips_providers_without_binding():
+    class DuckProvider:
+        name = "Duck"
+        fields = ("x",)
+
+    pool = ProviderHTTPClients()
+    pool.open([DuckProvider()])
+
+    assert pool.clients == {}
+    await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_provider_uses_injected_client(monkeypatch):
+    monkeypatch.setenv("ABUSEIPDB_API_KEY", "dummy")
+
+    # Any attempt to open a per-call client would be a regression
+    def fail(*args, **kwargs):
+        raise AssertionError("per-call AsyncClient must not be created")
+
+    monkeypatch.setattr("src.external.abuseipdb.httpx.AsyncClient", fail)
+
+    client = RecordingClient(MockResponse(200, {
+        "data": {"abuseConfidenceScore": 12, "totalReports": 3}
+    }))
+
+    provider = AbuseIPDBProvider()
+    provider.bind_http_client(client)
+
+    result = await provider.fetch("8.8.8.8")
+
+    assert result == {"abuse_score": 12, "recent_reports": 3}
+    assert len(client.calls) == 1
+    assert client.calls[0][1]["params"]["ipAddress"] == "8.8.8.8"
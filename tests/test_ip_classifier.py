@@ -0,0 +1,71 @@
+# tests/test_ip_classifier.py
+
+import json
+
+import httpx
+import pytest
+
+import src.main as main
+from src.validators.ip_classifier import IPClassifier
+
+
+@pytest.mark.parametrize("ip, category", [
+    ("10.0.0.1", "private"),
+    ("172.31.255.255", "private"),
+    ("fd00::1", "private"),
+    ("127.0.0.1", "loopback"),
+    ("::1", "loopback"),
+    ("169.254.169.254", "link_local"),
+    ("100.64.1.1", "cgnat"),
+    ("239.255.255.250", "multicast"),
+    ("255.255.255.255", "reserved"),
+    ("192.0.2.10", "bogon"),
+    ("2001:db8::1", "bogon"),
+    ("::ffff:10.1.2.3", "private"),
+    ("8.8.8.8", None),
+    ("2606:4700::1111", None),
+    ("172.32.0.1", None),
+])
+def test_classify(ip, category):
+    assert IPClassifier().classify(ip) == category
+
+
+def test_configurable_categories_and_extra_bogons():
+    classifier = IPClassifier(categories=["bogon"], extra_bogons=["203.0.0.0/24"])
+
+    assert classifier.classify("10.0.0.1") is None
+    assert classifier.classify("203.0.0.7") == "bogon"
+    assert IPClassifier(categories=[]).classify("127.0.0.1") is None
+
+
+@pytest.mark.anyio
+async def test_private_ips_skip_the_pipeline(monkeypatch):
+    analyzed = []
+
+    async def fake_analyze(ip):
+        analyzed.append(ip)
+        return {"ip": ip, "risk_level": "Low"}
+
+    monkeypatch.setattr(main, "analyze_coalesced", fake_analyze)
+    monkeypatch.setattr(main, "ip_classifier", IPClassifier())
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        single = await client.get("/api/analyze-ip", params={"ip": "192.168.1.10"})
+        batch = await client.post(
+            "/api/analyze-ips",
+            content=json.dumps(["10.0.0.1", "8.8.8.8"]),
+            headers={"content-type": "application/json"},
+        )
+
+    body = single.json()
+    assert body["address_class"] == "private"
+    assert body["risk_level"] == "Low"
+    assert body["abuse_score"] is None and body["vt_score"] is None
+
+    assert [r.get("address_class") for r in batch.json()["results"]] == ["private", None]
+    assert analyzed == ["8.8.8.8"]
+
+    stats = main.ip_classifier.stats()
+    assert stats["short_circuited"] == 2
+    assert stats["provider_calls_saved"] == 2 * len(main.PROVIDERS)
@@ -27,3 +27,13 @@ def test_invalid_ip():
 
     # Assert
     assert r.status_code == 400
+
+
+def test_validator_returns_canonical_form():
+    # Purpose: equivalent spellings of one address share one cache key.
+    from src.validators.ip_validator import IPValidator
+
+    assert IPValidator.validate("2001:0DB8:0:0::1") == "2001:db8::1"
+    assert IPValidator.validate("::ffff:1.2.3.4") == "1.2.3.4"
+    assert IPValidator.validate("8.8.8.8") == "8.8.8.8"
+    assert IPValidator.prefix_key("2001:db8:a:b:c::1", 64) == "2001:db8:a:b::/64"
@@ -0,0 +1,53 @@
+# tests/test_json_repair.py
+
+import pytest
+
+from src.ai.json_repair import REPAIR_STATS, coerce_verdict, tolerant_parse
+
+FALLBACK = {"risk_level": "Unknown", "analysis": "n/a", "recommendations": "n/a"}
+
+
+@pytest.mark.parametrize("text, expected, rule", [
+    ('{"a": 1,}', {"a": 1}, "trailing_commas"),
+    ("{'a': 'x'}", {"a": "x"}, "single_quotes"),
+    ('{"a": "l1\nl2"}', {"a": "l1\nl2"}, "unescaped_newlines"),
+    ('```json\n{"a": 1}\n```', {"a": 1}, "code_fence"),
+    ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}, "close_truncated"),
+    ('Sure! {"a": 1} Hope this helps.', {"a": 1}, "extra_prose"),
+    ('{"a": True, "b": None}', {"a": True, "b": None}, "python_literals"),
+    ('{a: 1}', {"a": 1}, "unquoted_keys"),
+])
+def test_tolerant_parse_rules(text, expected, rule):
+    before = REPAIR_STATS[rule]
+    assert tolerant_parse(text) == expected
+    assert REPAIR_STATS[rule] == before + 1
+
+
+def test_tolerant_parse_keeps_string_content():
+    text = "{'analysis': \"it's fine, {really}\", 'x': 'say \"hi\"',}"
+    assert tolerant_parse(text) == {"analysis": "it's fine, {really}", "x": 'say "hi"'}
+
+
+def test_tolerant_parse_truncated_string():
+    assert tolerant_parse('{"risk_level": "Low", "analysis": "cut o') == {
+        "risk_level": "Low", "analysis": "cut o"
+    }
+
+
+def test_tolerant_parse_unrecoverable():
+    assert tolerant_parse("no json here") is None
+    assert tolerant_parse("") is None
+
+
+def test_coerce_verdict_normalizes_schema():
+    verdict = coerce_verdict(
+        {"Risk_Level": "CRITICAL", "analysis": ["a", "b"], "recommendations": "block"},
+        FALLBACK,
+    )
+    assert verdict == {"risk_level": "High", "analysis": "a; b", "recommendations": "block"}
+
+
+def test_coerce_verdict_fills_missing_and_unknown():
+    verdict = coerce_verdict([{"risk_level": "weird"}], FALLBACK)
+    assert verdict == {"risk_level": "Unknown", "analysis": "n/a", "recommendations": "n/a"}
+    assert coerce_verdict("text", FALLBACK) == FALLBACK
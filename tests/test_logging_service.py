@@ -0,0 +1,111 @@
+# tests/test_logging_service.py
+
+import io
+import json
+import logging
+import random
+
+import pytest
+
+from src.external import ipapi
+from src.services import logging_service
+from src.services.logging_service import (
+    JsonFormatter,
+    ProviderRateLimitFilter,
+    SamplingFilter,
+    log_event,
+    parse_sample_rates,
+)
+
+
+def make_record(event=None, level=logging.WARNING, **fields):
+    record = logging.LogRecord("test", level, __file__, 1, "message", None, None)
+    record.event = event
+    record.fields = fields
+    return record
+
+
+def test_json_formatter_flattens_fields():
+    line = JsonFormatter().format(make_record("provider.bad_status", provider="IPQS", status=503))
+    entry = json.loads(line)
+
+    assert entry["event"] == "provider.bad_status"
+    assert entry["provider"] == "IPQS"
+    assert entry["status"] == 503
+    assert entry["level"] == "WARNING"
+
+
+def test_sampling_filter_keeps_share_of_configured_events():
+    rates = parse_sample_rates("cache.hit=0.1, bad, cache.store=1")
+    assert rates == {"cache.hit": 0.1, "cache.store": 1.0}
+
+    sampler = SamplingFilter(rates, rng=random.Random(7))
+    kept = [r for r in (make_record("cache.hit", logging.INFO) for _ in range(1000)) if sampler.filter(r)]
+
+    assert 50 < len(kept) < 150
+    assert kept[0].fields["sample_rate"] == 0.1
+    # Unconfigured events always pass
+    assert sampler.filter(make_record("provider.network_error"))
+
+
+def test_provider_rate_limit_reports_suppressed_count():
+    now = [0.0]
+    limiter = ProviderRateLimitFilter(limit=2, window=60, clock=lambda: now[0])
+
+    results = [limiter.filter(make_record("provider.network_error", provider="VirusTotal")) for _ in range(5)]
+    assert results == [True, True, False, False, False]
+
+    # Other providers have their own budget
+    assert limiter.filter(make_record("provider.network_error", provider="IPQS"))
+
+    now[0] = 61
+    record = make_record("provider.network_error", provider="VirusTotal")
+    assert limiter.filter(record)
+    assert record.fields["suppressed"] == 3
+
+
+def test_start_logging_writes_json_lines(monkeypatch):
+    stream = io.StringIO()
+    root = logging.getLogger()
+    previous_level = root.level
+
+    logging_service.start_logging(level="INFO", stream=stream)
+    try:
+        log_event(logging.getLogger("api"), logging.WARNING, "cache.refresh_failed", "Refresh failed", ip="1.2.3.4")
+    finally:
+        logging_service.stop_logging()
+        root.setLevel(previous_level)
+
+    entry = json.loads(stream.getvalue().strip().splitlines()[-1])
+    assert entry["event"] == "cache.refresh_failed"
+    assert entry["ip"] == "1.2.3.4"
+
+
+def test_start_logging_quiets_http_client_request_lines():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    previous_level = root.level
+
+    logging_service.start_logging(level="INFO", stream=stream)
+    try:
+        logging.getLogger("httpx").info('HTTP Request: GET https://ipapi.co/8.8.8.8/json/ "HTTP/1.1 200 OK"')
+        logging.getLogger("httpcore.connection").debug("connect_tcp.started")
+        logging.getLogger("httpx").warning("Retrying request")
+    finally:
+        logging_service.stop_logging()
+        root.setLevel(previous_level)
+
+    lines = [json.loads(line) for line in stream.getvalue().strip().splitlines()]
+    assert [entry["msg"] for entry in lines] == ["Retrying request"]
+
+
+@pytest.mark.anyio
+async def test_external_module_logs_structured_event(monkeypatch, caplog):
+    monkeypatch.setattr(ipapi, "IPAPI_KEY", None)
+
+    with caplog.at_level(logging.WARNING, logger="external.ipapi"):
+        await ipapi.fetch_ipapi("8.8.8.8")
+
+    record = caplog.records[-1]
+    assert record.event == "provider.no_api_key"
+    assert record.fields == {"provider": "IPAPI", "ip": "8.8.8.8"}
@@ -0,0 +1,70 @@
+# tests/test_metrics.py
+
+import httpx
+import pytest
+
+import src.main as main
+from src.services.cache_service import CacheService
+from src.services.metrics import (
+    Metrics,
+    ServerTimingMiddleware,
+    finish_request_timings,
+    server_timing_header,
+    stage,
+    start_request_timings,
+)
+
+
+def test_histogram_renders_prometheus_text():
+    metrics = Metrics(buckets=(0.01, 0.1))
+    metrics.observe("provider_fetch", 0.005, provider="AbuseIPDB")
+    metrics.observe("provider_fetch", 0.05, provider="AbuseIPDB")
+    metrics.observe("provider_fetch", 3.0, provider="AbuseIPDB")
+
+    text = metrics.render()
+    labels = 'stage="provider_fetch",provider="AbuseIPDB"'
+
+    assert "# TYPE ip_threat_stage_duration_seconds histogram" in text
+    assert f'ip_threat_stage_duration_seconds_bucket{{{labels},le="0.01"}} 1' in text
+    assert f'ip_threat_stage_duration_seconds_bucket{{{labels},le="0.1"}} 2' in text
+    assert f'ip_threat_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f"ip_threat_stage_duration_seconds_count{{{labels}}} 3" in text
+
+
+def test_stage_collects_request_timings_only_when_started():
+    with stage("scoring"):
+        pass
+
+    token = start_request_timings()
+    with stage("provider_fetch", provider="VirusTotal"):
+        pass
+    with stage("provider_fetch", provider="VirusTotal"):
+        pass
+    timings = finish_request_timings(token)
+
+    assert [label for label, _ in timings] == ["provider_fetch.VirusTotal"] * 2
+
+    header = server_timing_header([("cache_lookup", 0.0005), ("llm_call", 0.25), ("llm_call", 0.25)])
+    assert header == "cache_lookup;dur=0.50, llm_call;dur=500.00"
+
+
+@pytest.mark.anyio
+async def test_server_timing_header_and_metrics_endpoint(monkeypatch):
+    cache = CacheService(ttl_seconds=60)
+    cache.set("8.8.8.8", {"ip": "8.8.8.8", "risk_level": "Low"})
+    monkeypatch.setattr(main, "cache", cache)
+
+    # SERVER_TIMING=1 installs this middleware; off (the default) there is none
+    assert not any(m.cls is ServerTimingMiddleware for m in main.app.user_middleware)
+    transport = httpx.ASGITransport(app=ServerTimingMiddleware(main.app))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/api/analyze-ip", params={"ip": "8.8.8.8"})
+        metrics = await client.get("/metrics")
+
+    timing = resp.headers["server-timing"]
+    assert "validate;dur=" in timing
+    assert "cache_lookup;dur=" in timing
+    assert "total;dur=" in timing
+
+    assert metrics.status_code == 200
+    assert 'stage="cache_lookup"' in metrics.text
@@ -0,0 +1,104 @@
+# tests/test_mock_vendors.py
+
+import json
+import random
+
+import httpx
+import pytest
+
+import benchmarks.mock_vendors as mock
+from benchmarks.load_test import parse_server_timing, percentile
+from src.external import abuseipdb, ipapi, ipquality, virustotal
+
+BASE = "http://mock"
+
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    """
+    Real fetch functions talking to the in-process mock vendors:
+    module URLs point at the mock, all latencies are zero.
+    """
+    env = mock.vendor_env(BASE)
+    monkeypatch.setattr(abuseipdb, "ABUSEIPDB_URL", env["ABUSEIPDB_URL"])
+    monkeypatch.setenv("ABUSEIPDB_API_KEY", "mock")
+    monkeypatch.setattr(ipapi, "IPAPI_BASE_URL", env["IPAPI_BASE_URL"])
+    monkeypatch.setattr(ipapi, "IPAPI_KEY", "mock")
+    monkeypatch.setattr(ipquality, "BASE_URL", env["IPQS_BASE_URL"])
+    monkeypatch.setattr(ipquality, "IPQUALITY_API_KEY", "mock")
+    monkeypatch.setattr(virustotal, "VT_URL", env["VIRUSTOTAL_URL"])
+    monkeypatch.setattr(virustotal, "VT_KEY", "mock")
+
+    for vendor in mock.VENDORS:
+        mock.configure(vendor, latency="fixed:0", error_rate=0, rate_429=0, malformed_rate=0)
+    for counters in mock.STATS.values():
+        counters.clear()
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=mock.app), base_url=BASE)
+
+
+@pytest.mark.anyio
+async def test_fetch_functions_parse_mock_responses(mock_client):
+    async with mock_client as client:
+        abuse = await abuseipdb.fetch_abuse("8.8.8.8", client=client)
+        geo = await ipapi.fetch_ipapi("8.8.8.8", client=client)
+        quality = await ipquality.fetch_quality("8.8.8.8", client=client)
+        vt = await virustotal.fetch_virustotal("8.8.8.8", client=client)
+
+    assert abuse["abuse_score"] == mock._signal("8.8.8.8", "abuse", 101)
+    assert geo["country"] is not None and geo["isp"].startswith("AS")
+    assert quality["fraud_score"] == mock._signal("8.8.8.8", "fraud", 101)
+    assert vt["vt_score"] is not None
+
+
+@pytest.mark.anyio
+async def test_vendor_failures_produce_fallbacks(mock_client):
+    mock.configure("ABUSEIPDB", rate_429=1.0)
+    mock.configure("IPQS", error_rate=1.0)
+    mock.configure("IPAPI", malformed_rate=1.0)
+
+    async with mock_client as client:
+        abuse = await abuseipdb.fetch_abuse("1.2.3.4", client=client)
+        quality = await ipquality.fetch_quality("1.2.3.4", client=client)
+        geo = await ipapi.fetch_ipapi("1.2.3.4", client=client)
+        stats = (await client.get("/_mock/stats", params={"reset": True})).json()
+
+    assert abuse == {"abuse_score": None, "recent_reports": None}
+    assert quality == {"fraud_score": None, "vpn": None}
+    assert geo == {"hostname": None, "isp": None, "country": None}
+    assert stats["ABUSEIPDB"]["outcomes"] == {"throttled": 1}
+    assert stats["IPQS"]["outcomes"] == {"error": 1}
+
+
+@pytest.mark.anyio
+async def test_mock_llm_answers_batched_prompts(mock_client):
+    prompt = 'Input items:\n[{"id": "item-0", "data": {}}, {"id": "item-1", "data": {}}]'
+
+    async with mock_client as client:
+        resp = await client.post(
+            "/groq/openai/v1/chat/completions",
+            json={"model": "m", "messages": [{"role": "user", "content": prompt}]},
+        )
+
+    content = resp.json()["choices"][0]["message"]["content"]
+    assert [item["id"] for item in json.loads(content)] == ["item-0", "item-1"]
+
+
+def test_latency_models():
+    rng = random.Random(1)
+
+    assert mock.LatencyModel("fixed:250", rng).sample() == 0.25
+    assert 0.01 <= mock.LatencyModel("uniform:10,20", rng).sample() <= 0.02
+    assert mock.LatencyModel("lognormal:100,0.5", rng).sample() > 0
+
+    with pytest.raises(ValueError):
+        mock.LatencyModel("pareto:1", rng)
+
+
+def test_load_test_helpers():
+    assert parse_server_timing("cache;dur=0.5, provider.VirusTotal;dur=120.25, llm") == {
+        "cache": 0.5,
+        "provider.VirusTotal": 120.25,
+    }
+    assert percentile([5, 1, 3, 2, 4], 0.5) == 3
+    assert percentile([], 0.5) is None
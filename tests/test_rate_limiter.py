@@ -0,0 +1,224 @@
+# tests/test_rate_limiter.py
+
+import json
+
+import httpx
+import pytest
+
+from src.external import outcome, virustotal
+from src.external.outcome import capture_outcome, report_error, status_error_kind
+from src.services.providers.base_provider import ThreatIntelProvider
+from src.services.providers.rate_limited_provider import RateLimitedProvider
+from src.services.rate_limiter import QuotaStore, TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class DummyVendor(ThreatIntelProvider):
+    """
+    Counts calls; optionally reports a failure kind like the fetch_* functions do.
+    """
+
+    def __init__(self, rate=None, burst=None, daily=None):
+        self._rate, self._burst, self._daily = rate, burst, daily
+        self.calls = 0
+        self.error = None
+
+    @property
+    def name(self):
+        return "Dummy"
+
+    @property
+    def fields(self):
+        return ("score",)
+
+    @property
+    def rate_limit(self):
+        return self._rate
+
+    @property
+    def rate_burst(self):
+        return self._burst
+
+    @property
+    def daily_quota(self):
+        return self._daily
+
+    async def fetch(self, ip):
+        self.calls += 1
+        if self.error:
+            report_error(self.error)
+            return {"score": None}
+        return {"score": 1}
+
+
+def test_token_bucket_burst_and_refill():
+    clock = FakeClock(0.0)
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+    # Waiting callers book future tokens in order
+    assert bucket.reserve(max_wait=1.0) == pytest.approx(0.5)
+    assert bucket.reserve(max_wait=1.0) == pytest.approx(1.0)
+    assert bucket.reserve(max_wait=1.0) is None
+
+    clock.now = 10.0
+    assert bucket.try_acquire()
+
+
+def test_quota_store_persists_and_resets_daily(tmp_path):
+    path = str(tmp_path / "quota.json")
+    clock = FakeClock()
+
+    store = QuotaStore(path, clock=clock)
+    store.record_call("IPQS")
+    store.record_call("IPQS")
+    store.mark_exhausted("IPQS")
+    store.save()
+
+    restarted = QuotaStore(path, clock=clock)
+    assert restarted.used("IPQS") == 2
+    assert restarted.is_exhausted("IPQS")
+
+    clock.now += 24 * 3600
+    assert not restarted.is_exhausted("IPQS")
+    assert restarted.used("IPQS") == 0
+
+    with open(path) as f:
+        assert json.load(f)["IPQS"]["exhausted"] is True
+
+
+def test_quota_store_merges_counts_across_workers(tmp_path):
+    path = str(tmp_path / "quota.json")
+    clock = FakeClock()
+    # Two uvicorn workers sharing one state file
+    first = QuotaStore(path, save_interval=60, clock=clock)
+    second = QuotaStore(path, save_interval=60, clock=clock)
+
+    for _ in range(3):
+        first.record_call("IPAPI")
+    for _ in range(2):
+        second.record_call("IPAPI")
+    second.mark_exhausted("VT")
+    first.save(force=True)
+    second.save(force=True)
+
+    with open(path) as f:
+        data = json.load(f)
+    assert data["IPAPI"]["used"] == 5
+    assert data["VT"]["exhausted"] is True
+
+    # Saving again adds nothing twice and picks up the other worker's calls
+    first.record_call("IPAPI")
+    first.save(force=True)
+    assert first.used("IPAPI") == 6
+    assert first.is_exhausted("VT")
+    assert QuotaStore(path, clock=clock).used("IPAPI") == 6
+
+
+@pytest.mark.anyio
+async def test_quota_saves_run_in_background(tmp_path):
+    import asyncio
+
+    path = tmp_path / "quota.json"
+    store = QuotaStore(str(path), save_interval=60)
+
+    # The request path only updates memory
+    store.record_call("VT")
+    assert not path.exists()
+
+    store.start_saver()
+    try:
+        # An exhausted quota is written at once, not after save_interval
+        store.mark_exhausted("VT")
+        for _ in range(100):
+            if path.exists():
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await store.stop_saver()
+
+    assert json.loads(path.read_text())["VT"] == {"day": store.stats()["VT"]["day"], "used": 1, "exhausted": True}
+
+
+def test_status_error_kinds():
+    assert status_error_kind(401) == "auth"
+    assert status_error_kind(429, "Daily rate limit of 1000 requests exceeded") == "quota"
+    assert status_error_kind(429, "Too Many Requests") == "rate_limited"
+    # VirusTotal uses the same code for its per-minute limit: not a day-long lockout
+    assert status_error_kind(429, '{"error":{"code":"QuotaExceededError"}}') == "rate_limited"
+    assert status_error_kind(503) == "status"
+
+    # Outside capture_outcome() reporting is a no-op
+    report_error("network")
+    assert outcome._outcome.get() is None
+
+
+@pytest.mark.anyio
+async def test_daily_limit_short_circuits_calls(tmp_path):
+    vendor = DummyVendor(daily=2)
+    provider = RateLimitedProvider(vendor, QuotaStore(str(tmp_path / "q.json")))
+
+    results = [await provider.fetch("1.2.3.4") for _ in range(4)]
+
+    assert results == [{"score": 1}, {"score": 1}, {"score": None}, {"score": None}]
+    assert vendor.calls == 2
+    assert provider.stats()["quota_skipped"] == 2
+
+
+@pytest.mark.anyio
+async def test_vendor_quota_error_stops_further_calls(tmp_path):
+    vendor = DummyVendor()
+    vendor.error = "quota"
+    provider = RateLimitedProvider(vendor, QuotaStore(str(tmp_path / "q.json")))
+
+    with capture_outcome() as seen:
+        await provider.fetch("1.2.3.4")
+    await provider.fetch("1.2.3.4")
+
+    # Outer layers (e.g. a circuit breaker) see the vendor's error too
+    assert seen["error"] == "quota"
+    assert vendor.calls == 1
+    assert provider.stats()["exhausted"] is True
+
+
+@pytest.mark.anyio
+async def test_virustotal_429_backs_off_without_marking_exhausted(tmp_path, monkeypatch):
+    body = {"error": {"code": "QuotaExceededError", "message": "Quota exceeded"}}
+    transport = httpx.MockTransport(lambda request: httpx.Response(429, json=body))
+    monkeypatch.setattr(virustotal, "VT_KEY", "test")
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        with capture_outcome() as seen:
+            await virustotal.fetch_virustotal("8.8.8.8", client=client)
+    assert seen["error"] == "rate_limited"
+
+    vendor = DummyVendor(rate=1000)
+    vendor.error = seen["error"]
+    provider = RateLimitedProvider(vendor, QuotaStore(str(tmp_path / "q.json")))
+    await provider.fetch("8.8.8.8")
+
+    stats = provider.stats()
+    assert stats["vendor_rate_limited"] == 1
+    assert stats["exhausted"] is False
+
+
+@pytest.mark.anyio
+async def test_rate_limit_waits_then_throttles(tmp_path, monkeypatch):
+    vendor = DummyVendor(rate=1, burst=1)
+    provider = RateLimitedProvider(vendor, QuotaStore(None), max_wait=0)
+
+    assert await provider.fetch("1.1.1.1") == {"score": 1}
+    assert await provider.fetch("1.1.1.1") == {"score": None}
+    assert provider.stats()["throttled"] == 1
+
+    monkeypatch.setenv("RATE_LIMIT_DUMMY_PER_SECOND", "1000")
+    overridden = RateLimitedProvider(DummyVendor(rate=1), QuotaStore(None))
+    assert overridden.stats()["rate_limit"] == 1000
@@ -104,3 +104,55 @@ def test_score_rounding(scorer):
     result = scorer.compute(data)
     assert isinstance(result, float)
     assert round(result, 4) == result
+
+
+
+# ------------------------------------------------------------
+# Weights and batch scoring
+# ------------------------------------------------------------
+
+def test_custom_weights(scorer):
+    weighted = RiskScorer(max_values=scorer.max_values, weights={"abuse_score": 3})
+    data = {"abuse_score": 100, "fraud_score": 0, "vt_score": None}
+
+    assert weighted.compute(data) == 0.75
+    assert scorer.compute(data) == 0.5
+
+
+@pytest.mark.parametrize("weights", [None, {"abuse_score": 2, "vt_score": 0.5}])
+def test_compute_many_is_bit_identical(scorer, weights):
+    import math
+    import random
+
+    pytest.importorskip("numpy")
+    scorer = RiskScorer(max_values=scorer.max_values, weights=weights)
+    rng = random.Random(7)
+    odd = [None, "abc", "42", float("nan"), float("inf"), -0.0, -5, 150, True]
+    records = [
+        {
+            field: rng.choice(odd) if rng.random() < 0.3 else rng.randint(0, 100)
+            for field in ("abuse_score", "fraud_score", "vt_score")
+        }
+        for _ in range(5000)
+    ]
+
+    scores = scorer.compute_many(*scorer.to_columns(records))
+
+    for record, score in zip(records, scores):
+        expected = scorer.compute(record)
+        if expected is None:
+            assert math.isnan(score)
+        else:
+            assert float(score).hex() == expected.hex()
+
+
+def test_compute_many_missing_mask(scorer):
+    np = pytest.importorskip("numpy")
+
+    scores = scorer.compute_many(
+        {"abuse_score": np.array([50.0, 0.0]), "fraud_score": np.array([100.0, 0.0])},
+        {"abuse_score": np.array([False, True]), "fraud_score": np.array([False, True])},
+    )
+
+    assert scores[0] == 0.75
+    assert np.isnan(scores[1])
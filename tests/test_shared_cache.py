@@ -0,0 +1,103 @@
+# tests/test_shared_cache.py
+
+import multiprocessing
+import time
+
+import pytest
+
+from src.services import shared_cache
+from src.services.cache_service import CacheService, backing_from_env
+from src.services.shared_cache import PROBE_LIMIT, SharedMemoryTable
+
+
+def _worker_put(path, key, value):
+    table = SharedMemoryTable(path)
+    table.put(key, value, ts=time.time(), ttl=60)
+    table.close()
+
+
+def test_entries_visible_across_processes(tmp_path):
+    path = str(tmp_path / "shared.cache")
+    table = SharedMemoryTable(path, slots=128, slot_size=256)
+    try:
+        ctx = multiprocessing.get_context("fork")
+        proc = ctx.Process(target=_worker_put, args=(path, "8.8.8.8", {"risk_level": "Low"}))
+        proc.start()
+        proc.join(10)
+        assert proc.exitcode == 0
+
+        ts, ttl, data = table.get("8.8.8.8")
+        assert data == {"risk_level": "Low"} and ttl == 60
+    finally:
+        table.close()
+
+
+def test_second_mapping_adopts_existing_geometry(tmp_path):
+    path = str(tmp_path / "shared.cache")
+    first = SharedMemoryTable(path, slots=64, slot_size=256)
+    second = SharedMemoryTable(path, slots=999, slot_size=4096)
+    try:
+        assert (second.slots, second.slot_size) == (64, 256)
+        first.put("k", {"v": 1}, ts=1.0, ttl=2.0)
+        assert second.get("k") == (1.0, 2.0, {"v": 1})
+    finally:
+        first.close()
+        second.close()
+
+
+def test_overwrite_replacement_and_size_limit(tmp_path):
+    table = SharedMemoryTable(str(tmp_path / "shared.cache"), slots=PROBE_LIMIT, slot_size=128)
+    try:
+        table.put("a", {"v": 1}, ts=1.0, ttl=10)
+        table.put("a", {"v": 2}, ts=2.0, ttl=10)
+        assert table.get("a")[2] == {"v": 2}
+
+        # Every slot is in every probe window: the oldest entry gets replaced
+        for i in range(PROBE_LIMIT):
+            table.put(f"k{i}", {"v": i}, ts=10.0 + i, ttl=10)
+        assert table.get("a") is None
+        assert table.stats()["replaced"] == 1
+        assert table.get(f"k{PROBE_LIMIT - 1}")[2] == {"v": PROBE_LIMIT - 1}
+
+        table.put("big", {"v": "x" * 500}, ts=1.0, ttl=10)
+        assert table.get("big") is None
+        assert table.stats()["too_large"] == 1
+    finally:
+        table.close()
+
+
+def test_cache_services_share_entries_through_backing(tmp_path):
+    path = str(tmp_path / "shared.cache")
+    worker_a = CacheService(ttl_seconds=60, backing=SharedMemoryTable(path, slots=128, slot_size=512))
+    worker_b = CacheService(ttl_seconds=60, backing=SharedMemoryTable(path, slots=128, slot_size=512))
+    try:
+        worker_a.set("8.8.8.8", {"ip": "8.8.8.8", "risk_level": "High"})
+
+        assert worker_b.get("8.8.8.8") == {"ip": "8.8.8.8", "risk_level": "High"}
+        assert worker_b.stats()["backing_hits"] == 1
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+
+def test_backing_selected_by_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_BACKEND", "shared")
+    monkeypatch.setenv("CACHE_SHARED_DIR", str(tmp_path))
+    monkeypatch.setenv("CACHE_SHARED_SLOTS", "16")
+    backing = backing_from_env("responses")
+    assert isinstance(backing, SharedMemoryTable)
+    backing.close()
+
+    monkeypatch.setenv("CACHE_BACKEND", "memory")
+    monkeypatch.delenv("CACHE_DISK_PATH", raising=False)
+    assert backing_from_env("responses") is None
+
+    monkeypatch.setenv("CACHE_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        backing_from_env("responses")
+
+
+def test_shared_backend_needs_fcntl(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "fcntl", None)
+    with pytest.raises(RuntimeError, match="POSIX"):
+        SharedMemoryTable(str(tmp_path / "shared.cache"))
@@ -0,0 +1,94 @@
+# tests/test_single_flight.py
+
+import asyncio
+import pytest
+
+from src.services.single_flight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+    gate = asyncio.Event()
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await gate.wait()
+        return {"ip": "1.2.3.4"}
+
+    waiters = [asyncio.create_task(flight.do("1.2.3.4", work)) for _ in range(10)]
+    await asyncio.sleep(0)
+    gate.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+
+    # Key is released after completion
+    assert "1.2.3.4" not in flight
+
+
+@pytest.mark.anyio
+async def test_error_propagates_to_all_waiters():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        flight.do("k", work), flight.do("k", work), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(flight) == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_shared_work():
+    flight = SingleFlight()
+    gate = asyncio.Event()
+
+    async def work():
+        await gate.wait()
+        return 42
+
+    first = asyncio.create_task(flight.do("k", work))
+    second = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    gate.set()
+
+    assert await second == 42
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.anyio
+async def test_last_waiter_cancel_cancels_work():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flight.do("k", work))
+    await started.wait()
+    waiter.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert "k" not in flight
@@ -0,0 +1,46 @@
+# tests/test_stale_while_revalidate.py
+
+import asyncio
+import pytest
+
+import src.main as main
+from src.services import cache_service
+from src.services.cache_service import CacheService
+
+
+@pytest.mark.anyio
+async def test_stale_entry_served_and_refreshed_once(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "time", lambda: now[0])
+
+    cache = CacheService(ttl_seconds=10, stale_ttl_seconds=100)
+    monkeypatch.setattr(main, "cache", cache)
+
+    calls = 0
+    gate = asyncio.Event()
+
+    async def fake_analyze(ip):
+        nonlocal calls
+        calls += 1
+        await gate.wait()
+        response = {"ip": ip, "risk_level": "Low", "version": 2}
+        cache.set(ip, response)
+        return response
+
+    monkeypatch.setattr(main, "analyze_uncached", fake_analyze)
+
+    cache.set("8.8.8.8", {"ip": "8.8.8.8", "risk_level": "Low", "version": 1})
+    now[0] += 20
+
+    # Several callers get the stale entry immediately
+    results = [await main.analyze_ip("8.8.8.8") for _ in range(5)]
+    assert all(r["stale"] is True and r["version"] == 1 for r in results)
+
+    # ...while exactly one background refresh runs
+    gate.set()
+    await asyncio.gather(*main.refresh_tasks)
+    assert calls == 1
+
+    fresh = await main.analyze_ip("8.8.8.8")
+    assert fresh["version"] == 2
+    assert "stale" not in fresh
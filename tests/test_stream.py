@@ -0,0 +1,74 @@
+# tests/test_stream.py
+
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.services.cache_service import CacheService
+from src.services.stream_service import encode_event, stream_batch
+
+
+@pytest.mark.anyio
+async def test_stream_batch_yields_in_completion_order():
+    async def worker(item, emit):
+        await asyncio.sleep(float(item))
+        await emit({"event": "data", "ip": item})
+
+    events = [e async for e in stream_batch(["0.03", "0.0", "0.01"], worker, concurrency=3)]
+
+    assert [e.get("ip") for e in events[:-1]] == ["0.0", "0.01", "0.03"]
+    assert events[-1] == {"event": "done", "count": 3}
+
+
+@pytest.mark.anyio
+async def test_stream_batch_backpressure_bounds_work():
+    started = []
+
+    async def worker(item, emit):
+        started.append(item)
+        await emit({"event": "data", "ip": item})
+
+    stream = stream_batch([str(i) for i in range(50)], worker, concurrency=2, queue_size=2)
+
+    # Consume one event, then stall: producers must block on the full queue
+    first = await stream.__anext__()
+    await asyncio.sleep(0.05)
+
+    assert first["event"] == "data"
+    assert len(started) <= 1 + 2 + 2   # consumed + queued + blocked in emit()
+
+    await stream.aclose()
+
+
+def test_encode_event_formats():
+    event = {"event": "data", "ip": "1.1.1.1"}
+    assert encode_event(event) == json.dumps(event) + "\n"
+    assert encode_event(event, "sse").startswith("event: data\ndata: {")
+
+
+def test_stream_endpoint_emits_data_then_verdict(monkeypatch):
+    monkeypatch.setattr(main, "cache", CacheService(ttl_seconds=60))
+
+    async def fake_aggregate(ip):
+        return {"ip": ip, "abuse_score": 1}
+
+    async def fake_llm(raw):
+        return {"risk_level": "Low", "analysis": "fine", "recommendations": "none"}
+
+    monkeypatch.setattr(main, "aggregate_ip_data_v2", fake_aggregate)
+    monkeypatch.setattr(main, "analyze_with_llm_async", fake_llm)
+
+    client = TestClient(main.app)
+    r = client.post("/api/analyze-ips/stream", json=["8.8.8.8", "nope"])
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    events = [json.loads(line) for line in r.text.splitlines()]
+    kinds = [(e["event"], e.get("ip")) for e in events]
+
+    assert ("error", "nope") in kinds
+    assert kinds.index(("data", "8.8.8.8")) < kinds.index(("verdict", "8.8.8.8"))
+    assert kinds[-1] == ("done", None)
@@ -0,0 +1,99 @@
+# tests/test_verdict_cache.py
+
+import pytest
+
+import src.main as main
+from src.ai.llm_client import FALLBACK
+from src.ai.verdict_cache import VerdictCache, parse_buckets
+
+
+def sample(**overrides):
+    data = {
+        "ip": "1.2.3.4",
+        "hostname": "a.example",
+        "isp": "ISP A",
+        "country": "Germany",
+        "abuse_score": 3,
+        "recent_reports": 0,
+        "fraud_score": 12,
+        "vpn_proxy": False,
+        "vt_score": 0,
+        "risk_score": 0.05,
+    }
+    data.update(overrides)
+    return data
+
+
+def test_identity_fields_do_not_affect_key():
+    cache = VerdictCache()
+    a = sample()
+    b = sample(ip="5.6.7.8", hostname="b.example", isp="ISP B", risk_score=0.07)
+    assert cache.feature_key(a) == cache.feature_key(b)
+
+
+def test_values_in_same_bucket_share_key():
+    cache = VerdictCache(buckets={"abuse_score": 10})
+    assert cache.feature_key(sample(abuse_score=41)) == cache.feature_key(sample(abuse_score=49))
+    assert cache.feature_key(sample(abuse_score=41)) != cache.feature_key(sample(abuse_score=51))
+
+    # Booleans and country are exact
+    assert cache.feature_key(sample()) != cache.feature_key(sample(vpn_proxy=True))
+    assert cache.feature_key(sample()) == cache.feature_key(sample(country="germany"))
+    assert cache.feature_key(sample()) != cache.feature_key(sample(country="France"))
+
+
+def test_prompt_features_strip_identity():
+    features = VerdictCache.prompt_features(sample())
+    assert "ip" not in features
+    assert "hostname" not in features
+    assert "isp" not in features
+    assert features["abuse_score"] == 3
+
+
+def test_parse_buckets():
+    assert parse_buckets("abuse_score=5, vt_score=1,bad") == {"abuse_score": 5.0, "vt_score": 1.0}
+    assert parse_buckets(None) == {}
+
+
+@pytest.mark.anyio
+async def test_llm_verdict_reuses_cached_verdict(monkeypatch):
+    monkeypatch.setattr(main, "verdict_cache", VerdictCache())
+    monkeypatch.setattr(main, "VERDICT_CACHE_ENABLED", True)
+    monkeypatch.setattr(main, "LLM_GATE_ENABLED", False)
+
+    prompts = []
+
+    async def fake_llm(data):
+        prompts.append(data)
+        return {"risk_level": "Low", "analysis": "clean", "recommendations": "none"}
+
+    monkeypatch.setattr(main, "analyze_with_llm_async", fake_llm)
+
+    first = await main.llm_verdict(sample())
+    second = await main.llm_verdict(sample(ip="9.9.9.9", abuse_score=7))
+
+    assert first == second
+    assert len(prompts) == 1
+    assert "ip" not in prompts[0]
+    # The prompt is the cache key's feature vector, not one IP's exact values
+    assert prompts[0]["abuse_score"] == "[0, 10)"
+    assert prompts[0] == main.verdict_cache.quantized_features(sample(abuse_score=7))
+
+    stats = main.verdict_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+@pytest.mark.anyio
+async def test_llm_verdict_does_not_cache_fallback(monkeypatch):
+    monkeypatch.setattr(main, "verdict_cache", VerdictCache())
+    monkeypatch.setattr(main, "VERDICT_CACHE_ENABLED", True)
+    monkeypatch.setattr(main, "LLM_GATE_ENABLED", False)
+
+    async def fake_llm(data):
+        return FALLBACK
+
+    monkeypatch.setattr(main, "analyze_with_llm_async", fake_llm)
+
+    await main.llm_verdict(sample())
+    assert main.verdict_cache.get(sample()) is None